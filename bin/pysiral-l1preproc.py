@@ -4,19 +4,24 @@
 
 import argparse
 import sys
+import os
 
 from pysiral import get_cls
 from pysiral.config import ConfigInfo, DefaultCommandLineArguments
 from pysiral.errorhandler import ErrorStatus
 from pysiral.logging import DefaultLoggingClass
 from pysiral.l1preproc import get_preproc, Level1PreProcJobDef, Level1POutputHandler
+from pysiral.l2proc import Level2Processor, Level2ProductDefinition
+from pysiral.path import file_basename
 
 
-def pysiral_l1preproc(job):
+def pysiral_l1preproc(job, l2proc=None):
     """
     Workflow script of the pysiral l1b preprocessor.
 
     :param job: A pysiral.l1preproc.Level1PreProcJobDef instance
+    :param l2proc: An optional pysiral.l2proc.Level2Processor instance for the Level-2 processing
+                   of the merged l1 segments without reading the l1p files
     :return: None
     """
 
@@ -41,6 +46,8 @@ def pysiral_l1preproc(job):
     # 4. Get the pre-processor
     preproc_def = job.l1pprocdef.level1_preprocessor
     l1preproc = get_preproc(preproc_def.type, input_adapter, output_handler, preproc_def.options)
+    if l2proc is not None:
+        l1preproc.set_l2_processor(l2proc)
 
     # 5. Loop over monthly periods
     for period in job.time_range.iterations:
@@ -60,6 +67,36 @@ def pysiral_l1preproc(job):
     # Report processing time
     job.stopwatch.stop()
     job.info("Level-1 PreProcessor finished in %s" % job.stopwatch.get_duration())
+    if l2proc is not None:
+        l2proc.report.run_seconds = job.stopwatch.get_seconds()
+        l2proc.finish(job.time_range)
+
+
+def get_l2proc(args):
+    """
+    Returns the Level-2 processor for the in-memory Level-1 pre-processor -> Level-2 processor
+    pipeline (None if no Level-2 settings are given)
+    :param args: The command line arguments of pysiral-l1preproc
+    :return: pysiral.l2proc.Level2Processor instance or None
+    """
+
+    if args.l2_settings is None:
+        return None
+
+    # Get the l2 settings file
+    l2_settings_file = ConfigInfo().get_settings_file("proc", "l2", args.l2_settings)
+    if l2_settings_file is None:
+        sys.exit("Invalid l2 settings filename or id: %s" % args.l2_settings)
+
+    # The run tag (output directory) is the l2 settings id
+    run_tag = args.l2_settings
+    if os.path.isfile(run_tag):
+        run_tag = file_basename(run_tag)
+
+    # Initialize the Level-2 processor in streaming mode (l2 data is not needed after the output is written)
+    product_def = Level2ProductDefinition([run_tag], l2_settings_file)
+    product_def.add_output_definition(args.l2_output, overwrite_protection=False)
+    return Level2Processor(product_def, streaming=True, async_output=args.async_output)
 
 
 class Level1PreProcArgParser(DefaultLoggingClass):
@@ -75,6 +112,11 @@ class Level1PreProcArgParser(DefaultLoggingClass):
         # (first validation of required options and data types)
         self._args = self.parser.parse_args()
 
+        # The l1p files can only be omitted if the l1 data is directly passed
+        # to the Level-2 processor
+        if not self._args.export_l1p and self._args.l2_settings is None:
+            self.parser.error("--no-l1p-export requires -l2-settings")
+
     def critical_prompt_confirmation(self):
 
         # Any confirmation prompts can be overriden by --no-critical-prompt
@@ -109,6 +151,10 @@ class Level1PreProcArgParser(DefaultLoggingClass):
             ("-stop", "date", "stop_date", True),
             ("-exclude-month", "exclude-month", "exclude_month", False),
             ("-hemisphere", "hemisphere", "hemisphere", False),
+            ("-l2-settings", "l2-settings", "l2_settings", False),
+            ("-l2-output", "l2-output", "l2_output", False),
+            ("--no-l1p-export", "no-l1p-export", "export_l1p", False),
+            ("--async-output", "async-output", "async_output", False),
             ("--remove-old", "remove-old", "remove_old", False),
             ("--no-critical-prompt", "no-critical-prompt", "no_critical_prompt", False),
             ("--no-overwrite-protection", "no-overwrite-protection", "overwrite_protection", False),
@@ -143,5 +189,8 @@ if __name__ == "__main__":
     # Create the job definitions
     job = Level1PreProcJobDef.from_args(cmd_args.args)
 
+    # Optional: Level-2 processor for the merged l1 segments
+    l2proc = get_l2proc(cmd_args.args)
+
     # Execute Level-1 Pre-Processor Workflow
-    pysiral_l1preproc(job)
+    pysiral_l1preproc(job, l2proc=l2proc)
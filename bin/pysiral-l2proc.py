@@ -41,8 +41,8 @@ def pysiral_l2proc():
 def pysiral_l2proc_time_range_job(args):
     """ This is a Level-2 Processor job for a given time range """
 
-    # Get start time of processor run
-    t0 = time.clock()
+    # Get start time of processor run (wall time)
+    t0 = time.time()
 
     # Get the product definition
     product_def = Level2ProductDefinition(args.run_tag, args.l2_settings_file)
@@ -62,7 +62,8 @@ def pysiral_l2proc_time_range_job(args):
     l1b_data_handler = DefaultL1bDataHandler(mission_id, hemisphere, version=args.l1b_version)
 
     # Processor Initialization
-    l2proc = Level2Processor(product_def)
+    l2proc = Level2Processor(product_def, n_workers=args.n_workers, streaming=args.streaming,
+                             resume=args.resume, async_output=args.async_output)
 
 #    # Loop over iterations (one per month)
     for time_range in job.iterations:
@@ -83,7 +84,7 @@ def pysiral_l2proc_time_range_job(args):
         l2proc.process_l1b_files(l1b_files)
 
     # All done
-    t1 = time.clock()
+    t1 = time.time()
     seconds = int(t1-t0)
     l2proc.log.info("Run completed in %s" % str(timedelta(seconds=seconds)))
 
@@ -91,8 +92,8 @@ def pysiral_l2proc_time_range_job(args):
 def pysiral_l2proc_l1b_predef_job(args):
     """ A more simple Level-2 job with a predefined list of l1b data files """
 
-    # Get start time of processor run
-    t0 = time.clock()
+    # Get start time of processor run (wall time)
+    t0 = time.time()
 
     # Get the product definition
     product_def = Level2ProductDefinition(args.run_tag, args.l2_settings_file)
@@ -101,11 +102,12 @@ def pysiral_l2proc_l1b_predef_job(args):
     product_def.add_output_definition(args.l2_output, overwrite_protection=args.overwrite_protection)
 
     # Processor Initialization
-    l2proc = Level2Processor(product_def)
+    l2proc = Level2Processor(product_def, n_workers=args.n_workers, streaming=args.streaming,
+                             resume=args.resume, async_output=args.async_output)
     l2proc.process_l1b_files(args.l1b_predef_files)
 
     # All done
-    t1 = time.clock()
+    t1 = time.time()
     seconds = int(t1-t0)
     l2proc.log.info("Run completed in %s" % str(timedelta(seconds=seconds)))
 
@@ -171,7 +173,11 @@ class Level2ProcArgParser(DefaultLoggingClass):
             ("-exclude-month", "exclude-month", "exclude_month", False),
             ("-input-version", "input-version", "input_version", False),
             ("-l2-output", "l2-output", "l2_output", False),
+            ("-n-workers", "n-workers", "n_workers", False),
             ("--remove-old", "remove-old", "remove_old", False),
+            ("--streaming", "streaming", "streaming", False),
+            ("--resume", "resume", "resume", False),
+            ("--async-output", "async-output", "async_output", False),
             ("--no-critical-prompt", "no-critical-prompt",
              "no_critical_prompt", False),
             ("--no-overwrite-protection", "no-overwrite-protection",
@@ -255,6 +261,22 @@ class Level2ProcArgParser(DefaultLoggingClass):
         else:
             return filename
 
+    @property
+    def n_workers(self):
+        return self._args.n_workers
+
+    @property
+    def streaming(self):
+        return self._args.streaming
+
+    @property
+    def resume(self):
+        return self._args.resume
+
+    @property
+    def async_output(self):
+        return self._args.async_output
+
     @property
     def l1b_version(self):
         return self._args.input_version
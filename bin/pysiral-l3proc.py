@@ -48,7 +48,7 @@ def pysiral_l3proc():
     product_def = Level3ProductDefinition(args.l3_settings_file, grid, output, period)
 
     # Initialize the Processor
-    l3proc = Level3Processor(product_def)
+    l3proc = Level3Processor(product_def, async_output=args.async_output)
 
     # Loop over all iterations
     for time_range in period.iterations:
@@ -69,6 +69,9 @@ def pysiral_l3proc():
         # Start the Level-3 processing
         l3proc.process_l2i_files(l2i_files, time_range)
 
+    # Wait for the output of the last period
+    l3proc.flush_output()
+
     # Final reporting
     t1 = time.clock()
     seconds = int(t1 - t0)
@@ -139,6 +142,7 @@ class Level3ProcArgParser(DefaultLoggingClass):
             ("-doi", "doi", "doi", False),
             ("-data-record-type", "data_record_type", "data_record_type", False),
             ("--remove-old", "remove-old", "remove_old", False),
+            ("--async-output", "async-output", "async_output", False),
             ("--no-critical-prompt", "no-critical-prompt",
              "no_critical_prompt", False)]
 
@@ -177,6 +181,10 @@ class Level3ProcArgParser(DefaultLoggingClass):
     def data_record_type(self):
         return self._args.data_record_type
 
+    @property
+    def async_output(self):
+        return self._args.async_output
+
     @property
     def l2i_product_directory(self):
         return os.path.join(self.l3_product_basedir, "l2i")
@@ -10,6 +10,12 @@ __all__ = ["mss", "icechart", "rio", "sic", "sitype", "snow", "region"]
 
 import os
 import re
+import hashlib
+import threading
+import weakref
+
+from collections import OrderedDict
+from datetime import date, timedelta
 
 import numpy as np
 
@@ -20,6 +26,7 @@ from pyproj import Proj
 
 from pysiral.config import options_from_dictionary
 from pysiral.errorhandler import ErrorStatus
+from pysiral.output import NETCDF_IO_LOCK
 
 
 class AuxdataBaseClass(object):
@@ -50,15 +57,18 @@ class AuxdataBaseClass(object):
         # --- Class internals ---
 
         # This is for auxiliary data handlers that require to read external product files for
-        # a defined period (daily, monthly, ...). The implementation currently keeps only one
-        # external product in memory at the time. The period (date list: yyyy, mm, dd) of this
-        # currently loaded product is designated as current_date  This date is compared to the
+        # a defined period (daily, monthly, ...). The period (date list: yyyy, mm, dd) of the
+        # currently used product is designated as current_date  This date is compared to the
         # requested date and if a new product is loaded upon mismatch of current & requested data
         # NOTE: This will be bypassed by static auxiliary data classes
-        # TODO: Load all auxiliary products for processing period in memory (allow parallel processing)
         self._current_date = [0, 0, 0]
         self._requested_date = [-1, -1, -1]
 
+        # Subclasses that implement `read_auxdata_file(path)` keep the last products in a
+        # bounded cache and load the product of the next period in the background
+        # (options: `cache_size`, `prefetch_next_day`)
+        self._product_cache = AuxdataProductCache(max_size=self.cache_size)
+
         # A dictionary with the output variables of the auxiliary data set
         self.reset_auxvars()
 
@@ -68,9 +78,9 @@ class AuxdataBaseClass(object):
 
     def set_requested_date_from_l2(self, l2):
         """ Convenience method, Use first timestamp as reference, date changes are ignored """
-        year = l2.track.timestamp[0].year
-        month = l2.track.timestamp[0].month
-        day = l2.track.timestamp[0].day
+        year = l2.track.start_time.year
+        month = l2.track.start_time.month
+        day = l2.track.start_time.day
         self.set_requested_date(year, month, day)
 
     def check_data_availability(self, data_container_name="_data"):
@@ -156,15 +166,40 @@ class AuxdataBaseClass(object):
         if self._requested_date != self._current_date:
             # NOTE: The implementation of this method needs to be in the subclass
             self.load_requested_auxdata()
-            self._current_date = self._requested_date
+            # Only a successful load sets the current date, otherwise the file is
+            # requested (and a missing file reported) again for the next orbit
             if self.has_data_loaded:
+                self._current_date = self._requested_date
                 self.add_handler_message(self.__class__.__name__ + ": Load "+self.requested_filepath)
+                # Orbits are usually processed in chronological order
+                if self.prefetch_next_day:
+                    self.prefetch_auxdata_for_date(self.next_day)
         else:
-            if self.has_data_loaded:
-                self.add_handler_message(self.__class__.__name__+": Data already present")
-            else:
-                msg = ": No Data: Loading failed in an earlier attempt"
-                self.add_handler_message(self.__class__.__name__ + msg)
+            self.add_handler_message(self.__class__.__name__+": Data already present")
+
+    def get_cached_auxdata(self, path):
+        """ Returns the content of an auxiliary data file from the product cache. The file is read
+        with the subclass method `read_auxdata_file(path)` if it has not been loaded before """
+        return self._product_cache.get(path, self.read_auxdata_file)
+
+    def prefetch_auxdata_for_date(self, requested_date):
+        """ Starts reading the auxiliary data file for a given date (list: yyyy, mm, dd) in a
+        background thread. Missing files are ignored, they will be reported once the date
+        is actually requested """
+        path = self.get_filepath_for_date(requested_date)
+        if not os.path.isfile(path):
+            return
+        self._product_cache.prefetch(path, self.read_auxdata_file)
+
+    def get_filepath_for_date(self, requested_date):
+        """ Returns the local file path for an arbitrary date (list: yyyy, mm, dd) """
+        current_requested_date = self._requested_date
+        self._requested_date = list(requested_date)
+        try:
+            path = self.requested_filepath
+        finally:
+            self._requested_date = current_requested_date
+        return path
 
     def update_l2(self, l2):
         """ Automatically add all auxiliary variables to a Level-2 data object"""
@@ -186,6 +221,39 @@ class AuxdataBaseClass(object):
             return False
         return self._data is not None
 
+    @property
+    def has_product_cache(self):
+        """ Only subclasses with a file reader method for a single product can use the product cache """
+        return callable(getattr(self, "read_auxdata_file", None))
+
+    @property
+    def cache_size(self):
+        """ Maximum number of products kept in memory (option: `cache_size`, default: 3) """
+        options = self.cfg.options
+        if options is None or not options.has_key("cache_size"):
+            return 3
+        return options.cache_size
+
+    @property
+    def prefetch_next_day(self):
+        """ Flag if the product for the day after the requested date should be read in the
+        background (option: `prefetch_next_day`, default: True for cached products) """
+        if not self.has_product_cache:
+            return False
+        options = self.cfg.options
+        if options is None or not options.has_key("prefetch_next_day"):
+            return True
+        return options.prefetch_next_day
+
+    @property
+    def next_day(self):
+        """ The day after the requested date (list: yyyy, mm, dd) """
+        try:
+            next_day = date(*self._requested_date) + timedelta(days=1)
+        except (TypeError, ValueError):
+            return [-1, -1, -1]
+        return [next_day.year, next_day.month, next_day.day]
+
     @property
     def exception_on_error(self):
         if self.cfg.options.has_key("exception_on_error"):
@@ -290,9 +358,99 @@ class AuxClassConfig(object):
         self.subfolders = subfolder_list
 
 
+class AuxdataProductCache(object):
+    """ A bounded in-memory store for the content of auxiliary data files (e.g. daily grids). The least
+    recently used product is removed if the maximum number of products is exceeded. Files can be
+    read in a background thread ahead of their use. """
+
+    # File reads of all auxiliary data handlers use the process-wide netCDF lock, since
+    # netCDF/HDF5 is not thread-safe (also not against l1p reads or output writes)
+    read_lock = NETCDF_IO_LOCK
+
+    def __init__(self, max_size=3):
+        self.max_size = max(int(max_size), 1)
+        self._products = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, reader):
+        """ Returns the product for a file path. The product is read with reader(path) if it
+        is not already in the cache (or is being read in the background) """
+
+        # Wait for a running background read of the same file
+        with self._lock:
+            thread = self._pending.get(path, None)
+        if thread is not None:
+            thread.join()
+
+        # Return cached product & mark as most recently used
+        with self._lock:
+            if path in self._products:
+                product = self._products.pop(path)
+                self._products[path] = product
+                return product
+
+        product = self._read(path, reader)
+        if product is not None:
+            self.add(path, product)
+        return product
+
+    def prefetch(self, path, reader):
+        """ Read a product in a background thread if it is not already in the cache """
+        with self._lock:
+            if path in self._products or path in self._pending:
+                return
+            thread = threading.Thread(target=self._prefetch, args=(path, reader))
+            thread.daemon = True
+            self._pending[path] = thread
+        thread.start()
+
+    def add(self, path, product):
+        """ Add a product to the cache and remove the least recently used products if necessary """
+        with self._lock:
+            self._products.pop(path, None)
+            self._products[path] = product
+            while len(self._products) > self.max_size:
+                self._products.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._products.clear()
+
+    def _prefetch(self, path, reader):
+        # Errors are ignored here, the file will be read (and the error reported) again on request
+        try:
+            product = self._read(path, reader)
+        except Exception:
+            product = None
+        if product is not None:
+            self.add(path, product)
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _read(self, path, reader):
+        with self.read_lock:
+            return reader(path)
+
+    @property
+    def paths(self):
+        return list(self._products.keys())
+
+    @property
+    def n_products(self):
+        return len(self._products)
+
+
 class GridTrackInterpol(object):
     """ Implements fast extraction of gridded data along a track using Image Interpolation """
 
+    # Projections and projected grid origins are shared between all instances, so only
+    # the track coordinates need to be projected for every orbit
+    max_cache_size = 16
+    _projection_cache = OrderedDict()
+    _grid_origin_cache = OrderedDict()
+    _array_digest_cache = OrderedDict()
+
     def __init__(self, lons, lats, grid_lons, grid_lats, griddef):
         """
         lons, lats: ground track
@@ -324,7 +482,7 @@ class GridTrackInterpol(object):
         self._get_track_image_coordinates()
 
     def _set_projection(self):
-        self.p = Proj(**self.griddef.projection)
+        self.p, self._projection_id = self.get_projection(self.griddef.projection)
 
     def _get_track_image_coordinates(self):
         """ Computes the image coordinates that will be used for the m"""
@@ -332,15 +490,64 @@ class GridTrackInterpol(object):
         # Convert track coordinates to grid projection coordinates
         tr_x, tr_y = self.p(self.lons, self.lats)
 
-        # Convert grid coordinates to grid projection coordinates
-        x, y = self.p(self.grid_lons, self.grid_lats)
+        # Grid origin in projection coordinates (computed once per grid)
+        x_min, y_min = self.get_grid_origin()
 
         # Convert track projection coordinates to image coordinates
         # x: 0 < n_lines; y: 0 < n_cols
         dim = self.griddef.dimension
-        x_min, y_min = np.nanmin(x), np.nanmin(y)
         self.ix, self.iy = (tr_x-x_min)/dim.dx, (tr_y-y_min)/dim.dy
 
+    def get_grid_origin(self):
+        """ Returns the minimum x, y projection coordinates of the grid. Reprojecting the full grid is
+        expensive and the result is therefore cached for each combination of projection and grid
+        coordinates """
+
+        # The grid coordinates are identified by their content, since the arrays are
+        # usually re-read with every new auxiliary data file
+        grid_id = (self._projection_id, self.get_array_digest(self.grid_lons),
+                   self.get_array_digest(self.grid_lats))
+        cache = GridTrackInterpol._grid_origin_cache
+        if grid_id in cache:
+            return cache[grid_id]
+
+        # Convert grid coordinates to grid projection coordinates
+        x, y = self.p(self.grid_lons, self.grid_lats)
+        grid_origin = (np.nanmin(x), np.nanmin(y))
+        cache[grid_id] = grid_origin
+        while len(cache) > self.max_cache_size:
+            cache.popitem(last=False)
+        return grid_origin
+
+    @classmethod
+    def get_projection(cls, projection):
+        """ Returns a (cached) pyproj.Proj instance and an identifier for a projection definition """
+        projection_id = repr(sorted((key, projection[key]) for key in projection.keys()))
+        cache = GridTrackInterpol._projection_cache
+        if projection_id not in cache:
+            cache[projection_id] = Proj(**projection)
+            while len(cache) > cls.max_cache_size:
+                cache.popitem(last=False)
+        return cache[projection_id], projection_id
+
+    @classmethod
+    def get_array_digest(cls, array):
+        """ Returns an identifier of the array content. The digest is remembered for the array
+        instance, since the same grid arrays are typically passed for many orbits """
+        cache = GridTrackInterpol._array_digest_cache
+        array_ref, digest = cache.get(id(array), (None, None))
+        if array_ref is not None and array_ref() is array:
+            return digest
+        data = np.ascontiguousarray(array)
+        digest = data.shape, data.dtype.str, hashlib.sha1(data.view(np.uint8)).hexdigest()
+        try:
+            cache[id(array)] = (weakref.ref(array), digest)
+        except TypeError:
+            return digest
+        while len(cache) > 2*cls.max_cache_size:
+            cache.popitem(last=False)
+        return digest
+
     def get_from_grid_variable(self, gridvar, order=0, flipud=False):
         """ Returns a along-track data from a grid variable"""
         if flipud:
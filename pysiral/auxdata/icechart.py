@@ -56,9 +56,9 @@ class IC(AuxdataBaseClass):
         
     def _get_requested_date(self, l2):
         """ Use first timestamp as reference, date changes are ignored """
-        year = l2.track.timestamp[0].year
-        month = l2.track.timestamp[0].month
-        day = l2.track.timestamp[0].day
+        year = l2.track.start_time.year
+        month = l2.track.start_time.month
+        day = l2.track.start_time.day
         self._requested_date = [year, month, day]
 
     def _get_data(self, l2):
@@ -233,9 +233,9 @@ class ICA(AuxdataBaseClass):
 
     def _get_requested_date(self, l2):
         """ Use first timestamp as reference, date changes are ignored """
-        year = l2.track.timestamp[0].year
-        month = l2.track.timestamp[0].month
-        day = l2.track.timestamp[0].day
+        year = l2.track.start_time.year
+        month = l2.track.start_time.month
+        day = l2.track.start_time.day
         self._requested_date = [year, month, day]
 
     def _get_data(self, l2):
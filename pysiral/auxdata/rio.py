@@ -51,9 +51,9 @@ class RIO(AuxdataBaseClass):
 
     def _get_requested_date(self, l2):
         """ Use first timestamp as reference, date changes are ignored """
-        year = l2.track.timestamp[0].year
-        month = l2.track.timestamp[0].month
-        day = l2.track.timestamp[0].day
+        year = l2.track.start_time.year
+        month = l2.track.start_time.month
+        day = l2.track.start_time.day
         self._requested_date = [year, month, day]
         
     def IceChartToRIO(self, icechart, ice_class="none", summer=False):
@@ -88,6 +88,9 @@ class OsiSafSIC(AuxdataBaseClass):
         # Retrieve the file path for the requested date from a property of the auxdata parent class
         path = self.requested_filepath
 
+        # Data of a previous day must not be used if the file is missing
+        self._data = None
+
         #  --- Validation ---
         if not os.path.isfile(path):
             msg = self.pyclass+": File not found: %s " % path
@@ -95,16 +98,24 @@ class OsiSafSIC(AuxdataBaseClass):
             self.error.add_error("auxdata_missing_sic", msg)
             return
 
+        # --- Read the data (or get it from the product cache) ---
+        self._data = self.get_cached_auxdata(path)
+
+    def read_auxdata_file(self, path):
+        """ Read and pre-process a single sea ice concentration file (used by the product cache) """
+
         # --- Read the data ---
-        self._data = ReadNC(path)
+        data = ReadNC(path)
 
         # --- Pre-process the data ---
         # Remove time dimension
-        self._data.ice_conc = self._data.ice_conc[0, :, :]
+        data.ice_conc = data.ice_conc[0, :, :]
 
         # No negative ice concentrations
-        flagged = np.where(self._data.ice_conc < 0)
-        self._data.ice_conc[flagged] = np.nan
+        flagged = np.where(data.ice_conc < 0)
+        data.ice_conc[flagged] = np.nan
+
+        return data
 
     def _get_sic_track(self, l2):
         """ Simple extraction along trajectory"""
@@ -168,9 +179,9 @@ class IfremerSIC(AuxdataBaseClass):
 
     def _get_requested_date(self, l2):
         """ Use first timestamp as reference, date changes are ignored """
-        year = l2.track.timestamp[0].year
-        month = l2.track.timestamp[0].month
-        day = l2.track.timestamp[0].day
+        year = l2.track.start_time.year
+        month = l2.track.start_time.month
+        day = l2.track.start_time.day
         self._requested_date = [year, month, day]
 
     def _get_data(self, l2):
@@ -80,6 +80,9 @@ class OsiSafSIType(AuxdataBaseClass):
         # Retrieve the file path for the requested date from a property of the auxdata parent class
         path = self.requested_filepath
 
+        # Data of a previous day must not be used if the file is missing
+        self._data = None
+
         # Validation
         if not os.path.isfile(path):
             msg = "OsiSafSIType: File not found: %s " % path
@@ -87,12 +90,16 @@ class OsiSafSIType(AuxdataBaseClass):
             self.error.add_error("auxdata_missing_sitype", msg)
             return
 
-        # --- Read the data ---
-        self._data = ReadNC(path)
+        # --- Read the data (or get it from the product cache) ---
+        self._data = self.get_cached_auxdata(path)
 
         # Report
         self.add_handler_message("OsiSafSIType: Loaded SIType file: %s" % path)
 
+    def read_auxdata_file(self, path):
+        """ Read a single sea ice type file (used by the product cache) """
+        return ReadNC(path)
+
     def _get_sitype_track(self, l2):
 
         # Extract from grid
@@ -239,34 +246,28 @@ class ICDCNasaTeam(AuxdataBaseClass):
         self._data = None
 
     def get_l2_track_vars(self, l2):
-        self._get_requested_date(l2)
-        self._get_data(l2)
-        if self.error.status:
-            sitype, sitype_uncertainty = self.get_empty_val(l2), self.get_empty_val(l2)
+
+        # This property is needed to construct the product path
+        self.hemisphere_code = l2.hemisphere_code
+
+        # Set the requested date & update the external data
+        self.set_requested_date_from_l2(l2)
+        self.update_external_data()
+
+        if self.error.status or self._data is None:
+            sitype, sitype_uncertainty = self.get_empty_array(l2), self.get_empty_array(l2)
         else:
             sitype, sitype_uncertainty = self._get_sitype_track(l2)
         self.register_auxvar("sitype", "sea_ice_type", sitype, None)
 
-    def _get_requested_date(self, l2):
-        """ Use first timestamp as reference, date changes are ignored """
-        year = l2.track.timestamp[0].year
-        month = l2.track.timestamp[0].month
-        day = l2.track.timestamp[0].day
-        self._requested_date = [year, month, day]
-
-    def _get_data(self, l2):
+    def load_requested_auxdata(self):
         """ Loads file from local repository only if needed """
 
-        opt = self.cfg.options
-
-        # Check if file is already loaded
-        if self._requested_date == self._current_date:
-            # Data already loaded, nothing to do
-            self.add_handler_message("ICDCNasaTeam: Daily grid already present")
-            return
-
         # construct filename
-        path = self._get_local_repository_filename(l2)
+        path = self.requested_filepath
+
+        # Data of a previous day must not be used if the file is missing
+        self._data = None
 
         # Check if the file exists, add an error if not
         # (error is not raised at this point)
@@ -276,48 +277,57 @@ class ICDCNasaTeam(AuxdataBaseClass):
             self.error.add_error("auxdata_missing_sitype", msg)
             return
 
+        # Bulk read the netcdf file (or get it from the product cache)
+        self._data = self.get_cached_auxdata(path)
+
+    def read_auxdata_file(self, path):
+        """ Read a single daily file (used by the product cache) """
+
+        opt = self.cfg.options
+
         # Bulk read the netcdf file
-        self._data = ReadNC(path)
+        data = ReadNC(path)
 
         # There are multiple myi concentrations fields in the product
         # The one used here is defined in the auxdata definition file
         # in the pysiral config folder (`auxdata_def.yaml`)
         # -> root.sitype.icdc_nasateam.options.variable_name
-        myi_fraction = getattr(self._data, opt.variable_name)
-        self._data.ice_type = myi_fraction[0, :, :]
+        myi_fraction = getattr(data, opt.variable_name)
+        data.ice_type = myi_fraction[0, :, :]
 
         # Same for the uncertainty variable
         # (see description directly above for how to access variable namde
         #  definition)
-        myi_fraction_unc = getattr(self._data, opt.uncertainty_variable_name)
-        self._data.ice_type_uncertainty = myi_fraction_unc[0, :, :]
+        myi_fraction_unc = getattr(data, opt.uncertainty_variable_name)
+        data.ice_type_uncertainty = myi_fraction_unc[0, :, :]
 
-        # Report and save current data period
-        self.add_handler_message("ICDCNasaTeam: Loaded SIType file: %s" % path)
-        self._current_date = self._requested_date
+        return data
 
-    def _get_local_repository_filename(self, l2):
+    @property
+    def requested_filepath(self):
+        """ Note: this overwrites the property in the super class due to some
+        peculiarities with the filenaming (hemisphere code) """
         path = self.cfg.local_repository
         for subfolder_tag in self.cfg.subfolders:
             subfolder = getattr(self, subfolder_tag)
             path = os.path.join(path, subfolder)
         filename = self.cfg.filenaming.format(
             year=self.year, month=self.month, day=self.day,
-            hemisphere_code=l2.hemisphere_code)
+            hemisphere_code=self.hemisphere_code)
         path = os.path.join(path, filename)
         return path
 
     def _get_sitype_track(self, l2):
 
         # Convert grid/track coordinates to grid projection coordinates
-        kwargs = self.cfg.option[l2.hemisphere].projection
+        kwargs = self.cfg.options[l2.hemisphere].projection
         p = Proj(**kwargs)
         x, y = p(self._data.longitude, self._data.latitude)
         l2x, l2y = p(l2.track.longitude, l2.track.latitude)
 
         # Convert track projection coordinates to image coordinates
         # x: 0 < n_lines; y: 0 < n_cols
-        dim = self.cfg.option[l2.hemisphere].dimension
+        dim = self.cfg.options[l2.hemisphere].dimension
 
         x_min = x[0, 0]-(0.5*dim.dx)
         y_min = y[0, 0]-(0.5*dim.dy)
@@ -171,7 +171,7 @@ class Warren99(AuxdataBaseClass):
         """ This convinience function translates the information from the l2 object
         for the evaluate method """
         # get projection coordinates
-        month = l2.track.timestamp[0].month
+        month = l2.track.start_time.month
         snow = self.evaluate(l2.track.longitude, l2.track.latitude, month)
         return snow
 
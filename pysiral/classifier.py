@@ -16,6 +16,32 @@ class BaseClassifier(object):
     def __init__(self):
         pass
 
+    @staticmethod
+    def _get_noise_corrected_counts(wfm_counts):
+        """
+        Returns the waveform counts as float32 array (n_records, n_range_bins)
+        with the mean of the first 11 range bins (noise) removed from each
+        waveform and negative counts set to zero.
+        """
+        y = np.array(wfm_counts, dtype=np.float32, ndmin=2)
+        y -= np.nanmean(y[:, 0:11], axis=1)[:, np.newaxis]  # Remove Noise
+        y[y < 0.0] = 0.0  # Set negative counts to zero
+        return y
+
+    @staticmethod
+    def _get_peak(y):
+        """
+        Returns waveform peak value and index for each record of `y`.
+        Waveforms consisting only of NaN's have a NaN peak value and
+        an invalid index flag (is_valid = False)
+        """
+        is_valid = np.any(~np.isnan(y), axis=1)
+        y_filled = np.where(np.isnan(y), -np.inf, y)
+        ypi = np.argmax(y_filled, axis=1)
+        yp = y_filled[np.arange(y.shape[0]), ypi]
+        yp[~is_valid] = np.nan
+        return yp, ypi, is_valid
+
 
 class CS2OCOGParameter(BaseClassifier):
     """
@@ -32,13 +58,12 @@ class CS2OCOGParameter(BaseClassifier):
         self._calc_parameters(wfm_counts)
 
     def _calc_parameters(self, wfm_counts):
-        for i in np.arange(self._n):
-            y = wfm_counts[i, :].flatten().astype(np.float32)
-            y -= np.nanmean(y[0:11])  # Remove Noise
-            y[np.where(y < 0.0)[0]] = 0.0  # Set negative counts to zero
-            y2 = y**2.0
-            self._amplitude[i] = np.sqrt((y2**2.0).sum() / y2.sum())
-            self._width[i] = ((y2.sum())**2.0) / (y2**2.0).sum()
+        y = self._get_noise_corrected_counts(wfm_counts)
+        y2 = y**2.0
+        y2_sum = y2.sum(axis=1)
+        y4_sum = (y2**2.0).sum(axis=1)
+        self._amplitude[:] = np.sqrt(y4_sum / y2_sum)
+        self._width[:] = (y2_sum.astype(np.float64)**2.0) / y4_sum
 
     @property
     def amplitude(self):
@@ -69,23 +94,26 @@ class CS2PulsePeakiness(BaseClassifier):
         self._calc_parameters(wfm_counts)
 
     def _calc_parameters(self, wfm_counts):
-        for i in np.arange(self._n):
-            try:
-                y = wfm_counts[i, :].flatten().astype(np.float32)
-                y -= np.nanmean(y[0:11])  # Remove Noise
-                y[np.where(y < 0.0)[0]] = 0.0  # Set negative counts to zero
-                yp = np.nanmax(y)  # Waveform peak value
-                ypi = np.nanargmax(y)  # Waveform peak index
-                if ypi > 3*self._pad and ypi < self._n_range_bins-4*self._pad:
-                    self._peakiness_l[i] = yp/np.nanmean(
-                        y[ypi-3*self._pad:ypi-1*self._pad+1])*3.0
-                    self._peakiness_r[i] = yp/np.nanmean(y[
-                        ypi+1*self._pad:ypi+3*self._pad+1])*3.0
-                    self._peakiness[i] = yp/y.sum()*self._n_range_bins
-            except ValueError:
-                self._peakiness_l[i] = np.nan
-                self._peakiness_r[i] = np.nan
-                self._peakiness[i] = np.nan
+
+        y = self._get_noise_corrected_counts(wfm_counts)
+        yp, ypi, is_valid = self._get_peak(y)  # Waveform peak value & index
+
+        # Peakiness is only computed if the peak is not too close
+        # to the edges of the range window
+        pad = self._pad
+        is_valid &= np.logical_and(ypi > 3*pad, ypi < self._n_range_bins-4*pad)
+        rec = np.where(is_valid)[0]
+        if len(rec) == 0:
+            return
+        y, yp, ypi = y[rec, :], yp[rec], ypi[rec]
+
+        # Mean power left and right of the peak
+        rows = np.arange(len(rec))[:, np.newaxis]
+        left = ypi[:, np.newaxis] + np.arange(-3*pad, -1*pad+1)
+        right = ypi[:, np.newaxis] + np.arange(1*pad, 3*pad+1)
+        self._peakiness_l[rec] = yp/np.nanmean(y[rows, left], axis=1)*3.0
+        self._peakiness_r[rec] = yp/np.nanmean(y[rows, right], axis=1)*3.0
+        self._peakiness[rec] = yp/y.sum(axis=1)*self._n_range_bins
 
     @property
     def peakiness(self):
@@ -117,34 +145,28 @@ class S3LTPP(BaseClassifier):
         self._calc_parameters(wfm_counts)
 
     def _calc_parameters(self, wfm_counts):
-        # loop over the waveforms
-        for i in np.arange(self._n): 
-            try:
-                y = wfm_counts[i, :].flatten().astype(np.float32)
-                y -= np.nanmean(y[0:11])  # Remove Noise
-                y[np.where(y < 0.0)[0]] = 0.0  # Set negative counts to zero
-                yp = np.nanmax(y)  # Waveform peak value
-                
-                if np.isnan(yp): # if the current wf is nan
-                    # no ltpp can be computed
-                    self._ltpp[i] = np.nan
-                else:
-                    ypi = np.nanargmax(y)  # Waveform peak index
-                    
-                    # gates to compute the late tail:
-                    # [ypi+50:ypi+70] if 0padding=2, [ypi+25:ypi+35] if 0padding=1
-                    gate_start = ypi + self._pad*25
-                    gate_stop = ypi + self._pad*35 +1
-                    
-                    if ( gate_start > self._n_range_bins  or  gate_stop > self._n_range_bins ):
-                        # not enough gates to compute the LTPP
-                        self._ltpp[i] = np.nan
-                    else:
-                        self._ltpp[i] = np.mean(y[gate_start:gate_stop])/yp
-                        
-            except ValueError:
-                self._ltpp[i] = np.nan
-                
+
+        y = self._get_noise_corrected_counts(wfm_counts)
+        # no ltpp can be computed for nan waveforms
+        yp, ypi, is_valid = self._get_peak(y)  # Waveform peak value & index
+
+        # gates to compute the late tail:
+        # [ypi+50:ypi+70] if 0padding=2, [ypi+25:ypi+35] if 0padding=1
+        gate_start = ypi + self._pad*25
+        gate_stop = ypi + self._pad*35 + 1
+
+        # not enough gates to compute the LTPP
+        is_valid &= np.logical_and(gate_start <= self._n_range_bins,
+                                   gate_stop <= self._n_range_bins)
+        rec = np.where(is_valid)[0]
+        self._ltpp[~is_valid] = np.nan
+        if len(rec) == 0:
+            return
+
+        gates = gate_start[rec, np.newaxis] + np.arange(self._pad*10 + 1)
+        late_tail = y[rec[:, np.newaxis], gates]
+        self._ltpp[rec] = np.mean(late_tail, axis=1)/yp[rec]
+
     @property
     def ltpp(self):
         return self._ltpp        
@@ -166,25 +188,27 @@ class CS2LTPP(BaseClassifier):
         self._calc_parameters(wfm_counts)
 
     def _calc_parameters(self, wfm_counts):
-        # loop over the waveforms
-        for i in np.arange(self._n): 
-            y = wfm_counts[i, :].flatten().astype(np.float32)
-            y -= np.nanmean(y[0:11])  # Remove Noise
-            y[np.where(y < 0.0)[0]] = 0.0  # Set negative counts to zero
-            yp = np.nanmax(y)  # Waveform peak value
-            ypi = np.nanargmax(y)  # Waveform peak index
-	    
-            # AMANDINE: implementation for wf of 256 bins (128 0padded)?
-            onediv = float(1)/float(41)
-
-            # AMANDINE: here i seems to be understood as gate indice but it is wf indice!?
-            if i == 256: 
-                break
-            if [i > (ypi + 100)] and [i < (ypi + 140)]: # AMANDINE: syntax to be checked
-                try:
-                    self._ltpp[i] = (onediv*float(y[i]))/float(yp) # AMANDINE: where is the sum in this formula?
-                except ZeroDivisionError:
-                    self._ltpp[i] = np.nan
+
+        # AMANDINE: implementation for wf of 256 bins (128 0padded)?
+        onediv = float(1)/float(41)
+
+        # AMANDINE: here i seems to be understood as gate indice but it is wf indice!?
+        # (the legacy loop stopped at waveform index 256 and used the range
+        # bin with the same index as the waveform; this is kept as is)
+        n = min(self._n, self._n_range_bins, 256)
+        if n == 0:
+            return
+        y = self._get_noise_corrected_counts(wfm_counts[:n, :])
+        yp, ypi, is_valid = self._get_peak(y)  # Waveform peak value & index
+
+        # AMANDINE: where is the sum in this formula?
+        index = np.arange(n)
+        y_i = y[index, index].astype(np.float64)
+        yp = yp.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ltpp = (onediv*y_i)/yp
+        ltpp[np.logical_or(yp == 0.0, ~is_valid)] = np.nan
+        self._ltpp[:n] = ltpp
 
     @property
     def ltpp(self):
@@ -215,19 +239,39 @@ class EnvisatWaveformParameter(BaseClassifier):
         self.peakiness = np.ndarray(shape=(self._n), dtype=np.float32)*np.nan
 
     def _calc_parameter(self, wfm):
-        for i in np.arange(self._n):
-            # Discard first bins, they are FFT artefacts anyway
-            wave = wfm[i, self.skip:]
+
+        # Discard first bins, they are FFT artefacts anyway
+        wave_max, wave_sum = get_waveform_max_and_sum(wfm[:, self.skip:])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
 
             ## old peakiness
-            try:
-                pp = 0.0 + self.t_n * float(max(wave)) / float(sum(wave))
-            except ZeroDivisionError:
-                pp = np.nan
-            self.peakiness_old[i] = pp
+            self.peakiness_old[:] = 0.0 + self.t_n * wave_max / wave_sum
 
             ## new peakiness
-            try:
-                self.peakiness[i] = float(max(wave))/float(sum(wave))*self._n_range_bins
-            except ZeroDivisionError:
-                self.peakiness[i] = np.nan
+            self.peakiness[:] = wave_max / wave_sum * self._n_range_bins
+
+        self.peakiness_old[wave_sum == 0.0] = np.nan
+        self.peakiness[wave_sum == 0.0] = np.nan
+
+
+def get_waveform_max_and_sum(wave):
+    """
+    Returns maximum and sum (both float64) of each waveform in `wave`
+    (n_records, n_range_bins) with the same conventions as the builtin
+    `max` and `sum` functions applied to a single waveform: NaN in the first
+    range bin yields a NaN maximum, later NaN's are ignored for the maximum
+    and the sum is accumulated sequentially in double precision.
+    """
+    wave = np.asarray(wave)
+    n_records = wave.shape[0]
+    if wave.shape[1] == 0:
+        return np.full(n_records, np.nan), np.zeros(n_records)
+    wave_sum = np.cumsum(wave, axis=1, dtype=np.float64)[:, -1]
+    is_valid = np.any(~np.isnan(wave), axis=1)
+    wave_max = np.full(n_records, np.nan)
+    if np.any(is_valid):
+        wave_filled = np.where(np.isnan(wave[is_valid]), -np.inf, wave[is_valid])
+        wave_max[is_valid] = np.amax(wave_filled, axis=1)
+    wave_max[np.isnan(wave[:, 0])] = np.nan
+    return wave_max, wave_sum
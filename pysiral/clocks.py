@@ -10,6 +10,7 @@ This module is dedicatet to convert between different time standards
 from pysiral import USER_CONFIG_PATH
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+from dateutil import parser as dtparser
 
 import time
 import numpy as np
@@ -18,6 +19,78 @@ import os
 import re
 
 
+# Internal representation of timestamp arrays
+TIMESTAMP_DTYPE = "datetime64[us]"
+
+# Units of netCDF time variables in microseconds
+TIME_UNITS_MICROSECONDS = {
+    "microseconds": 1, "milliseconds": 1000, "seconds": 1000000,
+    "minutes": 60000000, "hours": 3600000000, "days": 86400000000}
+
+# Calendars that are compatible with numpy datetime64
+DATETIME64_CALENDARS = ["standard", "gregorian", "proleptic_gregorian"]
+
+
+def to_datetime64(timestamps):
+    """ Converts timestamps (datetime objects or datetime64 of any
+    resolution) into the internal datetime64 representation """
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == "O" and timestamps.size > 0:
+        # e.g. cftime/netcdftime objects
+        if not isinstance(timestamps.flat[0], datetime):
+            timestamps = np.array(
+                [datetime(t.year, t.month, t.day, t.hour, t.minute,
+                          t.second, t.microsecond) for t in timestamps.flat],
+                dtype=object).reshape(timestamps.shape)
+    return timestamps.astype(TIMESTAMP_DTYPE)
+
+
+def datetime64_to_datetime(timestamps):
+    """ Returns datetime objects (scalar or object array) from
+    datetime64 timestamps (only for output or scalar operations) """
+    return np.asarray(timestamps).astype(TIMESTAMP_DTYPE).astype(object)[()]
+
+
+def num2datetime64(values, units, calendar="standard"):
+    """ Converts numerical time values with netCDF time units
+    (`<unit> since <reference time>`) into datetime64 timestamps
+    without creating datetime objects """
+    unit, epoch = _parse_time_units(units, calendar)
+    if unit is None:
+        from netCDF4 import num2date
+        return to_datetime64(num2date(values, units, calendar))
+    values = np.ma.getdata(values).astype(np.float64)
+    microseconds = np.round(values*TIME_UNITS_MICROSECONDS[unit])
+    return epoch + microseconds.astype(np.int64).astype("timedelta64[us]")
+
+
+def datetime642num(timestamps, units, calendar="standard"):
+    """ Converts datetime64 timestamps into numerical time values
+    with netCDF time units (`<unit> since <reference time>`) """
+    unit, epoch = _parse_time_units(units, calendar)
+    if unit is None:
+        from netCDF4 import date2num
+        return date2num(datetime64_to_datetime(timestamps), units, calendar)
+    microseconds = (to_datetime64(timestamps) - epoch).astype(np.int64)
+    return microseconds / float(TIME_UNITS_MICROSECONDS[unit])
+
+
+def _parse_time_units(units, calendar):
+    """ Returns unit and reference time (datetime64) of netCDF time
+    units (unit is None if not supported by numpy datetime64) """
+    match = re.match(r"^\s*(\w+)\s+since\s+(.+)$", units)
+    if match is None or calendar not in DATETIME64_CALENDARS:
+        return None, None
+    unit = match.group(1).lower()
+    if unit not in TIME_UNITS_MICROSECONDS:
+        return None, None
+    epoch = dtparser.parse(match.group(2))
+    # Time zone aware reference times (e.g. `UTC` or `+02:00`) -> naive UTC
+    if epoch.tzinfo is not None:
+        epoch = (epoch - epoch.utcoffset()).replace(tzinfo=None)
+    return unit, np.datetime64(epoch, "us")
+
+
 class UTCTAIConverter(object):
 
     def __init__(self):
@@ -27,10 +100,14 @@ class UTCTAIConverter(object):
         self._get_leap_seconds_from_config_file()
 
     def tai2utc(self, tai_datetimes, monotonically=True, check_all=False):
-        """ Converts TAI datetime into UTC datetimes """
+        """ Converts TAI datetime into UTC datetimes (datetime64 input
+        will return datetime64 timestamps) """
 
         # prepare inputs
         tai_datetimes = np.asarray(tai_datetimes)
+        if tai_datetimes.dtype.kind == "M":
+            return self._tai2utc_datetime64(
+                tai_datetimes, monotonically, check_all)
         utc_datetimes = np.ndarray(shape=tai_datetimes.shape, dtype=object)
 
         # Use leap seconds for first array entry
@@ -57,6 +134,30 @@ class UTCTAIConverter(object):
 
         return utc_datetimes
 
+    def _tai2utc_datetime64(self, tai_timestamps, monotonically, check_all):
+        """ Vectorized tai2utc for datetime64 timestamps """
+
+        tai_timestamps = to_datetime64(tai_timestamps)
+
+        # Use leap seconds for first array entry or earliest timestamp
+        if not check_all:
+            start_time = tai_timestamps[0] if monotonically else \
+                np.amin(tai_timestamps)
+            leap_seconds = self._get_leap_seconds_for_utc_time(
+                datetime64_to_datetime(start_time))
+
+        # Compute leap second for each entry
+        else:
+            leap_seconds_dt64 = to_datetime64(self.leap_seconds_timestamp)
+            leap_seconds = np.zeros(tai_timestamps.shape, dtype=np.int64)
+            for ls_timestamp, ls in zip(leap_seconds_dt64, self.leap_seconds):
+                is_applicable = tai_timestamps - ls_timestamp >= \
+                    np.timedelta64(1, "D")
+                leap_seconds[is_applicable] = ls
+
+        leap_seconds = np.asarray(leap_seconds).astype("timedelta64[s]")
+        return tai_timestamps - leap_seconds
+
     def update_definition(self):
         """ Get definition file from web """
         # XXX: Requires error catching
@@ -60,6 +60,11 @@ class ConfigInfo(DefaultLoggingClass):
     Container for the content of the pysiral definition files
     (in pysiral/configuration) and the local machine definition file
     (local_machine_definition.yaml)
+
+    NOTE: The definition files are parsed only once per process and each
+          instance receives a copy of the parsed content. The same applies
+          to the list of settings files in the settings directories.
+          Use `ConfigInfo.clear_cache()` if any of the files has changed.
     """
 
     # Global variables
@@ -80,6 +85,10 @@ class ConfigInfo(DefaultLoggingClass):
     VALID_SETTING_TYPES = ["proc", "output", "grid"]
     VALID_DATA_LEVEL_IDS = ["l1", "l2", "l2i", "l2p", "l3", None]
 
+    # Process-wide cache of parsed definition files and settings file lists
+    _config_file_cache = {}
+    _setting_filelist_cache = {}
+
     def __init__(self):
         """ Read all definition files """
         super(ConfigInfo, self).__init__(self.__class__.__name__)
@@ -90,6 +99,13 @@ class ConfigInfo(DefaultLoggingClass):
         # read the local machine definition file
         self._read_local_machine_file()
 
+    @classmethod
+    def clear_cache(cls):
+        """ Invalidate the parsed definition files and the settings file
+        lists, changes will be read by the next instance of ConfigInfo """
+        cls._config_file_cache.clear()
+        cls._setting_filelist_cache.clear()
+
     @property
     def mission_ids(self):
         return self.mission.missions
@@ -161,7 +177,16 @@ class ConfigInfo(DefaultLoggingClass):
     def get_yaml_setting_filelist(self, directory, ignore_obsolete=True):
         """ Retrieve all yaml files from a given directory (including
         subdirectories). Directories named "obsolete" are ignored if
-        ignore_obsolete=True (default) """
+        ignore_obsolete=True (default). The directory is only searched
+        once per process (see clear_cache) """
+        key = (directory, ignore_obsolete)
+        if key not in self._setting_filelist_cache:
+            self._setting_filelist_cache[key] = self._find_yaml_setting_files(directory, ignore_obsolete)
+        setting_ids, setting_files = self._setting_filelist_cache[key]
+        return list(setting_ids), list(setting_files)
+
+    @staticmethod
+    def _find_yaml_setting_files(directory, ignore_obsolete):
         setting_ids = []
         setting_files = []
         for root, dirs, files in os.walk(directory):
@@ -185,12 +210,12 @@ class ConfigInfo(DefaultLoggingClass):
     def _read_config_files(self):
         for key in self._DEFINITION_FILES.keys():
             filename = os.path.join(USER_CONFIG_PATH, self._DEFINITION_FILES[key])
-            setattr(self, key, get_yaml_config(filename))
+            setattr(self, key, self._get_yaml_config(filename))
 
     def _read_local_machine_file(self):
         filename = os.path.join(USER_CONFIG_PATH, self._LOCAL_MACHINE_DEF_FILE)
         try:
-            local_machine_def = get_yaml_config(filename)
+            local_machine_def = self._get_yaml_config(filename)
         except IOError:
             msg = "local_machine_def.yaml not found (expected: %s)" % filename
             self.error.add_error("local-machine-def-missing", msg)
@@ -200,6 +225,13 @@ class ConfigInfo(DefaultLoggingClass):
     def _return_path(self, subfolder):
         return os.path.join(USER_CONFIG_PATH, subfolder)
 
+    @classmethod
+    def _get_yaml_config(cls, filename):
+        """ Returns a (deep) copy of the cached content of a definition file """
+        if filename not in cls._config_file_cache:
+            cls._config_file_cache[filename] = get_yaml_config(filename)
+        return cls._config_file_cache[filename].copy(deep=True)
+
 
 class RadarModes(object):
 
@@ -775,6 +807,38 @@ class DefaultCommandLineArguments(object):
                 "required": False,
                 "help": 'remove all existing product in target directory'},
 
+            # Level-2 processor: do not keep the l2 data of all orbits in memory
+            "streaming": {
+                "action": "store_true",
+                "dest": "streaming",
+                "default": False,
+                "required": False,
+                "help": 'release the l2 data of each orbit after the output has been written'},
+
+            # Level-2 processor: skip l1p files with up-to-date output
+            "resume": {
+                "action": "store_true",
+                "dest": "resume",
+                "default": False,
+                "required": False,
+                "help": 'skip l1p files with existing l2 output of identical processing fingerprint'},
+
+            # Level-1 pre-processor: do not write l1p files (requires Level-2 processing)
+            "no-l1p-export": {
+                "action": "store_false",
+                "dest": "export_l1p",
+                "default": True,
+                "required": False,
+                "help": 'do not write l1p files (only with -l2-settings)'},
+
+            # Level-2/3 processor: write output files in a background thread
+            "async-output": {
+                "action": "store_true",
+                "dest": "async_output",
+                "default": False,
+                "required": False,
+                "help": 'write output files in the background while processing continues'},
+
             # version tag of input data
             "input-version": {
                 "action": "store",
@@ -839,6 +903,15 @@ class DefaultCommandLineArguments(object):
                 "required": False,
                 "help": 'l2p outputdef id'},
 
+            # number of worker processes for the Level-2 Processor
+            "n-workers": {
+                "action": "store",
+                "dest": "n_workers",
+                "default": 1,
+                "type": int,
+                "required": False,
+                "help": 'number of parallel worker processes for orbit processing (default: 1)'},
+
             # set the run tag for the Level-2 Processor
             "run-tag": {
                 "action": "store",
@@ -124,7 +124,7 @@ def get_cryosat2_wfm_range_userhandbook(window_delay, n_range_bins):
         (2*window_delay*bandwidth - n_range_bins/2.0 + range_bin_index)
     return wfm_range
 
-def get_tai_datetime_from_timestamp(mdsr_timestamp):
+def get_tai_datetime_from_timestamp(mdsr_timestamp, as_datetime64=False):
     """
     Converts the TAI MDSR timestamp into a datetime object
 
@@ -141,12 +141,24 @@ def get_tai_datetime_from_timestamp(mdsr_timestamp):
         any class object with attributes day, sec, msec
         (attributes must be of type int)
 
+    as_datetime64 (bool)
+        return datetime64 instead of datetime objects (only for
+        numpy record arrays)
+
     Return
     ------
 
     datetime object with date and time in TAI
 
     """
+    # numpy record arrays (numpy mds reader): vectorized conversion
+    if isinstance(mdsr_timestamp, np.ndarray) and mdsr_timestamp.dtype.names:
+        us = mdsr_timestamp["day"].astype(np.int64)*86400000000
+        us += mdsr_timestamp["sec"].astype(np.int64)*1000000
+        us += mdsr_timestamp["msec"].astype(np.int64)
+        epoch = np.datetime64("2000-01-01T00:00:00", "us")
+        timestamp = epoch + us.astype("timedelta64[us]")
+        return timestamp if as_datetime64 else timestamp.astype(object)
     timestamps = np.asarray(mdsr_timestamp)
     output = np.ndarray(shape=(len(timestamps)), dtype=object)
     for i, timestamp in enumerate(timestamps):
@@ -5,11 +5,10 @@ import sys
 import xarray
 import numpy as np
 from scipy import interpolate
-from netCDF4 import num2date
 
 from pysiral import __version__ as pysiral_version
 from pysiral.classifier import CS2OCOGParameter, CS2LTPP, CS2PulsePeakiness
-from pysiral.clocks import StopWatch, UTCTAIConverter
+from pysiral.clocks import StopWatch, UTCTAIConverter, num2datetime64
 from pysiral.cryosat2 import cs2_procstage2timeliness
 from pysiral.errorhandler import ErrorStatus
 from pysiral.helper import parse_datetime_str
@@ -89,30 +88,34 @@ class ESACryoSat2PDSBaselineD(DefaultLoggingClass):
         return self.l1
 
     @staticmethod
-    def get_wfm_range(window_delay, n_range_bins):
+    def get_wfm_window(window_delay, n_range_bins):
         """
-        Returns the range for each waveform bin based on the window delay and the number of range bins
+        Returns the range window (range of the first range bin and range bin width) based on the
+        window delay and the number of range bins
         :param window_delay: The two-way delay to the center of the range window in seconds
         :param n_range_bins: The number of range bins (256: sar, 512: sin)
-        :return: The range for each waveform bin as array (time, ns)
+        :return: The range of the first range bin (time) and the range bin width in meter
         """
         lightspeed = 299792458.0
         bandwidth = 320000000.0
         # The two way delay time give the distance to the central bin
         central_window_range = window_delay * lightspeed / 2.0
         # Calculate the offset from the center to the first range bin
-        window_size = (n_range_bins * lightspeed) / (4.0 * bandwidth)
-        first_bin_offset = window_size / 2.0
-        # Calculate the range increment for each bin
-        range_increment = np.arange(n_range_bins) * lightspeed / (4.0 * bandwidth)
-
-        # Reshape the arrays
-        range_offset = np.tile(range_increment, (window_delay.shape[0], 1)) - first_bin_offset
-        window_range = np.tile(central_window_range, (n_range_bins, 1)).transpose()
+        range_bin_width = lightspeed / (4.0 * bandwidth)
+        first_bin_offset = n_range_bins * range_bin_width / 2.0
+        return central_window_range - first_bin_offset, range_bin_width
 
-        # Compute the range for each bin and return
-        wfm_range = window_range + range_offset
-        return wfm_range
+    @classmethod
+    def get_wfm_range(cls, window_delay, n_range_bins):
+        """
+        Returns the range for each waveform bin based on the window delay and the number of range bins
+        :param window_delay: The two-way delay to the center of the range window in seconds
+        :param n_range_bins: The number of range bins (256: sar, 512: sin)
+        :return: The range for each waveform bin as array (time, ns)
+        """
+        first_bin_range, range_bin_width = cls.get_wfm_window(window_delay, n_range_bins)
+        range_increment = np.arange(n_range_bins) * range_bin_width
+        return first_bin_range[:, np.newaxis] + range_increment
 
     @staticmethod
     def interp_1Hz_to_20Hz(variable_1Hz, time_1Hz, time_20Hz, **kwargs):
@@ -199,10 +202,9 @@ class ESACryoSat2PDSBaselineD(DefaultLoggingClass):
         """
 
         # Transfer the timestamp
-        # NOTE: Here it is critical that the xarray does not automatically decodes time since it is
-        #       difficult to work with the numpy datetime64 date format. Better to compute datetimes using
-        #       a know num2date conversion
-        tai_datetime = num2date(self.nc.time_20_ku.values, units=self.nc.time_20_ku.units)
+        # NOTE: Here it is critical that the xarray does not automatically decodes time since the
+        #       time units of the product need to be used for the datetime64 conversion
+        tai_datetime = num2datetime64(self.nc.time_20_ku.values, self.nc.time_20_ku.units)
         converter = UTCTAIConverter()
         utc_timestamp = converter.tai2utc(tai_datetime, check_all=False)
         self.l1.time_orbit.timestamp = utc_timestamp
@@ -253,18 +255,17 @@ class ESACryoSat2PDSBaselineD(DefaultLoggingClass):
         #   variable uso_cor_20_ku. This is a 2-way time and 2-way corrections are applied.
         window_delay = self.nc.window_del_20_ku.values
 
-        # Convert window delay to range for each waveform range bin
-        wfm_range = self.get_wfm_range(window_delay, dim_ns)
+        # Convert window delay to the range window (range of first range bin & bin width)
+        first_bin_range, range_bin_width = self.get_wfm_window(window_delay, dim_ns)
 
         # Make sure that parameter are float and not double
         # -> Import for cythonized algorithm parts (ctfrma specifically uses floats)
         wfm_power = wfm_power.astype(np.float32)
-        wfm_range = wfm_range.astype(np.float32)
 
         # Set the waveform
         op_mode = str(self.nc.attrs["sir_op_mode"].strip().lower())
         radar_mode = self.translate_opmode2radar_mode(op_mode)
-        self.l1.waveform.set_waveform_data(wfm_power, wfm_range, radar_mode)
+        self.l1.waveform.set_waveform_window(wfm_power, first_bin_range, range_bin_width, radar_mode)
 
         # Get the valid flags
         measurement_confident_flag = self.nc.flag_mcd_20_ku.values
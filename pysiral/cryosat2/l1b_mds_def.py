@@ -11,6 +11,10 @@ from pysiral.units import (OneHundredth, OneHundredthDecibel, OneTenthMicroDeg,
 
 from construct import (Struct, Array, Padding, Bit, BitStruct,
                        SBInt16, UBInt16, SBInt32, UBInt32, SBInt64, UBInt64)
+from pysiral.esa.functions import (get_construct_raw_dtype,
+                                   decode_construct_raw_array)
+
+import numpy as np
 
 
 class Cryosat2L1bMDSDefinition(object):
@@ -32,6 +36,19 @@ class Cryosat2L1bMDSDefinition(object):
         single_block_groups = ["corrections"]
         return single_block_groups
 
+    def get_mds_record_dtype(self):
+        """ Returns the numpy dtype (big-endian, including padding) of a
+        single MDS record as defined by the construct parser """
+        self.get_mds_parser()
+        return get_construct_raw_dtype(self.mds_record)
+
+    def decode_mds(self, raw_records):
+        """ Converts raw MDS records (read with the dtype from
+        `get_mds_record_dtype`) into a record array with the same fields
+        and units as the construct parser """
+        records = decode_construct_raw_array(raw_records, self.mds_record)
+        return records.view(np.recarray)
+
 
 class Cryosat2SARBaselineB(Cryosat2L1bMDSDefinition):
 
@@ -473,7 +490,7 @@ class Cryosat2SINBaselineCFull(Cryosat2L1bMDSDefinition):
 
     def __init__(self):
 
-        super(Cryosat2SINBaselineC, self).__init__()
+        super(Cryosat2SINBaselineCFull, self).__init__()
 
         self.baseline = "c"
         self.radar_mode = "sar"
@@ -10,6 +10,7 @@ from pysiral.esa.header import (ESAProductHeader, ESAScienceDataSetDescriptors)
 from pysiral.cryosat2.l1b_mds_def import cryosat2_get_mds_def
 from pysiral.cryosat2.functions import (parse_cryosat_l1b_filename,
                                         parse_cryosat_l1b_xml_header)
+from pysiral.esa.functions import get_structarr_attr
 import os
 import re
 import numpy as np
@@ -132,6 +133,23 @@ class CryoSatL1B(object):
     Data Attributes
     ---------------
 
+    Available after ``parse_mds`` and ``post_processing`` are called.
+    The record groups ``time_orbit``, ``measurement``, ``waveform`` and
+    ``corrections`` are arrays of records (one record per 20Hz
+    measurement) with the field names of the MDS definitions in
+    ``pysiral/cryosat2/l1b_mds_def.py``.
+
+    Two readers for the MDS are available (keyword ``mds_reader``):
+
+    + numpy (default)
+        The MDS is read with ``np.fromfile`` and a structured dtype that
+        is derived from the construct definition. The record groups are
+        of type ``np.recarray`` (fields in dict & attribute notation)
+
+    + construct
+        Legacy parser, the record groups are arrays of construct
+        containers
+
 
     Changelog
     ---------
@@ -140,8 +158,10 @@ class CryoSatL1B(object):
 
     _VALID_BASELINES = ["baseline-b", "baseline-c"]
     _VALID_RADAR_MODES = ["sar", "sin"]
+    _VALID_MDS_READERS = ["numpy", "construct"]
 
-    def __init__(self, read_header_only=False, raise_on_error=False):
+    def __init__(self, read_header_only=False, raise_on_error=False,
+                 mds_reader="numpy"):
 
         # Error Handling
         self._init_error_handling(raise_on_error)
@@ -150,6 +170,9 @@ class CryoSatL1B(object):
         self._filename_header = None
         self._filename_product = None
         self._header_only = read_header_only
+        if mds_reader not in self._VALID_MDS_READERS:
+            raise ValueError("Invalid mds reader: %s" % str(mds_reader))
+        self._mds_reader = mds_reader
         self.xmlh = None
         self.mph = None
         self.sph = None
@@ -178,6 +201,10 @@ class CryoSatL1B(object):
     def radar_mode(self):
         return self._radar_mode
 
+    @property
+    def mds_reader(self):
+        return self._mds_reader
+
     def parse_header(self):
         """ Parse the content of the L1B file """
         # Validate input and either return or raise when input not ok
@@ -275,10 +302,23 @@ class CryoSatL1B(object):
         # Get the parser
         self.mds_definition = cryosat2_get_mds_def(
             self._radar_mode, self._baseline, self.n_msd_records)
+        if self._mds_reader == "numpy":
+            self._read_mds_records()
+            return
         mds_parser = self.mds_definition.get_mds_parser()
         # Parser the binary part of the .DBL file
         self.mds = mds_parser.parse(self._fh.read(mds_parser.sizeof()))
 
+    def _read_mds_records(self):
+        """ Read the binary part of the .DBL file in one go with a numpy
+        structured dtype and convert to physical units """
+        record_dtype = self.mds_definition.get_mds_record_dtype()
+        raw_records = np.fromfile(
+            self._fh, dtype=record_dtype, count=self.n_msd_records)
+        if len(raw_records) != self.n_msd_records:
+            self._error.io_failed = True
+        self.mds = self.mds_definition.decode_mds(raw_records)
+
     def _get_l1b_data_set_name(self):
         radar_mode = self._radar_mode
         if radar_mode == "sin":
@@ -297,6 +337,9 @@ class CryoSatL1B(object):
             line_index = +1
 
     def _unpack(self):
+        if isinstance(self.mds, np.ndarray):
+            self._unpack_record_array()
+            return
         # Unpack the multiple record groups
         groups = self.mds_definition.get_multiple_block_groups()
         for group in groups:
@@ -311,6 +354,14 @@ class CryoSatL1B(object):
             setattr(self, group, np.repeat(
                 content, self.mds_definition.n_blocks))
 
+    def _unpack_record_array(self):
+        """ Same as _unpack for the output of the numpy mds reader """
+        n_blocks = self.mds_definition.n_blocks
+        for group in self.mds_definition.get_multiple_block_groups():
+            setattr(self, group, self.mds[group].reshape(-1))
+        for group in self.mds_definition.get_single_block_groups():
+            setattr(self, group, np.repeat(self.mds[group], n_blocks))
+
     def _trim(self):
         """
         Look for empty records at the end of the unpacked records
@@ -318,8 +369,7 @@ class CryoSatL1B(object):
         """
         unpacked_groups = self.mds_definition.get_multiple_block_groups()
         unpacked_groups.extend(self.mds_definition.get_single_block_groups())
-        ssc = np.array(
-            [record["source_sequence_counter"] for record in self.time_orbit])
+        ssc = get_structarr_attr(self.time_orbit, "source_sequence_counter")
         no_zero_list = np.where(ssc != 0)[0]
         if len(no_zero_list) == 0:
             return
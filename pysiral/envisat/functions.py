@@ -17,12 +17,24 @@ def mdsr_timestamp_to_datetime(mdsr_time):
         microseconds=mdsr_time.msec)
 
 
+def mdsr_timestamps_to_datetime64(day, sec, msec):
+    """ Same as mdsr_timestamp_to_datetime for arrays of the timestamp
+    fields (returns a datetime64[us] array) """
+    from datetime import datetime
+
+    epoch = 946684800  # 1:st of January 2000 in POSIX time
+    microseconds = np.asarray(day, dtype=np.int64)*86400000000
+    microseconds += np.asarray(sec, dtype=np.int64)*1000000
+    microseconds += np.asarray(msec, dtype=np.int64)
+    epoch_dt64 = np.datetime64(datetime.fromtimestamp(epoch), "us")
+    return epoch_dt64 + microseconds.astype("timedelta64[us]")
+
+
 def get_envisat_wfm_range(window_delay_meter, n_range_bins, bin_width_meter=BIN_WIDTH_METER):
-    n_records = len(window_delay_meter)
-    wfm_range = np.ndarray(shape=(n_records, n_range_bins), dtype=np.float32)
-    for i in range(n_records):
-        wfm_range[i, :] = np.arange(n_range_bins)*bin_width_meter + window_delay_meter[i]
-    return wfm_range
+    window_delay_meter = np.asarray(window_delay_meter)
+    range_offset = np.arange(n_range_bins)*bin_width_meter
+    wfm_range = range_offset + window_delay_meter[:, np.newaxis]
+    return wfm_range.astype(np.float32)
 
 
 def get_envisat_window_delay(tracker_range, doppler_correction, slope_doppler_correction,
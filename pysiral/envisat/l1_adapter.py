@@ -8,12 +8,12 @@ __author__ = "Stefan Hendricks"
 import re
 import numpy as np
 from scipy import interpolate
-from netCDF4 import num2date
+from pysiral.clocks import num2datetime64
 
 from pysiral.config import PYSIRAL_VERSION
 from pysiral.classifier import EnvisatWaveformParameter
 from pysiral.clocks import StopWatch
-from pysiral.envisat.functions import (get_envisat_window_delay, get_envisat_wfm_range)
+from pysiral.envisat.functions import get_envisat_window_delay
 from pysiral.errorhandler import ErrorStatus
 from pysiral.iotools import ReadNC
 from pysiral.l1bdata import Level1bData
@@ -119,7 +119,7 @@ class EnvisatSGDRNC(DefaultLoggingClass):
         sgdr_timestamp = self.sgdr.time_20
         units = self.cfg.sgdr_timestamp_units
         calendar = self.cfg.sgdr_timestamp_calendar
-        timestamp = num2date(sgdr_timestamp, units, calendar)
+        timestamp = num2datetime64(sgdr_timestamp, units, calendar)
         self.l1.time_orbit.timestamp = timestamp
 
         # Mandatory antenna pointing parameter (but not available for ERS)
@@ -146,13 +146,10 @@ class EnvisatSGDRNC(DefaultLoggingClass):
             nominal_tracking_bin=self.cfg.nominal_tracking_bin,
             bin_width_meter=self.cfg.bin_width_meter)
 
-        # Compute the range value for each range bin of the 18hz waveform
-        wfm_range = get_envisat_wfm_range(
-            window_delay_m, n_range_bins,
-            bin_width_meter=self.cfg.bin_width_meter)
-
         # Transfer data to the waveform group
-        self.l1.waveform.set_waveform_data(wfm_power, wfm_range, self.cfg.radar_mode)
+        # (the range of each range bin is defined by window delay and bin width)
+        self.l1.waveform.set_waveform_window(
+            wfm_power, window_delay_m, self.cfg.bin_width_meter, self.cfg.radar_mode)
 
         # Set valid flag to exclude calibration data
         # (see section 3.5 of Reaper handbook)
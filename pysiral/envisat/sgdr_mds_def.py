@@ -5,9 +5,14 @@ from pysiral.units import (OneHundredth, OneHundredthDecibel, MilliMeter,
                            TenPascal, OneTenths, OneThousands, Per256, Per2048,
                            Per8096)
 
+from pysiral.esa.functions import (get_construct_raw_dtype,
+                                   decode_construct_raw_array)
+
 from construct import (Struct, Array, Padding, Bit, BitStruct, SBInt8, UBInt8,
                        SBInt16, UBInt16, SBInt32, UBInt32)
 
+import numpy as np
+
 
 class EnvisatSGDRMDS(object):
 
@@ -15,6 +20,19 @@ class EnvisatSGDRMDS(object):
         self.n_records = 0
         self.n_blocks = 20
 
+    def get_mds_record_dtype(self):
+        """ Returns the numpy dtype (big-endian, including padding) of a
+        single MDS record as defined by the construct parser """
+        self.get_mds_parser()
+        return get_construct_raw_dtype(self.mds_record)
+
+    def decode_mds(self, raw_records):
+        """ Converts raw MDS records (read with the dtype from
+        `get_mds_record_dtype`) into a record array with the same fields
+        and units as the construct parser """
+        records = decode_construct_raw_array(raw_records, self.mds_record)
+        return records.view(np.recarray)
+
 
 class EnvisatSGDRMDSRA2(EnvisatSGDRMDS):
     """
@@ -6,7 +6,7 @@ import numpy as np
 
 from pysiral.errorhandler import FileIOErrorHandler
 from pysiral.envisat.sgdr_mds_def import envisat_get_mds_def
-from pysiral.envisat.functions import (mdsr_timestamp_to_datetime,
+from pysiral.envisat.functions import (mdsr_timestamps_to_datetime64,
                                        get_envisat_window_delay,
                                        get_envisat_wfm_range)
 from pysiral.esa.header import (ESAProductHeader, ESAScienceDataSetDescriptors)
@@ -20,10 +20,15 @@ class EnvisatSGDR(object):
         "ra2": "RA2_DATA_SET_FOR_LEVEL_2",
         "wfm18hz": "RA2_AVERAGE_WAVEFORMS"}
 
-    def __init__(self, settings, raise_on_error=False):
+    _VALID_MDS_READERS = ["numpy", "construct"]
+
+    def __init__(self, settings, raise_on_error=False, mds_reader="numpy"):
 
         # Error Handling
         self.settings = settings
+        if mds_reader not in self._VALID_MDS_READERS:
+            raise ValueError("Invalid mds reader: %s" % str(mds_reader))
+        self._mds_reader = mds_reader
         self._init_error_handling(raise_on_error)
         self._baseline = None
         self._radar_mode = "lrm"
@@ -83,6 +88,10 @@ class EnvisatSGDR(object):
     def radar_mode(self):
         return self._radar_mode
 
+    @property
+    def mds_reader(self):
+        return self._mds_reader
+
     def _init_error_handling(self, raise_on_error):
         self._error = FileIOErrorHandler()
         self._error.raise_on_error = raise_on_error
@@ -117,9 +126,18 @@ class EnvisatSGDR(object):
         # Get the parser (depending on MDS target)
         self.mds_definition = envisat_get_mds_def(
             self.n_msd_records, mds_target)
-        mds_parser = self.mds_definition.get_mds_parser()
-        # Parser the binary part of the .DBL file
-        mds = mds_parser.parse(self._fh.read(mds_parser.sizeof()))
+        if self._mds_reader == "numpy":
+            # Read all records at once into a numpy structured array
+            record_dtype = self.mds_definition.get_mds_record_dtype()
+            raw_records = np.fromfile(
+                self._fh, dtype=record_dtype, count=self.n_msd_records)
+            if len(raw_records) != self.n_msd_records:
+                self._error.io_failed = True
+            mds = self.mds_definition.decode_mds(raw_records)
+        else:
+            mds_parser = self.mds_definition.get_mds_parser()
+            # Parser the binary part of the .DBL file
+            mds = mds_parser.parse(self._fh.read(mds_parser.sizeof()))
         setattr(self, "mds_"+mds_target, mds)
 
     def _read_header_lines(self, header):
@@ -230,12 +248,13 @@ class Envisat18HzArrays(object):
         self.n_blocks = 20
 
     def reform_timestamp(self, mds):
-        """ Creates an array of datetime objects for each 18Hz record """
+        """ Creates a datetime64 array with the timestamp of each 18Hz record """
         # XXX: Current no microsecond correction
-        timestamp = np.ndarray(shape=(self.n_records), dtype=object)
         mdsr_timestamp = get_structarr_attr(mds, "utc_timestamp")
-        for i in range(self.n_records):
-            timestamp[i] = mdsr_timestamp_to_datetime(mdsr_timestamp[i])
+        timestamp = mdsr_timestamps_to_datetime64(
+            get_structarr_attr(mdsr_timestamp, "day"),
+            get_structarr_attr(mdsr_timestamp, "sec"),
+            get_structarr_attr(mdsr_timestamp, "msec"))
         self.timestamp = np.repeat(timestamp, self.n_blocks)
 
     def reform_position(self, mds):
@@ -270,11 +289,11 @@ class Envisat18HzArrays(object):
         # First get the echo power
         n_range_bins = 128
         n = self.n_records * self.n_blocks
-        self.power = np.ndarray(shape=(n, n_range_bins), dtype=np.float32)
-        for dsd in range(self.n_records):
-            for block in range(self.n_blocks):
-                i = dsd*self.n_blocks + block
-                self.power[i, :] = mds_wfm18hz[dsd].wfm[block][wfm_tag]
+        if isinstance(mds_wfm18hz, np.ndarray):
+            wfm = mds_wfm18hz["wfm"][wfm_tag]
+        else:
+            wfm = [[block[wfm_tag] for block in record.wfm] for record in mds_wfm18hz]
+        self.power = np.array(wfm, dtype=np.float32).reshape(n, n_range_bins)
         # Calculate the window delay for each 18hz waveform
         range_info = get_structarr_attr(mds_ra2, "range_information")
         range_corr = get_structarr_attr(mds_ra2, "range_correction")
@@ -285,10 +304,12 @@ class Envisat18HzArrays(object):
         slope_correction = get_structarr_attr(
             range_corr, slope_tag, flat=True)
         # Compute the window delay (range to first range bin)
-        # given in meter (not in seconds)
+        # given in meter (not in seconds) with double precision
         # XXX: Add the instrumental range correction for ku?
         self.window_delay_m = get_envisat_window_delay(
-            tracker_range, doppler_correction, slope_correction)
+            tracker_range.astype(np.float64),
+            doppler_correction.astype(np.float64),
+            slope_correction.astype(np.float64))
         # Compute the range value for each range bin of the 18hz waveform
         # XXX: Might want to set the range bins automatically
         self.range = get_envisat_wfm_range(self.window_delay_m, n_range_bins)
@@ -341,16 +362,12 @@ class Envisat18HzArrays(object):
         """
         time_orbit = get_structarr_attr(mds, "time_orbit")
         mcd = get_structarr_attr(time_orbit, "measurement_confidence_data")
-        self.flag_packet_length_error = np.repeat(np.array(
-            [record.flag[0] for record in mcd], dtype=bool), self.n_blocks)
-        self.flag_obdh_invalid = np.repeat(np.array(
-            [record.flag[1] for record in mcd], dtype=bool), self.n_blocks)
-        self.flag_agc_fault = np.repeat(np.array(
-            [record.flag[4] for record in mcd], dtype=bool), self.n_blocks)
-        self.flag_rx_delay_fault = np.repeat(np.array(
-            [record.flag[5] for record in mcd], dtype=bool), self.n_blocks)
-        self.flag_waveform_fault = np.repeat(np.array(
-            [record.flag[6] for record in mcd], dtype=bool), self.n_blocks)
+        mcd_flag = np.array(get_structarr_attr(mcd, "flag").tolist(), dtype=bool)
+        self.flag_packet_length_error = np.repeat(mcd_flag[:, 0], self.n_blocks)
+        self.flag_obdh_invalid = np.repeat(mcd_flag[:, 1], self.n_blocks)
+        self.flag_agc_fault = np.repeat(mcd_flag[:, 4], self.n_blocks)
+        self.flag_rx_delay_fault = np.repeat(mcd_flag[:, 5], self.n_blocks)
+        self.flag_waveform_fault = np.repeat(mcd_flag[:, 6], self.n_blocks)
         flags = get_structarr_attr(mds, "flag")
         self.ku_chirp_band_id = np.repeat(get_structarr_attr(
             flags, "average_ku_chirp_band"), self.n_blocks)
@@ -360,6 +377,4 @@ class Envisat18HzArrays(object):
             backscatter, "18hz_sea_ice_sigma_ku", flat=True), dtype=np.float32)
 
     def _apply_18Hz_increment(self, data, inc):
-        for i in range(self.n_records):
-            i0, i1 = i*self.n_blocks, (i+1)*self.n_blocks
-            data[i0:i1] += inc[i, :]
+        data += inc.reshape(self.n_records*self.n_blocks)
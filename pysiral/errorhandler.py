@@ -18,6 +18,7 @@ PYSIRAL_ERROR_CODES = OrderedDict([
     ("auxdata_missing_snow", "Missing snow depth data set(s)"),
     ("l2proc_invalid_l1b", "Invalid l1bdata input data"),
     ("l2proc_surface_type_discarded", "Discarded by surface type validator"),
+    ("l2proc_output_error", "Failed to write the output file(s)"),
     ("warren99-invalid-hemisphere", "Warren99 snow climatology only valid for northern hemisphere")])
 
 
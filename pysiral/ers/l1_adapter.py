@@ -6,7 +6,7 @@
 __author__ = "Stefan Hendricks"
 
 import numpy as np
-from netCDF4 import num2date
+from pysiral.clocks import num2datetime64
 
 from pysiral.config import PYSIRAL_VERSION
 from pysiral.classifier import EnvisatWaveformParameter
@@ -125,7 +125,7 @@ class ERSReaperSGDR(DefaultLoggingClass):
         sgdr_timestamp = self.sgdr.nc.time_20hz.flatten()
         units = self.cfg.sgdr_timestamp_units
         calendar = self.cfg.sgdr_timestamp_calendar
-        timestamp = num2date(sgdr_timestamp, units, calendar)
+        timestamp = num2datetime64(sgdr_timestamp, units, calendar)
         self.l1.time_orbit.timestamp = timestamp
 
         # Mandatory antenna pointing parameter (but not available for ERS)
@@ -139,9 +139,10 @@ class ERSReaperSGDR(DefaultLoggingClass):
         """ Transfers the waveform data (power & range for each range bin) """
 
         # Transfer the reformed 18Hz waveforms
-        self.l1.waveform.set_waveform_data(
+        self.l1.waveform.set_waveform_window(
             self.sgdr.wfm_power,
-            self.sgdr.wfm_range,
+            self.sgdr.wfm_window_delay,
+            self.sgdr.wfm_range_bin_width,
             self.sgdr.radar_mode)
 
         # Set valid flag to exclude calibration data
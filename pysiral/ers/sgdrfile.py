@@ -59,6 +59,13 @@ class ERSSGDR(object):
     def radar_mode(self):
         return self._radar_mode
 
+    @property
+    def wfm_range(self):
+        """ Range for each waveform range bin (n_records, n_bins) """
+        rbi = np.arange(self.wfm_power.shape[1])
+        wfm_range = self.wfm_window_delay[:, np.newaxis] + rbi*self.wfm_range_bin_width
+        return wfm_range.astype(np.float32)
+
     def _init_error_handling(self, raise_on_error):
         self._error = FileIOErrorHandler()
         self._error.raise_on_error = raise_on_error
@@ -81,15 +88,12 @@ class ERSSGDR(object):
         #  as the window delay, corrected for instrumental effects and
         #  CoG offset"
         tracker_range = self.nc.tracker_range_20hz.flatten()
-        self.wfm_range = np.ndarray(shape=target_shape, dtype=np.float32)
 
+        # Range of the first range bin (range of each bin: see wfm_range)
         rbw = self.settings.range_bin_width
         ntb = self.settings.nominal_tracking_bin
-        rbi = np.arange(n_range_bins)
-
-        # Loop over each waveform
-        for i in np.arange(n_records):
-            self.wfm_range[i, :] = tracker_range[i] + (rbi*rbw) - (ntb*rbw)
+        self.wfm_window_delay = tracker_range - (ntb*rbw)
+        self.wfm_range_bin_width = rbw
 
     def _validate(self):
         pass
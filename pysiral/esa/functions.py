@@ -2,6 +2,9 @@
 
 import numpy as np
 
+from construct import Struct
+from construct.core import FormatField, MetaArray, Buffered
+
 
 def get_structarr_attr(struct_arr, field, flat=False):
     """
@@ -9,8 +12,166 @@ def get_structarr_attr(struct_arr, field, flat=False):
     (e.g. struct_array[:].field <- does not work in python)
 
     """
+    # numpy structured arrays support field access directly
+    if isinstance(struct_arr, np.ndarray) and struct_arr.dtype.names:
+        data = struct_arr[field]
+        return data.flatten() if flat else data
     dtype = type(struct_arr[0][field])
     data = np.array([record[field] for record in struct_arr], dtype=dtype)
     if flat:
         data = data.flatten()
     return data
+
+
+def get_structarr_field_names(struct_arr):
+    """
+    Returns the field names of an array of records (numpy structured arrays
+    or objects that support dict notation)
+    """
+    if isinstance(struct_arr, np.ndarray) and struct_arr.dtype.names:
+        return list(struct_arr.dtype.names)
+    return struct_arr[0].keys()
+
+
+# struct format characters (standard sizes) -> numpy type codes
+_FORMAT_CODES = {"b": "i1", "B": "u1", "h": "i2", "H": "u2", "i": "i4",
+                 "I": "u4", "l": "i4", "L": "u4", "q": "i8", "Q": "u8",
+                 "f": "f4", "d": "f8"}
+
+
+def get_construct_raw_dtype(con):
+    """
+    Translates a construct definition (Struct, Array, fields with
+    unit adapters, padding & bit structs) into a numpy dtype with the
+    identical binary layout
+    """
+
+    if isinstance(con, Struct):
+        names, formats, offsets, offset = [], [], [], 0
+        for subcon in con.subcons:
+            if subcon.name is not None:
+                names.append(subcon.name)
+                formats.append(get_construct_raw_dtype(subcon))
+                offsets.append(offset)
+            offset += subcon.sizeof()
+        return np.dtype(dict(names=names, formats=formats, offsets=offsets,
+                             itemsize=offset))
+
+    if isinstance(con, MetaArray):
+        return np.dtype((get_construct_raw_dtype(con.subcon),
+                         (con.countfunc(None), )))
+
+    # Bit structs are kept as raw bytes and decoded later
+    if isinstance(con, Buffered):
+        return np.dtype(("u1", (con.sizeof(), )))
+
+    if isinstance(con, FormatField):
+        fmt = con.packer.format
+        return np.dtype(fmt[0]+_FORMAT_CODES[fmt[1:]])
+
+    # Unit adapters
+    if getattr(con, "subcon", None) is not None:
+        return get_construct_raw_dtype(con.subcon)
+
+    raise ValueError("Unsupported construct type: %s" % type(con))
+
+
+def get_construct_decoded_dtype(con):
+    """
+    Returns the numpy dtype of the decoded construct definition
+    (native byte order, no padding, physical units)
+    """
+
+    if isinstance(con, Struct):
+        return np.dtype([(subcon.name, get_construct_decoded_dtype(subcon))
+                         for subcon in con.subcons if subcon.name is not None])
+
+    if isinstance(con, MetaArray):
+        return np.dtype((get_construct_decoded_dtype(con.subcon),
+                         (con.countfunc(None), )))
+
+    if isinstance(con, Buffered):
+        return _get_bitstruct_decoded_dtype(con.subcon)
+
+    if isinstance(con, FormatField):
+        return get_construct_raw_dtype(con).newbyteorder("=")
+
+    if callable(getattr(con, "decode_array", None)):
+        return np.dtype(con.dtype)
+
+    raise ValueError("Unsupported construct type: %s" % type(con))
+
+
+def decode_construct_raw_array(raw, con):
+    """
+    Applies the decoding of a construct definition (byte order, unit
+    adapters, bit structs) to an array with the raw dtype of the
+    definition
+    """
+
+    if isinstance(con, Struct):
+        decoded = np.ndarray(shape=raw.shape,
+                             dtype=get_construct_decoded_dtype(con))
+        for subcon in con.subcons:
+            if subcon.name is not None:
+                decoded[subcon.name] = decode_construct_raw_array(
+                    raw[subcon.name], subcon)
+        return decoded
+
+    if isinstance(con, MetaArray):
+        return decode_construct_raw_array(raw, con.subcon)
+
+    if isinstance(con, Buffered):
+        # Bits in the order of the definition (most significant first)
+        bits = np.unpackbits(raw, axis=-1)
+        decoded, bit_position = _decode_bitstruct(bits, con.subcon, 0)
+        return decoded
+
+    if isinstance(con, FormatField):
+        return raw.astype(raw.dtype.newbyteorder("="))
+
+    if callable(getattr(con, "decode_array", None)):
+        return con.decode_array(raw)
+
+    raise ValueError("Unsupported construct type: %s" % type(con))
+
+
+def _get_bitstruct_decoded_dtype(con):
+    """ dtype of a struct within a BitStruct (bit fields & arrays of bit
+    fields) """
+    if isinstance(con, Struct):
+        return np.dtype([(subcon.name, _get_bitstruct_decoded_dtype(subcon))
+                         for subcon in con.subcons if subcon.name is not None])
+    if isinstance(con, MetaArray):
+        return np.dtype((_get_bitstruct_decoded_dtype(con.subcon),
+                         (con.countfunc(None), )))
+    return np.dtype("u1" if con.sizeof() <= 8 else "u8")
+
+
+def _decode_bitstruct(bits, con, bit_position):
+    """ Decodes a field of a BitStruct starting at bit_position of the
+    bit array (shape: [..., n_bits]). Returns the decoded array and the
+    bit position after the field """
+
+    if isinstance(con, Struct):
+        decoded = np.ndarray(shape=bits.shape[:-1],
+                             dtype=_get_bitstruct_decoded_dtype(con))
+        for subcon in con.subcons:
+            value, bit_position = _decode_bitstruct(bits, subcon, bit_position)
+            if subcon.name is not None:
+                decoded[subcon.name] = value
+        return decoded, bit_position
+
+    if isinstance(con, MetaArray):
+        values = []
+        for i in range(con.countfunc(None)):
+            value, bit_position = _decode_bitstruct(bits, con.subcon, bit_position)
+            values.append(value)
+        return np.stack(values, axis=-1), bit_position
+
+    width = con.sizeof()
+    dtype = _get_bitstruct_decoded_dtype(con)
+    value = np.zeros(bits.shape[:-1], dtype=dtype)
+    for i in range(width):
+        value = (value << dtype.type(1)) | bits[..., bit_position+i].astype(dtype)
+    return value, bit_position+width
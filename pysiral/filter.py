@@ -7,8 +7,8 @@ Created on Sat Apr 23 15:30:53 2016
 from pysiral.config import options_from_dictionary
 from pysiral.logging import DefaultLoggingClass
 from pysiral.flag import FlagContainer, ORCondition
+from pysiral.running_window import running_window_mean
 
-from scipy.interpolate import interp1d
 from astropy.convolution import convolve
 import numpy as np
 
@@ -101,16 +101,10 @@ def astropy_smooth(x, window):
 
 
 def idl_smooth(x, window):
-    """ Implementation of the IDL smooth(x, window, /EDGGE_TRUNCATE, /NAN)"""
+    """ Implementation of the IDL smooth(x, window, /EDGGE_TRUNCATE, /NAN)
+    (kernel half size is reduced at the edges of the array) """
     smoothed = np.copy(x)*np.nan
-    n = len(x)
-    for i in np.arange(n):
-        kernel_halfsize = np.floor((window-1)/2).astype(int)
-        if (i < kernel_halfsize):
-            kernel_halfsize = i
-        if (n-1-i < kernel_halfsize):
-            kernel_halfsize = n-1-i
-        smoothed[i] = np.nanmean(x[i-kernel_halfsize:i+kernel_halfsize+1])
+    smoothed[:] = running_window_mean(x, window, edges="shrink")
     return smoothed
 
 
@@ -141,6 +135,16 @@ def spline_smooth(y, window):
     return spl(x)
 
 
+def linear_interp(x, xp, yp):
+    """ Linear interpolation of (xp, yp) at x in the range of xp (same
+    arithmetic as scipy.interpolate.interp1d(xp, yp)(x) without
+    the overhead of creating the interpolation object) """
+    hi = np.searchsorted(xp, x).clip(1, len(xp)-1)
+    lo = hi - 1
+    slope = (yp[hi] - yp[lo]) / (xp[hi] - xp[lo])
+    return slope*(x - xp[lo]) + yp[lo]
+
+
 def fill_nan(y):
     result = np.copy(y)
     # Get first and last valid index
@@ -153,14 +157,10 @@ def fill_nan(y):
     x = np.arange(len(y_inside))
     valid_inside = np.where(np.isfinite(y_inside))[0]
     # Interpolate inside range of valid entries
-    try:
-        func = interp1d(x[valid_inside], y_inside[valid_inside],
-                        bounds_error=False)
-        interpolated_inside = func(x)
-        result[valid0:valid1+1] = interpolated_inside
-    except ValueError:
-        # May not be applicable (no inner nan ranges)
-        pass
+    # (may not be applicable: no inner nan ranges)
+    if len(valid_inside) > 1:
+        result[valid0:valid1+1] = linear_interp(
+            x, x[valid_inside], y_inside[valid_inside])
     # fill nan-borders with first/last valid value
     if valid0 != 0:
         result[0:valid0] = y[valid0]
@@ -21,8 +21,8 @@ from pysiral.cryosat2.functions import (
 
 from pysiral.classifier import (CS2OCOGParameter, CS2LTPP, CS2PulsePeakiness, EnvisatWaveformParameter)
 
-from pysiral.clocks import UTCTAIConverter
-from pysiral.esa.functions import get_structarr_attr
+from pysiral.clocks import UTCTAIConverter, num2datetime64
+from pysiral.esa.functions import get_structarr_attr, get_structarr_field_names
 from pysiral.flag import ORCondition
 from pysiral.helper import parse_datetime_str
 from pysiral.path import filename_from_path
@@ -30,9 +30,6 @@ from pysiral.surface_type import ESA_SURFACE_TYPE_DICT
 from pysiral.waveform import (get_waveforms_peak_power, TFMRALeadingEdgeWidth,
                               get_sar_sigma0)
 
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-from netCDF4 import num2date
 import numpy as np
 
 
@@ -169,7 +166,8 @@ class L1bAdapterCryoSat(object):
         # Transfer the timestamp
         tai_objects = get_structarr_attr(
             self.cs2l1b.time_orbit, "tai_timestamp")
-        tai_timestamp = get_tai_datetime_from_timestamp(tai_objects)
+        tai_timestamp = get_tai_datetime_from_timestamp(
+            tai_objects, as_datetime64=True)
 
         # Convert the TAI timestamp to UTC
         # XXX: Note, the leap seconds are only corrected based on the
@@ -211,7 +209,7 @@ class L1bAdapterCryoSat(object):
     def _transfer_range_corrections(self):
         # Transfer all the correction in the list
         # TODO: This is too complicated. The unification of grc names should be handled in the l1p config files
-        for key in self.cs2l1b.corrections[0].keys():
+        for key in get_structarr_field_names(self.cs2l1b.corrections):
             if key in self._config.CORRECTION_LIST:
                 self.l1b.correction.set_parameter(
                     key, get_structarr_attr(self.cs2l1b.corrections, key))
@@ -478,7 +476,7 @@ class L1bAdapterERS(object):
         sgdr_timestamp = self.sgdr.nc.time_20hz.flatten()
         units = self.settings.sgdr_timestamp_units
         calendar = self.settings.sgdr_timestamp_calendar
-        timestamp = num2date(sgdr_timestamp, units, calendar)
+        timestamp = num2datetime64(sgdr_timestamp, units, calendar)
         self.l1b.time_orbit.timestamp = timestamp
 
         # Update meta data container
@@ -621,8 +619,6 @@ class L1bAdapterSentinel3(object):
 
     def _transfer_timeorbit(self):
         """ Extracts the time/orbit data group from the SGDR data """
-        from netCDF4 import num2date
-
         # Transfer the orbit position
         self.l1b.time_orbit.set_position(
             self.sral.nc.lon_20_ku,
@@ -633,7 +629,7 @@ class L1bAdapterSentinel3(object):
         units = self.settings.time_units
         calendar = self.settings.time_calendar
         seconds = self.sral.nc.time_20_ku
-        timestamp = num2date(seconds, units, calendar)
+        timestamp = num2datetime64(seconds[:], units, calendar)
         self.l1b.time_orbit.timestamp = timestamp
 
     def _transfer_waveform_collection(self):
@@ -676,19 +672,14 @@ class L1bAdapterSentinel3(object):
         net_instr_corrections = self.sral.nc.net_instr_cor_range_20_ku
         tracker_range += net_instr_corrections
 
-        # Compute the range for each range bin
-        wfm_range = np.ndarray(shape=shape, dtype=np.float32)
+        # Compute the range of the first range bin
         rbw = self.settings.range_bin_width
         ntb = self.settings.nominal_tracking_bin
-        rbi = np.arange(n_range_bins)
-
-        # Loop over each waveform
-        for i in np.arange(n_records):
-            wfm_range[i, :] = tracker_range[i] + (rbi*rbw) - (ntb*rbw)
+        window_delay = tracker_range - (ntb*rbw)
 
         # Transfer to l1b object
         radar_mode = self.settings.radar_mode
-        self.l1b.waveform.set_waveform_data(wfm_power, wfm_range, radar_mode)
+        self.l1b.waveform.set_waveform_window(wfm_power, window_delay, rbw, radar_mode)
 
     def _transfer_range_corrections(self):
         """ Retrieve the geophysical range corrections """
@@ -975,13 +966,9 @@ class L1bAdapterICESat(object):
         # Transfer the orbit position
         self.l1b.time_orbit.set_position(lon, lat, alt)
 
-        # Transfer the timestamp (needs to be datetime)
+        # Transfer the timestamp
         # time in glah13 is: seconds since 2000-01-01 12:00:00 UTC
-        timestamp = np.ndarray(time.shape, dtype=object)
-        datum = datetime(2000, 1, 1, 12, 0, 0)
-        for i in np.arange(len(timestamp)):
-            timestamp[i] = datum + relativedelta(seconds=time[i])
-
+        timestamp = num2datetime64(time, "seconds since 2000-01-01 12:00:00")
         self.l1b.time_orbit.timestamp = timestamp
 
         # Update meta data container
@@ -7,9 +7,10 @@ Created on Sat Aug 01 17:33:02 2015
 
 from pysiral.config import ConfigInfo, TimeRangeIteration
 from pysiral.errorhandler import ErrorStatus
-from pysiral.output import NCDateNumDef, PysiralOutputFilenaming
+from pysiral.output import NCDateNumDef, PysiralOutputFilenaming, NETCDF_IO_LOCK
 from pysiral.path import file_basename
-from netCDF4 import Dataset, num2date
+from pysiral.clocks import num2datetime64, datetime64_to_datetime
+from netCDF4 import Dataset
 
 import os
 import glob
@@ -46,6 +47,10 @@ class ReadNC(object):
 #        f.close()
 
     def read_content(self):
+        with NETCDF_IO_LOCK:
+            self._read_content()
+
+    def _read_content(self):
 
         self.keys = []
 
@@ -68,9 +73,9 @@ class ReadNC(object):
             # Convert timestamps back to datetime objects
             # TODO: This needs to be handled better
             if attribute_name in ["start_time", "stop_time"]:
-                attribute_value = num2date(
+                attribute_value = datetime64_to_datetime(num2datetime64(
                     attribute_value, self.time_def.units,
-                    calendar=self.time_def.calendar)
+                    calendar=self.time_def.calendar))
             setattr(self, attribute_name, attribute_value)
 
         # Get the variables
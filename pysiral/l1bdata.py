@@ -43,7 +43,7 @@ Waveform Data
 Time-Orbit Information
 ----------------------
 
-- timestamp in UTC
+- timestamp in UTC (numpy datetime64 with microsecond resolution)
 - longitude, latitude (of satellite/nadir point)
 - altitude (of satellite above WGS84 reference ellipsoid)
 
@@ -91,10 +91,12 @@ Surface Type
 
 from pysiral.logging import DefaultLoggingClass
 from pysiral.surface_type import SurfaceType
-from pysiral.output import NCDateNumDef
+from pysiral.output import NCDateNumDef, ScaledIntegerEncoding, NETCDF_IO_LOCK
 from pysiral.config import RadarModes
+from pysiral.clocks import (to_datetime64, datetime64_to_datetime,
+                            num2datetime64, datetime642num)
 
-from netCDF4 import Dataset, num2date, date2num
+from netCDF4 import Dataset
 from collections import OrderedDict
 import numpy as np
 import copy
@@ -123,19 +125,34 @@ class Level1bData(DefaultLoggingClass):
 
     def append(self, l1b_annex):
         """ Appends another l1b object to this one """
+        self.extend([l1b_annex])
 
-        # Append data in each datagroup
+    def extend(self, l1b_annexes):
+        """
+        Appends a list of l1b objects to this one. Each parameter of each
+        data group is concatenated only once (final size allocated in a
+        single step) and the metadata statistics are updated only once,
+        instead of re-allocating all arrays for every annex
+        :param l1b_annexes: list of Level-1 data objects
+        :return: None, the Level-1 object is changed in place
+        """
+
+        l1b_annexes = list(l1b_annexes)
+        if len(l1b_annexes) == 0:
+            return
+
+        # Concatenate data in each datagroup
         for data_group in self.data_groups:
             this_data_group = getattr(self, data_group)
-            annex_data_group = getattr(l1b_annex, data_group)
-            this_data_group.append(annex_data_group)
+            annex_data_groups = [getattr(l1b_annex, data_group) for l1b_annex in l1b_annexes]
+            this_data_group.extend(annex_data_groups)
 
         # Update the statistics
         self.info.set_attribute("is_merged_orbit", True)
         self.info.set_attribute("n_records", len(self.time_orbit.timestamp))
-        mission_data_source = ";".join([self.info.mission_data_source,
-                                        l1b_annex.info.mission_data_source])
-        self.info.set_attribute("mission_data_source", mission_data_source)
+        mission_data_sources = [self.info.mission_data_source]
+        mission_data_sources.extend([l1b_annex.info.mission_data_source for l1b_annex in l1b_annexes])
+        self.info.set_attribute("mission_data_source", ";".join(mission_data_sources))
         self.update_l1b_metadata()
 
     def trim_to_subset(self, subset_list):
@@ -164,6 +181,9 @@ class Level1bData(DefaultLoggingClass):
             range_delta[nans_indices] = 0.0
             self.log.warning("NaNs encountered in range correction parameter: %s" % correction)
 
+        self._add_waveform_range_delta(range_delta)
+
+    def _add_waveform_range_delta(self, range_delta):
         self.waveform.add_range_delta(range_delta)
 
     def extract_subset(self, subset_list):
@@ -197,8 +217,7 @@ class Level1bData(DefaultLoggingClass):
 
         # Get the time stamp and the time increment in seconds
         time = self.time_orbit.timestamp
-        timedelta = np.ediff1d(time)
-        timedelta_secs = [td.seconds+td.microseconds/1e6 for td in timedelta]
+        timedelta_secs = np.diff(time) / np.timedelta64(1, "s")
 
         # Compute thresholds
         median_timedelta_secs = np.nanmedian(timedelta_secs)
@@ -261,8 +280,8 @@ class Level1bData(DefaultLoggingClass):
         info.set_attribute("lat_max", np.nanmax(self.time_orbit.latitude))
         info.set_attribute("lon_min", np.nanmin(self.time_orbit.longitude))
         info.set_attribute("lon_max", np.nanmax(self.time_orbit.longitude))
-        info.set_attribute("start_time", self.time_orbit.timestamp[0])
-        info.set_attribute("stop_time", self.time_orbit.timestamp[-1])
+        info.set_attribute("start_time", self.time_orbit.start_time)
+        info.set_attribute("stop_time", self.time_orbit.stop_time)
 
     def update_waveform_statistics(self):
         """ Compute waveform metadata attributes """
@@ -324,7 +343,7 @@ class Level1bData(DefaultLoggingClass):
             preferred location of the maximum of the waveform in the subset
         """
         # Extract original waveform
-        orig_power, orig_range = self.waveform.power, self.waveform.range
+        orig_power = self.waveform.power
         n_records, n_bins = orig_power.shape
         # Get the bin with the waveform maximum
         max_index = np.argmax(orig_power, axis=1)
@@ -333,10 +352,6 @@ class Level1bData(DefaultLoggingClass):
         trail_bins = target_count-lead_bins
         # Get the start/stop indeces for each waveform
         start, stop = max_index - lead_bins, max_index + trail_bins
-        # Create new arrays
-        rebin_shape = (n_records, target_count)
-        power = np.ndarray(shape=rebin_shape, dtype=orig_power.dtype)
-        range = np.ndarray(shape=rebin_shape, dtype=orig_range.dtype)
         # Validity check
         overflow = np.where(stop > n_bins)[0]
         if len(overflow) > 0:
@@ -350,11 +365,15 @@ class Level1bData(DefaultLoggingClass):
             stop[underflow] -= offset
             start[underflow] -= offset
         # Extract the waveform with reduced bin count
-        for i in np.arange(n_records):
-            power[i, :] = orig_power[i, start[i]:stop[i]]
-            range[i, :] = orig_range[i, start[i]:stop[i]]
+        bin_index = start[:, np.newaxis] + np.arange(target_count)
+        power = orig_power[np.arange(n_records)[:, np.newaxis], bin_index]
+        # The range window starts at the first extracted range bin
+        range_bin_width = self.waveform.range_bin_width
+        window_delay = self.waveform.window_delay + start*range_bin_width
         # Push to waveform container
-        self.waveform.set_waveform_data(power, range, self.radar_modes)
+        self.waveform.set_waveform_window(
+            power, window_delay, range_bin_width, self.waveform.radar_mode,
+            range_dtype=self.waveform.range_dtype)
 
     def get_parameter_by_name(self, data_group, parameter_name):
         """ API method to retrieve any parameter from any data group """
@@ -466,7 +485,35 @@ class L1bConstructor(Level1bData):
         adapter.construct_l1b(self, header_only=True)
 
 
+class L1bLazyDataGroup(object):
+    """ Descriptor for a data group of L1bdataNCFile that is read from
+    the l1bdata netCDF file on first access """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if self.name in instance.__dict__.get("_pending_data_groups", ()):
+            instance.load_data_group(self.name)
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+        instance.set_data_group_loaded(self.name)
+
+
 class L1bdataNCFile(Level1bData):
+    """ Level1bData from an l1bdata netCDF file. The metadata is read
+    with `parse`, the data groups are read on first access (lazy=True)
+    or with `parse` (lazy=False) """
+
+    time_orbit = L1bLazyDataGroup("time_orbit")
+    correction = L1bLazyDataGroup("correction")
+    classifier = L1bLazyDataGroup("classifier")
+    waveform = L1bLazyDataGroup("waveform")
+    surface_type = L1bLazyDataGroup("surface_type")
 
     def __init__(self, filename):
 
@@ -475,18 +522,75 @@ class L1bdataNCFile(Level1bData):
         self.nc = None
         self.time_def = NCDateNumDef()
         self.ncattrs_ignore_list = ['_NCProperties']
+        self._pending_range_deltas = ()
+
+    def __copy__(self):
+        # NOTE: Pending data groups are read before the copy, since the data groups and
+        #       the metadata are shared by the shallow copy (as for Level1bData) and the
+        #       pending range corrections must be applied to the shared waveform group
+        for data_group in self.__dict__.get("_pending_data_groups", ()):
+            self.load_data_group(data_group)
+        l1b = self.__class__.__new__(self.__class__)
+        l1b.__dict__.update(self.__dict__)
+        return l1b
 
-    def parse(self):
-        """ populated the L1b data container from the l1bdata netcdf file """
-        self.nc = Dataset(self.filename, "r")
-        self.nc.set_auto_scale(False)
-        self._import_metadata()
-        self._import_timeorbit()
-        self._import_waveforms()
-        self._import_corrections()
-        self._import_surface_type()
-        self._import_classifier()
-        self.nc.close()
+    def parse(self, lazy=True):
+        """ populated the L1b data container from the l1bdata netcdf file
+        (only metadata if lazy, data groups are read on demand) """
+        with NETCDF_IO_LOCK:
+            self.nc = Dataset(self.filename, "r")
+            self.nc.set_auto_scale(False)
+            self._import_metadata()
+            self._pending_data_groups = tuple(self.data_groups)
+            if not lazy:
+                for data_group in self.data_groups:
+                    self._import_data_group(data_group)
+            self.nc.close()
+            self.nc = None
+
+    def load_data_group(self, data_group):
+        """ Read a data group from the l1bdata netCDF file
+        (if not already done) """
+        if data_group not in self._pending_data_groups:
+            return
+        with NETCDF_IO_LOCK:
+            self.nc = Dataset(self.filename, "r")
+            self.nc.set_auto_scale(False)
+            try:
+                self._import_data_group(data_group)
+            finally:
+                self.nc.close()
+                self.nc = None
+
+    def is_loaded(self, data_group):
+        """ Returns True if a data group has been read from the file """
+        return data_group not in self._pending_data_groups
+
+    def set_data_group_loaded(self, data_group):
+        # NOTE: A (immutable) tuple is used for the pending data groups,
+        #       since shallow copies of this instance must not share it
+        self._pending_data_groups = tuple(
+            name for name in self.__dict__.get("_pending_data_groups", ())
+            if name != data_group)
+
+    def _import_data_group(self, data_group):
+        # NOTE: The data group is marked as loaded before the import,
+        #       since the import methods access the data group attribute
+        self.set_data_group_loaded(data_group)
+        importer = {"time_orbit": self._import_timeorbit,
+                    "waveform": self._import_waveforms,
+                    "correction": self._import_corrections,
+                    "surface_type": self._import_surface_type,
+                    "classifier": self._import_classifier}
+        importer[data_group]()
+
+    def _add_waveform_range_delta(self, range_delta):
+        """ Range corrections are applied when the waveform group
+        is read from file """
+        if self.is_loaded("waveform"):
+            self.waveform.add_range_delta(range_delta)
+        else:
+            self._pending_range_deltas = self._pending_range_deltas + (range_delta, )
 
     def _import_metadata(self):
         """
@@ -499,9 +603,9 @@ class L1bdataNCFile(Level1bData):
             attribute_value = getattr(self.nc, attribute_name)
             # Convert timestamps back to datetime objects
             if attribute_name in ["start_time", "stop_time"]:
-                attribute_value = num2date(
+                attribute_value = datetime64_to_datetime(num2datetime64(
                     attribute_value, self.time_def.units,
-                    calendar=self.time_def.calendar)
+                    calendar=self.time_def.calendar))
             # Convert flags (integers back to bool)
             if attribute_name in ["is_orbit_subset", "is_merged_orbit"]:
                 attribute_value = bool(attribute_value)
@@ -535,8 +639,8 @@ class L1bdataNCFile(Level1bData):
             antenna_angles["roll"],
             antenna_angles["yaw"])
 
-        # Convert the timestamp to datetimes
-        self.time_orbit.timestamp = num2date(
+        # Convert the timestamp to datetime64 (no datetime objects)
+        self.time_orbit.timestamp = num2datetime64(
              datagroup.variables["timestamp"][:],
              self.time_def.units,
              calendar=self.time_def.calendar)
@@ -550,13 +654,41 @@ class L1bdataNCFile(Level1bData):
         datagroup = self.nc.groups["waveform"]
 
         # Set waveform (measurement is nadir)
-        self.waveform.set_waveform_data(
-            datagroup.variables["power"][:],
-            datagroup.variables["range"][:],
-            datagroup.variables["radar_mode"][:])
+        # NOTE: l1p files of earlier versions contain the full range array
+        power = self._get_waveform_power(datagroup)
+        if "window_delay" in datagroup.variables:
+            self.waveform.set_waveform_window(
+                power,
+                datagroup.variables["window_delay"][:],
+                datagroup.variables["range_bin_width"][:],
+                datagroup.variables["radar_mode"][:])
+        else:
+            self.waveform.set_waveform_data(
+                power,
+                datagroup.variables["range"][:],
+                datagroup.variables["radar_mode"][:])
         # Set the valid flag
         is_valid = datagroup.variables["is_valid"][:].astype(bool)
         self.waveform.set_valid_flag(is_valid)
+        # Apply range corrections that were requested before reading
+        for range_delta in self._pending_range_deltas:
+            self.waveform.add_range_delta(range_delta)
+        self._pending_range_deltas = ()
+
+    @staticmethod
+    def _get_waveform_power(datagroup):
+        """
+        Returns the waveform power, which might be stored as scaled integers
+        (see pysiral.output.ScaledIntegerEncoding)
+        """
+        variable = datagroup.variables["power"]
+        if "power_scale_factor" not in datagroup.variables:
+            return variable[:]
+        encoding = ScaledIntegerEncoding(variable.dtype.name)
+        variable.set_auto_maskandscale(False)
+        return encoding.decode(variable[:],
+                               datagroup.variables["power_offset"][:],
+                               datagroup.variables["power_scale_factor"][:])
 
     def _import_corrections(self):
         """
@@ -714,13 +846,30 @@ class L1bTimeOrbit(object):
 
     @property
     def timestamp(self):
+        """ Timestamps as datetime64 array (microsecond resolution) """
         return np.array(self._timestamp)
 
     @timestamp.setter
     def timestamp(self, value):
+        """ Accepts datetime64 or datetime objects """
         if self._info is not None:
             self._info.check_n_records(len(value))
-        self._timestamp = value
+        self._timestamp = to_datetime64(value)
+
+    @property
+    def datetime(self):
+        """ Timestamps as array of datetime objects (created on demand) """
+        return datetime64_to_datetime(self._timestamp)
+
+    @property
+    def start_time(self):
+        """ First timestamp as datetime object """
+        return datetime64_to_datetime(self._timestamp[0])
+
+    @property
+    def stop_time(self):
+        """ Last timestamp as datetime object """
+        return datetime64_to_datetime(self._timestamp[-1])
 
     @property
     def parameter_list(self):
@@ -779,11 +928,13 @@ class L1bTimeOrbit(object):
         self._antenna_yaw = yaw
 
     def append(self, annex):
+        self.extend([annex])
+
+    def extend(self, annexes):
         for parameter in self.parameter_list:
-            this_data = getattr(self, "_"+parameter)
-            annex_data = getattr(annex, parameter)
-            this_data = np.append(this_data, annex_data)
-            setattr(self,  "_"+parameter, this_data)
+            data = [getattr(self, "_"+parameter)]
+            data.extend([getattr(annex, parameter) for annex in annexes])
+            setattr(self,  "_"+parameter, np.concatenate(data))
 
     def set_subset(self, subset_list):
         for parameter in self.parameter_list:
@@ -803,12 +954,13 @@ class L1bTimeOrbit(object):
             data_old = getattr(self, parameter_name)
             data_corr = np.interp(corrected_indices, indices_map, data_old)
             geoloc_parameters.append(data_corr)
-        self.set_position(*geoloc_parameters)
+        self.set_position(*geoloc_parameters[:4])
+        self.set_antenna_attitude(*geoloc_parameters[4:])
 
         # Update the timestamp
-        time_old_num = date2num(self.timestamp, DATE2NUM_UNIT)
+        time_old_num = datetime642num(self.timestamp, DATE2NUM_UNIT)
         time_num = np.interp(corrected_indices, indices_map, time_old_num)
-        self.timestamp = num2date(time_num, DATE2NUM_UNIT)
+        self.timestamp = num2datetime64(time_num, DATE2NUM_UNIT)
 
 #        import matplotlib.pyplot as plt
 #        plt.figure("time")
@@ -831,6 +983,9 @@ class L1bTimeOrbit(object):
 
     def __setstate__(self, d):
         self.__dict__.update(d)
+        # Objects pickled with arrays of datetime objects
+        if self._timestamp is not None:
+            self._timestamp = to_datetime64(self._timestamp)
 
 
 class L1bRangeCorrections(object):
@@ -872,11 +1027,13 @@ class L1bRangeCorrections(object):
             return None
 
     def append(self, annex):
+        self.extend([annex])
+
+    def extend(self, annexes):
         for parameter in self.parameter_list:
-            this_data = getattr(self, parameter)
-            annex_data = getattr(annex, parameter)
-            this_data = np.append(this_data, annex_data)
-            setattr(self, parameter, this_data)
+            data = [getattr(self, parameter)]
+            data.extend([getattr(annex, parameter) for annex in annexes])
+            setattr(self, parameter, np.concatenate(data))
 
     def set_subset(self, subset_list):
         for parameter in self.parameter_list:
@@ -940,11 +1097,13 @@ class L1bClassifiers(object):
             return getattr(self, parameter_name)
 
     def append(self, annex):
+        self.extend([annex])
+
+    def extend(self, annexes):
         for parameter in self.parameter_list:
-            this_data = getattr(self, parameter)
-            annex_data = getattr(annex, parameter)
-            this_data = np.append(this_data, annex_data)
-            setattr(self, parameter, this_data)
+            data = [getattr(self, parameter)]
+            data.extend([getattr(annex, parameter) for annex in annexes])
+            setattr(self, parameter, np.concatenate(data))
 
     def set_subset(self, subset_list):
         for parameter in self.parameter_list:
@@ -964,10 +1123,17 @@ class L1bClassifiers(object):
 
 
 class L1bWaveforms(object):
-    """ Container for Echo Power Waveforms """
+    """ Container for Echo Power Waveforms
+
+    The range of the waveform bins is not stored as a full (n_records,
+    n_bins) array, but as the range of the first range bin (window delay
+    in meter) and the range bin width for each record. The range of each
+    range bin is computed on request (see property `range`)
+    """
 
     _valid_radar_modes = ["lrm", "sar", "sin"]
-    _parameter_list = ["power", "range", "radar_mode", "is_valid"]
+    _parameter_list = ["power", "window_delay", "range_bin_width",
+                       "radar_mode", "is_valid"]
     _attribute_list = ["echo_power_unit"]
 
     def __init__(self, info):
@@ -977,7 +1143,9 @@ class L1bWaveforms(object):
         self.radar_mode_def = RadarModes()
         # Parameter
         self._power = None
-        self._range = None
+        self._window_delay = None
+        self._range_bin_width = None
+        self._range_dtype = None
         self._radar_mode = None
         self._is_valid = None
 
@@ -987,7 +1155,28 @@ class L1bWaveforms(object):
 
     @property
     def range(self):
-        return np.copy(self._range)
+        """ Range of each waveform range bin as array (n_records, n_bins) """
+        if self._power is None:
+            return None
+        range_bin_index = np.arange(self.n_range_bins)
+        wfm_range = self._window_delay[:, np.newaxis] + \
+            self._range_bin_width[:, np.newaxis]*range_bin_index
+        return wfm_range.astype(self._range_dtype)
+
+    @property
+    def window_delay(self):
+        """ Range of the first range bin in meter """
+        return np.copy(self._window_delay)
+
+    @property
+    def range_bin_width(self):
+        """ Range increment between two range bins in meter """
+        return np.copy(self._range_bin_width)
+
+    @property
+    def range_dtype(self):
+        """ Data type of the range array """
+        return self._range_dtype
 
     @property
     def radar_mode(self):
@@ -1024,18 +1213,52 @@ class L1bWaveforms(object):
         return dimdict
 
     def set_waveform_data(self, power, range, radar_mode):
+        """
+        Set the waveform power and range arrays (n_records, n_bins). The
+        range array is reduced to the window delay and range bin width
+        of each waveform (the range must increase linearly with the
+        range bin index)
+        """
         # Validate input
         if power.shape != range.shape:
             raise ValueError("power and range must be of same shape", power.shape, range.shape)
         if len(power.shape) != 2:
             raise ValueError("power and range arrays must be of dimension (n_records, n_bins)")
+        window_delay, range_bin_width = get_range_window(range)
+        self.set_waveform_window(power, window_delay, range_bin_width, radar_mode,
+                                 range_dtype=range.dtype)
+
+    def set_waveform_window(self, power, window_delay, range_bin_width, radar_mode,
+                            range_dtype=np.float32):
+        """
+        Set the waveform power array (n_records, n_bins) and the range
+        window definition
+
+        :param power: waveform power array (n_records, n_bins)
+        :param window_delay: range of the first range bin in meter (n_records)
+        :param range_bin_width: range bin width in meter (scalar or n_records)
+        :param radar_mode: radar mode name or flag array (n_records)
+        :param range_dtype: data type of the range array (default: float,
+            double will cause issues with cythonized retrackers)
+        """
+
+        # Validate input
+        if len(power.shape) != 2:
+            raise ValueError("power array must be of dimension (n_records, n_bins)")
 
-            # Validate number of records
+        # Validate number of records
         self._info.check_n_records(power.shape[0])
+        n_records = power.shape[0]
+        window_delay = np.asarray(window_delay, dtype=np.float64)
+        if window_delay.shape != (n_records, ):
+            raise ValueError("window_delay must be of dimension (n_records)", window_delay.shape)
 
         # Assign values
         self._power = power
-        self._range = range
+        self._window_delay = window_delay
+        self._range_bin_width = np.full(n_records, np.nan)
+        self._range_bin_width[:] = range_bin_width
+        self._range_dtype = np.dtype(range_dtype)
 
         # Create radar mode arrays
         if type(radar_mode) is str and radar_mode in self._valid_radar_modes:
@@ -1057,14 +1280,19 @@ class L1bWaveforms(object):
         self._is_valid = valid_flag
 
     def append(self, annex):
-        self._power = np.concatenate((self._power, annex.power), axis=0)
-        self._range = np.concatenate((self._range, annex.range), axis=0)
-        self._radar_mode = np.append(self._radar_mode, annex.radar_mode)
-        self._is_valid = np.append(self._is_valid, annex.is_valid)
+        self.extend([annex])
+
+    def extend(self, annexes):
+        self._power = np.concatenate([self._power]+[annex.power for annex in annexes], axis=0)
+        self._window_delay = np.concatenate([self._window_delay]+[annex.window_delay for annex in annexes])
+        self._range_bin_width = np.concatenate([self._range_bin_width]+[annex.range_bin_width for annex in annexes])
+        self._radar_mode = np.concatenate([self._radar_mode]+[annex.radar_mode for annex in annexes])
+        self._is_valid = np.concatenate([self._is_valid]+[annex.is_valid for annex in annexes])
 
     def set_subset(self, subset_list):
         self._power = self._power[subset_list, :]
-        self._range = self._range[subset_list, :]
+        self._window_delay = self._window_delay[subset_list]
+        self._range_bin_width = self._range_bin_width[subset_list]
         self._radar_mode = self._radar_mode[subset_list]
         self._is_valid = self._is_valid[subset_list]
 
@@ -1074,9 +1302,7 @@ class L1bWaveforms(object):
         :param range_delta:
         :return:
         """
-        range_delta_reshaped = np.repeat(range_delta, self.n_range_bins)
-        range_delta_reshaped = range_delta_reshaped.reshape(self.n_records, self.n_range_bins)
-        self._range += range_delta_reshaped
+        self._window_delay += range_delta
 
     def fill_gaps(self, corrected_n_records, gap_indices, indices_map):
         """ API gap filler method. Note: Gaps will be filled with
@@ -1090,8 +1316,10 @@ class L1bWaveforms(object):
         # Power/range: set gaps to nan
         power = np.full((corrected_n_records, self.n_range_bins), np.nan)
         power[indices_map, :] = self.power
-        range = np.full((corrected_n_records, self.n_range_bins), np.nan)
-        range[indices_map, :] = self.range
+        window_delay = np.full((corrected_n_records), np.nan)
+        window_delay[indices_map] = self.window_delay
+        range_bin_width = np.full((corrected_n_records), np.nan)
+        range_bin_width[indices_map] = self.range_bin_width
 
         # Radar map: set gaps to lrm
         radar_mode = np.full((corrected_n_records), 1,
@@ -1099,13 +1327,35 @@ class L1bWaveforms(object):
         radar_mode[indices_map] = self.radar_mode
 
         # And set new values
-        self.set_waveform_data(power, range, radar_mode)
+        self.set_waveform_window(power, window_delay, range_bin_width, radar_mode,
+                                 range_dtype=self.range_dtype)
 
     def _get_wfm_shape(self, index):
         shape = np.shape(self._power)
         return shape[index]
 
 
+def get_range_window(wfm_range):
+    """
+    Returns the range of the first range bin (window delay) and the range
+    bin width of each waveform from a range array (n_records, n_bins)
+    """
+    # NOTE: Least squares fit of range vs. range bin index, since the
+    #       range values may have been rounded to single precision
+    wfm_range = np.asarray(wfm_range, dtype=np.float64)
+    n_range_bins = wfm_range.shape[1]
+    if n_range_bins == 1:
+        return wfm_range[:, 0], np.zeros(wfm_range.shape[0])
+    range_offset = wfm_range[:, 0]
+    range_bin_index = np.arange(n_range_bins) - 0.5*(n_range_bins-1)
+    relative_range = wfm_range - range_offset[:, np.newaxis]
+    mean_range = np.mean(relative_range, axis=1)
+    range_bin_width = np.sum(relative_range*range_bin_index, axis=1) / \
+        np.sum(range_bin_index**2.0)
+    window_delay = range_offset + mean_range + range_bin_index[0]*range_bin_width
+    return window_delay, range_bin_width
+
+
 def get_l1b_adapter(mission):
     """ Select and returns the correct IO Adapter for the specified mission """
 
@@ -340,8 +340,7 @@ class L1bPreProc(DefaultLoggingClass):
         # Merge the stack to a single l1b instance
         l1b_merged = l1bdata_stack[0]
         l1bdata_stack.pop(0)
-        for orbit_segment in l1bdata_stack:
-            l1b_merged.append(orbit_segment)
+        l1b_merged.extend(l1bdata_stack)
 
         return l1b_merged
 
@@ -12,7 +12,7 @@ from pysiral.helper import (ProgressIndicator, get_first_array_index, get_last_a
 from pysiral.errorhandler import ErrorStatus
 from pysiral.path import validate_directory
 from pysiral.logging import DefaultLoggingClass
-from pysiral.output import L1bDataNC
+from pysiral.output import L1bDataNC, NCIOProfile, NETCDF_IO_LOCK
 
 
 def get_preproc(type, input_adapter, output_handler, cfg):
@@ -67,6 +67,20 @@ class L1PreProcBase(DefaultLoggingClass):
         # The stack of Level-1 objects is a simple list
         self.l1_stack = []
 
+        # An optional Level-2 processor that directly processes the merged Level-1 objects
+        # (in-memory pipeline without the need to read the l1p files)
+        self.l2_processor = None
+
+    def set_l2_processor(self, l2_processor):
+        """
+        Set a Level-2 processor that receives all exported (merged) Level-1 objects
+        (see Level2Processor.process_l1b_data). The export of l1p netCDF files is then optional
+        (output handler option `export_l1p`).
+        :param l2_processor: An initialized pysiral.l2proc.Level2Processor instance
+        :return: None
+        """
+        self.l2_processor = l2_processor
+
     def process_input_files(self, input_file_list):
         """
         Main entry point for the Level-Preprocessor.
@@ -96,8 +110,11 @@ class L1PreProcBase(DefaultLoggingClass):
             # of the input adaptor. The input handler gets only the filename and the target
             # region to assess whether it is necessary to parse and transform the file content
             # for the sake of computational efficiency.
+            # NOTE: The input adapters read netCDF files (partly lazy via xarray), which must not
+            #       overlap with netCDF I/O in other threads (e.g. the background output writer)
             self.log.info("+ Process input file %s" % prgs.get_status_report(i))
-            l1 = self.input_adapter.get_l1(input_file, polar_ocean_check)
+            with NETCDF_IO_LOCK:
+                l1 = self.input_adapter.get_l1(input_file, polar_ocean_check)
             if l1 is None:
                 self.log.info("- No polar ocean data for curent job -> skip file")
                 continue
@@ -120,7 +137,7 @@ class L1PreProcBase(DefaultLoggingClass):
 
         # Step : Export the last item in the stack
         l1_merged = self.l1_get_merged_stack()
-        self.l1_export_to_netcdf(l1_merged)
+        self.l1_export(l1_merged)
 
     def l1_post_processing(self, l1_segments):
         """
@@ -176,7 +193,7 @@ class L1PreProcBase(DefaultLoggingClass):
             else:
                 self.log.info("- L1 segment unconnected -> exporting current stack")
                 l1_merged = self.l1_get_merged_stack()
-                self.l1_export_to_netcdf(l1_merged)
+                self.l1_export(l1_merged)
                 self.l1_stack = [l1]
 
     def l1_is_connected_to_stack(self, l1):
@@ -205,14 +222,14 @@ class L1PreProcBase(DefaultLoggingClass):
         :return: Level-1 data object
         """
         l1_merged = self.l1_stack[0]
-        for l1 in self.l1_stack[1:]:
-            l1_merged.append(l1)
+        l1_merged.extend(self.l1_stack[1:])
         return l1_merged
 
-    def l1_export_to_netcdf(self, l1):
+    def l1_export(self, l1):
         """
-        Exports the Level-1 object as as l1p netCDF
-        :param l1_merged: The Level-1 object to exported
+        Exports the Level-1 object as l1p netCDF (optional) and passes it to the
+        Level-2 processor (if applicable)
+        :param l1: The Level-1 object to exported
         :return:
         """
 
@@ -221,11 +238,44 @@ class L1PreProcBase(DefaultLoggingClass):
         else:
             minimum_n_records = 0
 
-        if l1.n_records >= minimum_n_records:
-            self.output_handler.export_to_netcdf(l1)
-            self.log.info("- Written l1p product: %s" % self.output_handler.last_written_file)
-        else:
+        if l1.n_records < minimum_n_records:
             self.log.info("- Orbit segment below minimum size (%g), skipping" % l1.n_records)
+            return
+
+        # NOTE: The l1p file needs to be written first, since the Level-2 processor
+        #       changes the Level-1 object in place (e.g. range corrections)
+        if self.output_handler.export_l1p:
+            self.l1_export_to_netcdf(l1)
+
+        if self.l2_processor is not None:
+            self.l1_export_to_l2_processor(l1)
+
+    def l1_export_to_netcdf(self, l1):
+        """
+        Exports the Level-1 object as as l1p netCDF
+        :param l1: The Level-1 object to exported
+        :return:
+        """
+        self.output_handler.export_to_netcdf(l1)
+        self.log.info("- Written l1p product: %s" % self.output_handler.last_written_file)
+
+    def l1_export_to_l2_processor(self, l1):
+        """
+        Level-2 processing of the Level-1 object without reading the l1p product
+        :param l1: The Level-1 object to exported
+        :return:
+        """
+
+        # The Level-2 processor is only valid for one hemisphere
+        l2_hemisphere = self.l2_processor.l2def.hemisphere
+        if l1.info.hemisphere != l2_hemisphere:
+            msg = "- Orbit segment not in Level-2 target hemisphere (%s), skipping Level-2 processing"
+            self.log.info(msg % l2_hemisphere)
+            return
+
+        # The l1p filename is used as input file identifier (regardless if the l1p file is written)
+        self.output_handler.set_output_filepath(l1)
+        self.l2_processor.process_l1b_data(l1, self.output_handler.last_written_file)
 
 
     def trim_single_hemisphere_segment_to_polar_region(self, l1):
@@ -842,6 +892,7 @@ class Level1PreProcJobDef(DefaultLoggingClass):
         data_handler_cfg = dict()
         data_handler_cfg["overwrite_protection"] = args.overwrite_protection
         data_handler_cfg["remove_old"] = args.remove_old
+        data_handler_cfg["export_l1p"] = args.export_l1p
         kwargs["output_handler_cfg"] = data_handler_cfg
         kwargs["hemisphere"] = args.hemisphere
         kwargs["platform"] = args.platform
@@ -1046,6 +1097,8 @@ class Level1POutputHandler(DefaultLoggingClass):
         ncfile.l1b = l1
         ncfile.output_folder = self.path
         ncfile.filename = self.filename
+        ncfile.waveform_power_encoding = self.cfg.get("waveform_power_encoding", None)
+        ncfile.io_profile = NCIOProfile(self.cfg.get("io_profile", None))
         ncfile.export()
 
     def set_output_filepath(self, l1):
@@ -1070,17 +1123,23 @@ class Level1POutputHandler(DefaultLoggingClass):
                   "source": self.cfg.version.source_file_tag,
                   "timeliness": l1.info.timeliness,
                   "hemisphere": l1.info.hemisphere,
-                  "tcs": l1.time_orbit.timestamp[0].strftime(time_fmt),
-                  "tce": l1.time_orbit.timestamp[-1].strftime(time_fmt),
+                  "tcs": l1.time_orbit.start_time.strftime(time_fmt),
+                  "tce": l1.time_orbit.stop_time.strftime(time_fmt),
                   "file_version": self.cfg.version.version_file_tag}
         self._filename = filename_template.format(**values)
 
         local_repository = self.pysiral_cfg.local_machine.l1b_repository
         export_folder = local_repository[l1.info.mission][local_machine_def_tag].l1p
-        yyyy = "%04g" % l1.time_orbit.timestamp[0].year
-        mm = "%02g" % l1.time_orbit.timestamp[0].month
+        yyyy = "%04g" % l1.time_orbit.start_time.year
+        mm = "%02g" % l1.time_orbit.start_time.month
         self._path = os.path.join(export_folder, l1.info.hemisphere, yyyy, mm)
 
+    @property
+    def export_l1p(self):
+        """ Flag if l1p netCDF files are written (optional if the pre-processor
+        is connected to a Level-2 processor) """
+        return self.cfg.get("export_l1p", True)
+
     @property
     def path(self):
         return self._path
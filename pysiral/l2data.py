@@ -9,6 +9,7 @@ from pysiral import __version__
 from pysiral.config import SENSOR_NAME_DICT, MISSION_NAME_DICT
 from pysiral.errorhandler import ErrorStatus
 from pysiral.iotools import ReadNC
+from pysiral.clocks import num2datetime64
 from pysiral.logging import DefaultLoggingClass
 from pysiral.l1bdata import L1bMetaData, L1bTimeOrbit
 
@@ -441,7 +442,7 @@ class Level2Data(object):
 
     def _get_attr_time_resolution(self, *args):
         tdelta = self.time[-1]-self.time[0]
-        seconds = tdelta.total_seconds() + 1e-6 * tdelta.microseconds
+        seconds = tdelta / np.timedelta64(1, "s")
         resolution = seconds/self.n_records
         return "%.2f seconds" % resolution
 
@@ -520,11 +521,8 @@ class Level2Data(object):
 
     @property
     def time(self):
-        try:
-            time = self.track.time
-        except AttributeError:
-            time = self.track.timestamp
-        return time
+        """ Timestamps as datetime64 array """
+        return self.track.timestamp
 
     @property
     def longitude(self):
@@ -599,7 +597,7 @@ class Level2iTimeOrbit(L1bTimeOrbit):
         dummy_altitude = np.full(longitude.shape, np.nan)
 
         # Set the timestamp
-        self.time = time
+        self.timestamp = time
 
         # Set the position
         self.set_position(longitude, latitude, dummy_altitude)
@@ -609,10 +607,10 @@ class Level2iTimeOrbit(L1bTimeOrbit):
         necessary when the Level2Data object shall be constructed from an
         l2i netcdf product """
         # Set the timestamp
-        self.time = l2i.timestamp
+        self.timestamp = l2i.time
         # Set the position
         dummy_altitude = np.full(l2i.longitude.shape, np.nan)
-        self.set_position(self, l2i.longitude, l2i.latitude, dummy_altitude)
+        self.set_position(l2i.longitude, l2i.latitude, dummy_altitude)
 
 
 class L2ElevationArray(np.ndarray):
@@ -699,9 +697,9 @@ class Level2PContainer(DefaultLoggingClass):
 
         # Set up a metadata container
         metadata = Level2iMetadata()
-        metadata.set_attribute("n_records", len(timeorbit.time))
-        metadata.set_attribute("start_time", timeorbit.time[0])
-        metadata.set_attribute("stop_time", timeorbit.time[-1])
+        metadata.set_attribute("n_records", len(timeorbit.timestamp))
+        metadata.set_attribute("start_time", timeorbit.start_time)
+        metadata.set_attribute("stop_time", timeorbit.stop_time)
 
         # XXX: Very ugly, but required due to a non-standard use of
         #      region_subset_set (originally idea to crop regions in
@@ -795,14 +793,19 @@ class Level2PContainer(DefaultLoggingClass):
                 is_valid = np.arange(l2i.n_records)
             for parameter in parameter_list:
                 stack_data = getattr(l2i, parameter)
-                stack_data = stack_data[is_valid]
-                data[parameter] = np.append(data[parameter], stack_data)
+                data[parameter].append(stack_data[is_valid])
+        # Merge (keeps the data type, e.g. datetime64 for time)
+        for parameter in parameter_list:
+            if len(data[parameter]) == 0:
+                data[parameter] = np.array([], dtype=np.float32)
+            else:
+                data[parameter] = np.concatenate(data[parameter])
         return data
 
     def _get_empty_data_group(self, parameter_list):
         data = {}
         for parameter_name in parameter_list:
-            data[parameter_name] = np.array([], dtype=np.float32)
+            data[parameter_name] = []
         return data
 
     @property
@@ -841,7 +844,6 @@ class L2iNCFileImport(object):
         self._parse()
 
     def _parse(self):
-        from netCDF4 import num2date
 
         content = ReadNC(self.filename)
 
@@ -857,16 +859,17 @@ class L2iNCFileImport(object):
         self._n_records = len(self.longitude)
 
         # Get timestamp (can be either time or timestamp in l2i files)
+        # as datetime64 array
         if hasattr(self, "time"):
             time = self.time
             time_parameter_name = "time"
         else:
-            time = self.time
+            time = self.timestamp
             time_parameter_name = "timestamp"
         self._time_parameter_name = time_parameter_name
-        dt = num2date(time, self.time_def.units, self.time_def.calendar)
-        setattr(self, "time", dt)
-        self.time = self.time
+        self.time = num2datetime64(
+            time, self.time_def.units, self.time_def.calendar)
+        setattr(self, time_parameter_name, self.time)
 
     def transfer_nan_mask(self, source, targets):
         source_parameter = getattr(self, source)
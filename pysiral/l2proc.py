@@ -14,7 +14,8 @@ from pysiral.l1bdata import L1bdataNCFile
 from pysiral.l2data import Level2Data
 from pysiral.logging import DefaultLoggingClass
 from pysiral.ssh import get_l2_ssh_class
-from pysiral.output import (Level2Output, DefaultLevel2OutputHandler, get_output_class)
+from pysiral.output import (Level2Output, DefaultLevel2OutputHandler,
+                            BackgroundOutputWriter, L2PROC_FINGERPRINT_ATTRIBUTE, NETCDF_IO_LOCK)
 from pysiral.surface_type import get_surface_type_class
 from pysiral.retracker import get_retracker_class
 from pysiral.filter import get_filter
@@ -24,16 +25,42 @@ from pysiral.sit import get_sit_algorithm
 from pysiral.path import filename_from_path
 
 from collections import deque, OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
+from netCDF4 import Dataset
+import multiprocessing
+import hashlib
+import json
 import numpy as np
 import time
 import sys
 import os
 
 
+# Level-2 processor instance used by the orbit workers of the process pool. The workers
+# are forked from the main process and thus inherit the (initialized) processor
+# including auxiliary data handlers and output handlers without the need for pickling
+_L2PROC_WORKER_INSTANCE = None
+
+
+def _l2proc_orbit_worker(args):
+    """ Process a single l1p file in a worker process of the Level-2 processor pool """
+    index, l1b_file = args
+    l2proc = _L2PROC_WORKER_INSTANCE
+    l2proc.log.info("+ [ %g of %g ] (%.2f%%)" % (index+1, l2proc.n_files, float(index+1)/float(l2proc.n_files)*100.))
+    n_stage_timing = len(l2proc.report.stage_timing)
+    l2, error_codes, orbit_summary = l2proc._l2_processing_of_orbit_file(l1b_file)
+    stage_timing = l2proc.report.stage_timing[n_stage_timing:]
+    # NOTE: The output files have already been written by the worker. Only the error
+    #       codes, the orbit summary and stage timing are returned to the main process
+    #       to avoid pickling the l2 data object
+    return l1b_file, error_codes, orbit_summary, stage_timing
+
+
 class Level2Processor(DefaultLoggingClass):
 
-    def __init__(self, product_def, auxclass_handler=None):
+    def __init__(self, product_def, auxclass_handler=None, n_workers=1, streaming=False, resume=False,
+                 async_output=False):
         """ Setup of the Level-2 Processor """
 
         super(Level2Processor, self).__init__(self.__class__.__name__)
@@ -64,12 +91,40 @@ class Level2Processor(DefaultLoggingClass):
         # List of Level-1b input files
         self._l1b_files = []
 
+        # Number of worker processes for orbit processing (1: serial processing)
+        self._n_workers = max(int(n_workers), 1)
+
+        # Streaming mode: Level-2 data objects are released after the output has been written
+        # and only a compact summary of each orbit is kept in the processor report.
+        # NOTE: The orbit collection (self.orbit) is always empty in streaming mode and
+        #       for parallel processing
+        self._streaming = streaming
+
+        # Resume mode: l1p files with up to date output files (identical processing
+        # fingerprint, see Level2ProcessingFingerprint) are not processed again.
+        # NOTE: The fingerprints of all output files are recorded in a manifest file
+        #       in the output directory regardless of the resume mode
+        self._resume = resume
+        self._fingerprint = None
+        self._output_manifests = []
+
+        # Asynchronous output: The output files are written in a background thread while the
+        # next orbit is processed. Orbits are only added to the report and the manifests
+        # after their output has been written.
+        # NOTE: Not used for parallel processing (the workers write the output files)
+        self._async_output = async_output
+        self._output_writer = None
+        self._pending_orbit_summaries = OrderedDict([])
+
         # pysiral config
         self._config = ConfigInfo()
 
         # Processor Initialization Flag
         self._initialized = False
 
+        # The compiled Level-2 processing plan (see _initialize_processor)
+        self._plan = None
+
         # Processor summary report
         self.report = L2ProcessorReport()
 
@@ -87,10 +142,34 @@ class Level2Processor(DefaultLoggingClass):
     def has_empty_file_list(self):
         return len(self._l1b_files) == 0
 
+    @property
+    def n_files(self):
+        return len(self._l1b_files)
+
+    @property
+    def n_workers(self):
+        return self._n_workers
+
+    @property
+    def streaming(self):
+        return self._streaming
+
+    @property
+    def resume(self):
+        return self._resume
+
+    @property
+    def async_output(self):
+        return self._async_output
+
     @property
     def l2def(self):
         return self._l2def
 
+    @property
+    def plan(self):
+        return self._plan
+
     @property
     def registered_auxdata_handlers(self):
         return list(self._registered_auxdata_handlers)
@@ -123,28 +202,108 @@ class Level2Processor(DefaultLoggingClass):
         self.set_l1b_files(l1b_files)
         self.run()
 
+    def process_l1b_data(self, l1b, l1b_file):
+        """
+        Level-2 processing of a Level-1 data object that is already in memory
+        (e.g. passed by the Level-1 pre-processor without writing/reading the l1p file)
+        :param l1b: A Level-1 data object (pysiral.l1bdata.Level1bData)
+        :param l1b_file: The (potential) l1p filename used as identifier of the input data
+        :return: the level-2 data object (None if the orbit was discarded)
+        """
+        l1b.info.subset_region_name = self.l2def.hemisphere
+        if len(self._output_manifests) == 0:
+            self._read_output_manifests()
+        self._start_output_writer()
+        l2, error_codes, orbit_summary = self._l2_processing_of_orbit_file(l1b_file, l1b=l1b)
+        if l2 is None:
+            self._discard_l1b_procedure(error_codes, l1b_file)
+            return None
+        self._add_orbit_summary(l1b_file, orbit_summary)
+        if not self.streaming:
+            self._add_to_orbit_collection(l2)
+        return l2
+
+    def flush_output(self):
+        """ Wait until all output files of asynchronous output are written (required after
+        the last call of `process_l1b_data`, done by `finish` and automatically for `process_l1b_files`) """
+        self._stop_output_writer()
+
+    def finish(self, time_range):
+        """ Complete a run of `process_l1b_data` calls (as done by `run` for `process_l1b_files`):
+        Wait for the output files, write the summary and stage timing files and reset the report
+        :param time_range: The time range of the run (pysiral.config.TimeRangeRequest), which
+            also defines the export folder of the summary files
+        """
+        self.report.time_range = time_range
+        self.flush_output()
+        self._compact_output_manifests()
+        self.report.log_stage_summary()
+        self._l2proc_summary_to_file()
+        self._clean_up()
+
     def run(self):
         """ Run the processor """
+        t0 = time.time()
+        self._read_output_manifests()
+        if self.resume:
+            self._remove_up_to_date_l1b_files()
         self._l2_processing_of_orbit_files()
+        self._compact_output_manifests()
+        self.report.run_seconds = time.time()-t0
+        self.report.log_stage_summary()
         self._l2proc_summary_to_file()
         self._clean_up()
 
 # %% Level2Processor: house keeping methods
 
     def _l2proc_summary_to_file(self):
-        output_ids, output_defs = td_branches(self.l2def.output)
-        for output_id, output_def in zip(output_ids, output_defs):
-            output = get_output_class(output_def.pyclass)
-            output.set_options(**output_def.options)
-            output.set_base_export_path(output_def.path)
-            time_range = self.report.time_range
-            export_folder = output.get_full_export_path(time_range.start)
-            self.report.write_to_file(output_id, export_folder)
+        """ Write the summary report and the stage timing to the output directory of each
+        output handler (the directory of the start of the time range, if known) """
+        time_range = self.report.time_range
+        for output_handler in self._output_handler:
+            if time_range is None:
+                export_folder = output_handler.basedir
+            else:
+                export_folder = output_handler.get_directory_from_dt(time_range.start_dt)
+            self.report.write_to_file(output_handler.id, export_folder)
 
     def _clean_up(self):
         """ All procedures that need to be reset after a run """
         self.report.clean_up()
 
+    def _read_output_manifests(self):
+        """ Read the records of existing output files for all output handlers """
+        self._output_manifests = [Level2OutputManifest(output_handler.basedir)
+                                  for output_handler in self._output_handler]
+
+    def _compact_output_manifests(self):
+        """ Rewrite the manifests with one record per l1p file (end of a processor run) """
+        for manifest in self._output_manifests:
+            manifest.compact()
+        self._output_manifests = []
+
+    def _remove_up_to_date_l1b_files(self):
+        """ Remove all l1p files from the list of input files, for which up-to-date output
+        files exist for all output handlers """
+
+        # With overwrite protection each run has its own output directory
+        for output_handler in self._output_handler:
+            if getattr(output_handler, "overwrite_protection", False):
+                msg = "Resume: overwrite protection is enabled for output %s (new output directory)"
+                self.log.warning(msg % output_handler.id)
+
+        l1b_files = []
+        for l1b_file in self._l1b_files:
+            is_up_to_date = [manifest.is_up_to_date(l1b_file, self._fingerprint.get(l1b_file, output_handler))
+                             for manifest, output_handler in zip(self._output_manifests, self._output_handler)]
+            if all(is_up_to_date):
+                self.report.add_orbit_skipped_event(l1b_file)
+            else:
+                l1b_files.append(l1b_file)
+        self.log.info("Resume: %g of %g l1p files with up-to-date output are skipped" % (
+            self.n_files-len(l1b_files), self.n_files))
+        self._l1b_files = l1b_files
+
 # %% Level2Processor: initialization
 
     def _initialize_processor(self):
@@ -166,9 +325,17 @@ class Level2Processor(DefaultLoggingClass):
         self.log.info("Processor Settings - lead interpolator: %s" % (
             self.l2def.ssa.pyclass))
 
+        # Compile the Level-2 algorithm definition into a processing plan
+        # (algorithm classes are reused for all orbits)
+        self._plan = Level2ProcessingPlan(self.l2def)
+
         # Initialize the auxiliary data handlers
         self._set_auxdata_handlers()
 
+        # Fingerprint of the Level-2 settings for the output files (also required for resume mode)
+        auxhandlers = [self._auxhandlers[auxdata_id] for auxdata_id, auxdata_type in self.registered_auxdata_handlers]
+        self._fingerprint = Level2ProcessingFingerprint(self.l2def, auxhandlers)
+
         # Report on output location
         self._report_output_location()
 
@@ -221,100 +388,203 @@ class Level2Processor(DefaultLoggingClass):
     def _l2_processing_of_orbit_files(self):
         """ Orbit-wise level2 processing """
 
-        # TODO: Evaluate parallelization
         self.log.info("Start Orbit Processing")
 
-        n_files = len(self._l1b_files)
+        # Orbits are independent at Level-2 and can be processed in parallel
+        # (requires the fork start method of multiprocessing, not available on windows)
+        use_pool = self.n_workers > 1 and self.n_files > 1
+        if use_pool and sys.platform.startswith("win"):
+            self.log.warning("Parallel orbit processing not supported on this platform -> serial processing")
+            use_pool = False
+
+        if use_pool:
+            self._l2_parallel_processing_of_orbit_files()
+            return
+
+        # Output files can be written in the background while processing the next orbit
+        self._start_output_writer()
 
         # loop over l1bdata preprocessed orbits
+        n_files = self.n_files
         for i, l1b_file in enumerate(self._l1b_files):
 
             # Log the current position in the file stack
             self.log.info("+ [ %g of %g ] (%.2f%%)" % (i+1, n_files, float(i+1)/float(n_files)*100.))
 
-            # Read the the level 1b file (l1bdata netCDF is required)
-            l1b = self._read_l1b_file(l1b_file)
-            source_primary_filename = os.path.split(l1b_file)[-1]
+            # Process the orbit
+            l2, error_codes, orbit_summary = self._l2_processing_of_orbit_file(l1b_file)
+            if l2 is None:
+                self._discard_l1b_procedure(error_codes, l1b_file)
+                continue
+
+            # Add data to orbit stack (or only the orbit summary in streaming mode)
+            self._add_orbit_summary(l1b_file, orbit_summary)
+            if not self.streaming:
+                self._add_to_orbit_collection(l2)
+
+            # Release the Level-2 data before reading the next orbit
+            del l2
+
+        # Wait for the output of the last orbit(s)
+        self._stop_output_writer()
 
-            # Apply the geophysical range corrections on the waveform range
-            # bins in the l1b data container
-            # TODO: move to level1bData class
+    def _l2_parallel_processing_of_orbit_files(self):
+        """ Orbit-wise level2 processing with a pool of worker processes """
+
+        global _L2PROC_WORKER_INSTANCE
+
+        n_workers = min(self.n_workers, self.n_files)
+        self.log.info("Parallel orbit processing with %g worker processes" % n_workers)
+
+        # The workers inherit the processor instance by forking
+        _L2PROC_WORKER_INSTANCE = self
+        pool = multiprocessing.Pool(processes=n_workers)
+        try:
+            # NOTE: imap returns the results in the order of the input files, therefore
+            #       the processor report is identical to the one of a serial run
+            # NOTE: Each worker processes a contiguous block of the (time-sorted) input files,
+            #       so that the auxiliary data of a day is read only once per worker
+            jobs = list(enumerate(self._l1b_files))
+            chunksize = int(np.ceil(float(len(jobs))/float(n_workers)))
+            for l1b_file, error_codes, orbit_summary, stage_timing in pool.imap(
+                    _l2proc_orbit_worker, jobs, chunksize=chunksize):
+                self.report.add_stage_timing(stage_timing)
+                if orbit_summary is None:
+                    self._discard_l1b_procedure(error_codes, l1b_file)
+                else:
+                    self._add_orbit_summary(l1b_file, orbit_summary)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            _L2PROC_WORKER_INSTANCE = None
+
+    def _l2_processing_of_orbit_file(self, l1b_file, l1b=None):
+        """
+        Level-2 processing chain of a single orbit file (from reading the l1p file to writing the output).
+        :param l1b_file: The l1p (l1bdata netCDF) input file
+        :param l1b: The Level-1 data object, if already in memory (the l1p file will not be read)
+        :return: the level-2 data object (None if the orbit was discarded), a list of error codes
+            and the orbit summary (None if the orbit was discarded)
+        """
+        self.report.current_l1b_file = l1b_file
+        with self.report.stage_timer("orbit_total") as orbit_timing:
+            l2, error_codes, output_files = self._l2_processing_chain(l1b_file, l1b=l1b)
+            if l2 is None:
+                return l2, error_codes, None
+            orbit_timing.n_records = l2.n_records
+        return l2, error_codes, self.report.get_orbit_summary(l1b_file, l2, output_files)
+
+    def _l2_processing_chain(self, l1b_file, l1b=None):
+        """
+        The individual stages of the Level-2 processing chain. The wall time and the number of
+        records of each stage is recorded in the processor report.
+        :param l1b_file: The l1p (l1bdata netCDF) input file
+        :param l1b: The Level-1 data object, if already in memory (the l1p file will not be read)
+        :return: the level-2 data object (None if the orbit was discarded), a list of error codes
+            and a list of (output filename, fingerprint) for each output handler
+        """
+
+        # Read the the level 1b file (l1bdata netCDF is required)
+        if l1b is None:
+            with self.report.stage_timer("l1p_read") as timing:
+                l1b = self._read_l1b_file(l1b_file)
+                timing.n_records = l1b.n_records
+        source_primary_filename = os.path.split(l1b_file)[-1]
+        n_records = l1b.n_records
+
+        # Apply the geophysical range corrections on the waveform range
+        # bins in the l1b data container
+        # TODO: move to level1bData class
+        with self.report.stage_timer("range_corrections", n_records):
             self._apply_range_corrections(l1b)
 
-            # Apply a pre-filter of the l1b data (can be none)
+        # Apply a pre-filter of the l1b data (can be none)
+        with self.report.stage_timer("l1b_prefilter", n_records):
             self._apply_l1b_prefilter(l1b)
 
-            # Initialize the orbit level-2 data container
-            # TODO: replace by proper product metadata transfer
-            try:
-                time_range = TimeRangeRequest(l1b.info.start_time, l1b.info.stop_time, period="custom")
-                period = time_range.iterations[0]
-            except SystemExit:
-                msg = "Computation of data period caused exception"
-                self.log.warning("[invalid-l1b]", msg)
-                continue
-            l2 = Level2Data(l1b.info, l1b.time_orbit, period=period)
-
-            # Transfer l1p parameter to the l2 data object (if applicable)
-            # NOTE: This is only necessary, if parameters from the l1p files (classifiers) should
-            #       be present in the l2i product
+        # Initialize the orbit level-2 data container
+        # TODO: replace by proper product metadata transfer
+        try:
+            time_range = TimeRangeRequest(l1b.info.start_time, l1b.info.stop_time, period="custom")
+            period = time_range.iterations[0]
+        except SystemExit:
+            msg = "Computation of data period caused exception"
+            self.log.warning("[invalid-l1b]", msg)
+            return None, ["l2proc_invalid_l1b"], []
+        l2 = Level2Data(l1b.info, l1b.time_orbit, period=period)
+
+        # Transfer l1p parameter to the l2 data object (if applicable)
+        # NOTE: This is only necessary, if parameters from the l1p files (classifiers) should
+        #       be present in the l2i product
+        with self.report.stage_timer("l1p_transfer", n_records):
             self._transfer_l1p_vars(l1b, l2)
 
-            # Get auxiliary data from all registered auxdata handlers
+        # Get auxiliary data from all registered auxdata handlers
+        with self.report.stage_timer("auxdata", n_records):
             error_status, error_codes = self._get_auxiliary_data(l2)
-            if True in error_status:
-                self._discard_l1b_procedure(error_codes, l1b_file)
-                continue
+        if True in error_status:
+            return None, error_codes, []
 
-            # Surface type classification (ocean, ice, lead, ...)
-            # (ice type classification comes later)
+        # Surface type classification (ocean, ice, lead, ...)
+        # (ice type classification comes later)
+        with self.report.stage_timer("surface_type", n_records):
             self._classify_surface_types(l1b, l2)
 
-            # Validate surface type classification
-            # yes/no decision on continuing with orbit
+        # Validate surface type classification
+        # yes/no decision on continuing with orbit
+        with self.report.stage_timer("surface_type_validation", n_records):
             error_status, error_codes = self._validate_surface_types(l2)
-            if error_status:
-                self._discard_l1b_procedure(error_codes, l1b_file)
-                continue
-
-            # Get elevation by retracking of different surface types
-            # adds parameter elevation to l2
-            error_status, error_codes = self._waveform_retracking(l1b, l2)
-            if error_status:
-                self._discard_l1b_procedure(error_codes, l1b_file)
-                continue
-
-            # Compute the sea surface anomaly (from mss and lead tie points)
-            # adds parameter ssh, ssa, afrb to l2
+        if error_status:
+            return None, error_codes, []
+
+        # Get elevation by retracking of different surface types
+        # adds parameter elevation to l2
+        # NOTE: The retracking is timed per surface type
+        error_status, error_codes = self._waveform_retracking(l1b, l2)
+        if error_status:
+            return None, error_codes, []
+
+        # Compute the sea surface anomaly (from mss and lead tie points)
+        # adds parameter ssh, ssa, afrb to l2
+        with self.report.stage_timer("ssh", n_records):
             self._estimate_sea_surface_height(l2)
 
-            # Compute the radar freeboard and its uncertainty
+        # Compute the radar freeboard and its uncertainty
+        with self.report.stage_timer("afrb", n_records):
             self._get_altimeter_freeboard(l1b, l2)
 
-            # get radar(-derived) from altimeter freeboard
+        # get radar(-derived) from altimeter freeboard
+        with self.report.stage_timer("frb", n_records):
             self._get_freeboard_from_radar_freeboard(l1b, l2)
 
-            # Apply freeboard filter
+        # Apply freeboard filter
+        with self.report.stage_timer("freeboard_filter", n_records):
             self._apply_freeboard_filter(l2)
 
-            # Convert to thickness
+        # Convert to thickness
+        with self.report.stage_timer("sit", n_records):
             self._convert_freeboard_to_thickness(l2)
 
-            # Filter thickness
+        # Filter thickness
+        with self.report.stage_timer("thickness_filter", n_records):
             self._apply_thickness_filter(l2)
 
-            # Post processing
+        # Post processing
+        with self.report.stage_timer("post_processing", n_records):
             self._post_processing_items(l2)
 
-            # Create output files
+        # Create output files
+        with self.report.stage_timer("output", n_records):
             l2.set_metadata(auxdata_source_dict=self.l2_auxdata_source_dict,
                             source_primary_filename=source_primary_filename,
                             l2_algorithm_id=self.l2def.id,
                             l2_version_tag=self.l2def.version_tag)
-            self._create_l2_outputs(l2)
+            output_files = self._create_l2_outputs(l2, l1b_file)
 
-            # Add data to orbit stack
-            self._add_to_orbit_collection(l2)
+        return l2, [], output_files
 
     def _read_l1b_file(self, l1b_file):
         """ Read a L1b data file (l1bdata netCDF) """
@@ -334,54 +604,34 @@ class Level2Processor(DefaultLoggingClass):
     def _apply_range_corrections(self, l1b):
         """ Apply the range corrections """
         # XXX: This should be applied to the L2 data not l1b
-        for correction in self.l2def.corrections:
+        for correction in self.plan.corrections:
             l1b.apply_range_correction(correction)
 
     def _apply_l1b_prefilter(self, l1b):
         """ Apply filtering of l1b variables """
-        # Backward compatibility with older l2 setting files
-        if "l1b_pre_filtering" not in self.l2def:
-            return
-        # Apply filters
-        names, filters = td_branches(self.l2def.l1b_pre_filtering)
-        for name, filter_def in zip(names, filters):
-            self.log.info("- Apply l1b pre-filter: %s" % filter_def.pyclass)
-            l1bfilter = get_filter(filter_def.pyclass)
-            l1bfilter.set_options(**filter_def.options)
+        for pyclass, l1bfilter in self.plan.l1b_prefilters:
+            self.log.info("- Apply l1b pre-filter: %s" % pyclass)
             l1bfilter.apply_filter(l1b)
 
     def _transfer_l1p_vars(self, l1b, l2):
         """ Transfer variables from l1p to l2 object"""
 
-        # Make this a backward compatible feature (should work without tag in l2 processor definition file)
-        if not "transfer_from_l1p" in self.l2def:
-            return
+        # NOTE: This is a backward compatible feature (the list of variables is empty
+        #       without tag in l2 processor definition file)
+        for data_group, var_name, aux_id, aux_name in self.plan.transfer_from_l1p:
 
-        # Don't spam the log
-        try:
-            verbose = self.l2def.transfer_from_l1p.options.get("verbose")
-        except:
-            verbose = False
-
-        # Get and loop over data groups
-        data_groups, vardefs = td_branches(self.l2def.transfer_from_l1p)
-        for data_group, varlist in zip(data_groups, vardefs):
+            # Get variable via standard getter method
+            # NOTE: Will return None if not found -> create an empty array
+            var = l1b.get_parameter_by_name(data_group, var_name)
+            if var is None:
+                var = np.full((l2.n_records), np.nan)
 
-            # Get and loop over variables per data group
-            var_names, vardefs = td_branches(varlist)
-            for var_name, vardef in zip(var_names, vardefs):
+            # Add variable to l2 object as auxiliary variable
+            l2.set_auxiliary_parameter(aux_id, aux_name, var, None)
 
-                # Get variable via standard getter method
-                # NOTE: Will return None if not found -> create an empty array
-                var = l1b.get_parameter_by_name(data_group, var_name)
-                if var is None:
-                    var = np.full((l2.n_records), np.nan)
-
-                # Add variable to l2 object as auxiliary variable
-                l2.set_auxiliary_parameter(vardef.aux_id, vardef.aux_name, var, None)
-
-                if verbose:
-                    self.log.info("- Transfered l1p variable: %s.%s" % (data_group, var_name))
+            # Don't spam the log
+            if self.plan.transfer_from_l1p_verbose:
+                self.log.info("- Transfered l1p variable: %s.%s" % (data_group, var_name))
 
     def _get_auxiliary_data(self, l2):
         """ Transfer along-track data from all registered auxdata handler to the l2 data object """
@@ -425,22 +675,17 @@ class Level2Processor(DefaultLoggingClass):
 
     def _classify_surface_types(self, l1b, l2):
         """ Run the surface type classification """
-        pyclass = self.l2def.surface_type.pyclass
-        surface_type = get_surface_type_class(pyclass)
-        surface_type.set_options(**self.l2def.surface_type.options)
+        surface_type = self.plan.surface_type
+        surface_type.reset()
         surface_type.classify(l1b, l2)
         l2.set_surface_type(surface_type.result)
 
     def _validate_surface_types(self, l2):
         """ Loop over stack of surface type validators """
-        surface_type_validators = self.l2def.validator.surface_type
-        names, validators = td_branches(surface_type_validators)
         error_codes = ["l2proc_surface_type_discarded"]
         error_states = []
         error_messages = []
-        for name, validator_def in zip(names, validators):
-            validator = get_validator(validator_def.pyclass)
-            validator.set_options(**validator_def.options)
+        for pyclass, validator in self.plan.surface_type_validators:
             state, message = validator.validate(l2)
             error_states.append(state)
             error_messages.append(message)
@@ -452,9 +697,7 @@ class Level2Processor(DefaultLoggingClass):
     def _waveform_retracking(self, l1b, l2):
         """ Retracking: Obtain surface elevation from l1b waveforms """
         # loop over retrackers for each surface type
-        surface_types, retracker_def = td_branches(self.l2def.retracker)
-
-        for i, surface_type in enumerate(surface_types):
+        for surface_type, pyclass, retracker in self.plan.retrackers:
 
             # Check if any waveforms need to be retracked for given
             # surface type
@@ -465,37 +708,30 @@ class Level2Processor(DefaultLoggingClass):
 
             # Benchmark retracker performance
             # XXX: is currently the bottleneck of level2 processing
-            timestamp = time.time()
+            stage = "retracking:%s" % surface_type
+            with self.report.stage_timer(stage, surface_type_flag.num) as timing:
 
-            # Retrieve the retracker assiciated with surface type
-            # from the l2 settings
-            retracker = get_retracker_class(retracker_def[i].pyclass)
+                # set subset of waveforms
+                retracker.set_indices(surface_type_flag.indices)
 
-            # Set options (if any)
-            if retracker_def[i].options is not None:
-                retracker.set_options(**retracker_def[i].options)
+                # Add classifier data (some retracker need that)
+                retracker.set_classifier(l1b.classifier)
 
-            # set subset of waveforms
-            retracker.set_indices(surface_type_flag.indices)
+                # Start the retracking
+                retracker.retrack(l1b, l2)
 
-            # Add classifier data (some retracker need that)
-            retracker.set_classifier(l1b.classifier)
+                # Retrieve the range after retracking
+                l2.update_retracked_range(retracker)
 
-            # Start the retracking
-            retracker.retrack(l1b, l2)
+                # XXX: Let the retracker return other parameters?
+                l2.set_radar_mode(l1b.waveform.radar_mode)
 
-            # Retrieve the range after retracking
-            l2.update_retracked_range(retracker)
+                # retrieve potential error status and update surface type flag
+                if retracker.error_flag.num > 0:
+                    l2.surface_type.add_flag(retracker.error_flag.flag, "invalid")
 
-            # XXX: Let the retracker return other parameters?
-            l2.set_radar_mode(l1b.waveform.radar_mode)
-
-            # retrieve potential error status and update surface type flag
-            if retracker.error_flag.num > 0:
-                l2.surface_type.add_flag(retracker.error_flag.flag, "invalid")
             self.log.info("- Retrack class %s with %s in %.3f seconds" % (
-                surface_type, retracker_def[i].pyclass,
-                time.time()-timestamp))
+                surface_type, pyclass, timing.seconds))
 
         # Error handling not yet implemented, return dummy values
         return False, None
@@ -503,8 +739,8 @@ class Level2Processor(DefaultLoggingClass):
     def _estimate_sea_surface_height(self, l2):
 
         # 2. get get sea surface anomaly
-        ssa = get_l2_ssh_class(self.l2def.ssa.pyclass)
-        ssa.set_options(**self.l2def.ssa.options)
+        ssa = self.plan.ssa
+        ssa.error.reset()
         ssa.interpolate(l2)
 
         # dedicated setters, else the uncertainty, bias attributes are broken
@@ -514,8 +750,8 @@ class Level2Processor(DefaultLoggingClass):
     def _get_altimeter_freeboard(self, l1b, l2):
         """ Compute radar freeboard and its uncertainty """
 
-        afrbalg = get_frb_algorithm(self.l2def.afrb.pyclass)
-        afrbalg.set_options(**self.l2def.rfrb.options)
+        afrbalg = self.plan.afrb
+        afrbalg.error.reset()
         afrb, afrb_unc = afrbalg.get_radar_freeboard(l1b, l2)
 
         # Check and return error status and codes
@@ -540,8 +776,8 @@ class Level2Processor(DefaultLoggingClass):
     def _get_freeboard_from_radar_freeboard(self, l1b, l2):
         """ Convert the altimeter freeboard in radar freeboard """
 
-        frbgeocorr = get_frb_algorithm(self.l2def.frb.pyclass)
-        frbgeocorr.set_options(**self.l2def.frb.options)
+        frbgeocorr = self.plan.frb
+        frbgeocorr.error.reset()
         frb, frb_unc = frbgeocorr.get_freeboard(l1b, l2)
 
         # Check and return error status and codes (e.g. missing file)
@@ -570,19 +806,11 @@ class Level2Processor(DefaultLoggingClass):
         - setting the surface type classification to invalid
         """
 
-        # Extract filters from settings structure
-        freeboard_filters = self.l2def.filter.freeboard
-        names, filters = td_branches(freeboard_filters)
-
         # Loop over freeboard filters
-        for name, filter_def in zip(names, filters):
-
-            # Get corresponding class name in pysiral.filter and transfer options
-            # XXX: This should be rewritten as (e.g.)
-            #   `frbfilter = VariableFilter(filter_def.pyclass, **filter_def.options)`
-            frbfilter = get_filter(filter_def.pyclass)
-            frbfilter.set_options(**filter_def.options)
+        for pyclass, frbfilter, filter_target in self.plan.freeboard_filters:
 
+            # NOTE: The filter target is retrieved in the processing plan
+            #
             # XXX: This is a temporary fix of an error in the algorithm
             #
             # Explanation: The filter target was wrongly set to radar freeboard,
@@ -595,9 +823,6 @@ class Level2Processor(DefaultLoggingClass):
             # The `afrb` filter target was hard coded, thus an option is added to replace
             # the filter target (`root.filter.freeboard.frb_valid_range.filter_target`).
             # The default option is the wrong one only for consistency reasons.
-            filter_target = "afrb"
-            if filter_def.options.has_key("filter_target"):
-                filter_target = filter_def.options.filter_target
 
             # Check if action is required
             frbfilter.apply_filter(l2, filter_target)
@@ -606,7 +831,7 @@ class Level2Processor(DefaultLoggingClass):
 
             # Logging
             self.log.info("- Filter message: %s has flagged %g waveforms" % (
-                filter_def.pyclass, frbfilter.flag.num))
+                pyclass, frbfilter.flag.num))
 
             # Set surface type flag (contains invalid)
             l2.surface_type.add_flag(frbfilter.flag.flag, "invalid")
@@ -621,8 +846,8 @@ class Level2Processor(DefaultLoggingClass):
               (usually in the l2 settings)
         """
 
-        frb2sit = get_sit_algorithm(self.l2def.sit.pyclass)
-        frb2sit.set_options(**self.l2def.sit.options)
+        frb2sit = self.plan.sit
+        frb2sit.error.reset()
 
         sit, sit_unc, ice_dens, ice_dens_unc = frb2sit.get_thickness(l2)
 
@@ -637,16 +862,12 @@ class Level2Processor(DefaultLoggingClass):
             l2.set_auxiliary_parameter("idens", "sea_ice_density", ice_dens, ice_dens_unc)
 
     def _apply_thickness_filter(self, l2):
-        thickness_filters = self.l2def.filter.thickness
-        names, filters = td_branches(thickness_filters)
-        for name, filter_def in zip(names, filters):
-            sitfilter = get_filter(filter_def.pyclass)
-            sitfilter.set_options(**filter_def.options)
+        for pyclass, sitfilter in self.plan.thickness_filters:
             sitfilter.apply_filter(l2, "sit")
             if sitfilter.flag.num == 0:
                 continue
             self.log.info("- Filter message: %s has flagged %g waveforms" % (
-                filter_def.pyclass, sitfilter.flag.num))
+                pyclass, sitfilter.flag.num))
             # Set surface type flag (contains invalid)
             l2.surface_type.add_flag(sitfilter.flag.flag, "invalid")
             # Remove invalid thickness values
@@ -658,28 +879,78 @@ class Level2Processor(DefaultLoggingClass):
         :param l2:
         :return:
         """
-        # Get the post processing options
-        post_processing_items = self._l2def.get("post_processing", None)
-        if post_processing_items is None:
+        # Get the post processing items
+        if len(self.plan.post_processors) == 0:
             self.log.info("No post-processing items defined")
             return
 
-        # Get the list of post-processing items
-        for pp_item in post_processing_items:
-            pp_class = get_cls(pp_item["module_name"], pp_item["class_name"], relaxed=False)
-            post_processor = pp_class(**pp_item["options"])
+        # Apply the list of post-processing items
+        for label, post_processor in self.plan.post_processors:
             post_processor.apply(l2)
-            msg = "- Level-2 post-processing item `%s` applied" % (pp_item["label"])
+            msg = "- Level-2 post-processing item `%s` applied" % label
             self.log.info(msg)
 
-    def _create_l2_outputs(self, l2):
+    def _create_l2_outputs(self, l2, l1b_file):
+        """ Write the output files for all output handlers, returns a list of
+        (output filename, processing fingerprint) or None if the output files are
+        written in the background """
+        if self._output_writer is not None:
+            self._output_writer.submit(l1b_file, self._write_l2_outputs, l2, l1b_file)
+            return None
+        return self._write_l2_outputs(l2, l1b_file)
+
+    def _write_l2_outputs(self, l2, l1b_file):
+        """ Write the output files for all output handlers, returns a list of
+        (output filename, processing fingerprint) """
+        output_files = []
         for output_handler in self._output_handler:
-            output = Level2Output(l2, output_handler)
+            fingerprint = self._fingerprint.get(l1b_file, output_handler)
+            output = Level2Output(l2, output_handler, l2proc_fingerprint=fingerprint)
             self.log.info("- Write %s data file: %s" % (output_handler.id, output.export_filename))
+            output_files.append((output.path, fingerprint))
+        return output_files
+
+    def _add_orbit_summary(self, l1b_file, orbit_summary):
+        """ Add the orbit summary to the report and record the output files in the manifests """
+
+        # The output files are not yet written -> wait for the background writer
+        if orbit_summary["output_files"] is None:
+            self._pending_orbit_summaries[l1b_file] = orbit_summary
+            self._collect_output_jobs(self._output_writer.get_completed())
+            return
+
+        self.report.add_orbit_summary(orbit_summary)
+        for manifest, (output_file, fingerprint) in zip(self._output_manifests, orbit_summary["output_files"]):
+            manifest.add(l1b_file, output_file, fingerprint)
 
     def _add_to_orbit_collection(self, l2):
         self._orbit.append(l2)
 
+    def _start_output_writer(self):
+        """ Start the background writer for asynchronous output (if applicable) """
+        if self.async_output and self._output_writer is None:
+            self._output_writer = BackgroundOutputWriter()
+
+    def _stop_output_writer(self):
+        """ Wait for all output jobs of the background writer and stop the writer """
+        if self._output_writer is None:
+            return
+        completed = self._output_writer.close()
+        self._output_writer = None
+        self._collect_output_jobs(completed)
+
+    def _collect_output_jobs(self, completed):
+        """ Add orbits with finished output jobs to the report and the manifests """
+        for l1b_file, output_files, error, seconds in completed:
+            orbit_summary = self._pending_orbit_summaries.pop(l1b_file)
+            self.report.add_stage_timing([(l1b_file, "output_write", seconds, orbit_summary["n_records"])])
+            if error is not None:
+                self.log.error("! Failed to write output for %s:\n%s" % (filename_from_path(l1b_file), error))
+                self.report.add_orbit_discarded_event("l2proc_output_error", l1b_file)
+                continue
+            orbit_summary["output_files"] = [list(output_file) for output_file in output_files]
+            self._add_orbit_summary(l1b_file, orbit_summary)
+
 
 class Level2ProductDefinition(DefaultLoggingClass):
     """ Main configuration class for the Level-2 Processor """
@@ -727,6 +998,254 @@ class Level2ProductDefinition(DefaultLoggingClass):
         return self._output_handler
 
 
+class Level2ProcessingPlan(object):
+    """
+    The Level-2 processing definition compiled into the sequence of algorithm objects.
+
+    All algorithm classes are retrieved and their options are set once when the plan
+    is created. The algorithm instances are then applied to each orbit, therefore
+    all per-orbit results must be (re)set by the algorithm classes at each call.
+    The plan cannot be changed after it has been compiled.
+    """
+
+    def __init__(self, l2def):
+
+        # Geophysical range corrections
+        self.corrections = tuple(l2def.corrections)
+
+        # l1p parameter to be transferred to the l2 data object
+        # (backward compatible feature: can be missing in the l2 settings file)
+        self.transfer_from_l1p = ()
+        self.transfer_from_l1p_verbose = False
+        if "transfer_from_l1p" in l2def:
+            self.transfer_from_l1p = tuple(self._compile_transfer_from_l1p(l2def.transfer_from_l1p))
+            try:
+                self.transfer_from_l1p_verbose = bool(l2def.transfer_from_l1p.options.get("verbose"))
+            except:
+                pass
+
+        # l1b pre-filter (backward compatibility with older l2 setting files)
+        self.l1b_prefilters = ()
+        if "l1b_pre_filtering" in l2def:
+            self.l1b_prefilters = tuple(self._compile_filters(l2def.l1b_pre_filtering))
+
+        # Surface type classification and validation
+        self.surface_type = self._get_algorithm(get_surface_type_class, l2def.surface_type)
+        self.surface_type_validators = tuple(
+            (validator_def.pyclass, self._get_algorithm(get_validator, validator_def))
+            for name, validator_def in zip(*td_branches(l2def.validator.surface_type)))
+
+        # Retracker for each surface type
+        # NOTE: The retracker options are optional
+        retrackers = []
+        for surface_type, retracker_def in zip(*td_branches(l2def.retracker)):
+            retracker = get_retracker_class(retracker_def.pyclass)
+            if retracker_def.options is not None:
+                retracker.set_options(**retracker_def.options)
+            retrackers.append((surface_type, retracker_def.pyclass, retracker))
+        self.retrackers = tuple(retrackers)
+
+        # Sea surface anomaly, freeboard and thickness algorithms
+        # NOTE: The altimeter freeboard algorithm uses the options of `root.rfrb`
+        self.ssa = self._get_algorithm(get_l2_ssh_class, l2def.ssa)
+        self.afrb = self._get_algorithm(get_frb_algorithm, l2def.afrb, l2def.rfrb.options)
+        self.frb = self._get_algorithm(get_frb_algorithm, l2def.frb)
+        self.sit = self._get_algorithm(get_sit_algorithm, l2def.sit)
+
+        # Freeboard filter (with filter target, see Level2Processor._apply_freeboard_filter)
+        freeboard_filters = []
+        for pyclass, frbfilter in self._compile_filters(l2def.filter.freeboard):
+            filter_target = "afrb"
+            if frbfilter.options.has_key("filter_target"):
+                filter_target = frbfilter.options.filter_target
+            freeboard_filters.append((pyclass, frbfilter, filter_target))
+        self.freeboard_filters = tuple(freeboard_filters)
+        self.thickness_filters = tuple(self._compile_filters(l2def.filter.thickness))
+
+        # Post-processing items (optional)
+        post_processors = []
+        for pp_item in l2def.get("post_processing", None) or []:
+            pp_class = get_cls(pp_item["module_name"], pp_item["class_name"], relaxed=False)
+            post_processors.append((pp_item["label"], pp_class(**pp_item["options"])))
+        self.post_processors = tuple(post_processors)
+
+        # No changes after compilation
+        self._is_compiled = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_is_compiled", False):
+            raise AttributeError("Level-2 processing plan cannot be changed after compilation")
+        super(Level2ProcessingPlan, self).__setattr__(name, value)
+
+    @staticmethod
+    def _get_algorithm(get_class_func, algorithm_def, options=None):
+        """ Returns the instance of an algorithm class with options """
+        algorithm = get_class_func(algorithm_def.pyclass)
+        if options is None:
+            options = algorithm_def.options
+        algorithm.set_options(**options)
+        return algorithm
+
+    @classmethod
+    def _compile_filters(cls, filter_defs):
+        """ Returns a list of (pyclass, filter instance) """
+        names, filters = td_branches(filter_defs)
+        return [(filter_def.pyclass, cls._get_algorithm(get_filter, filter_def)) for filter_def in filters]
+
+    @staticmethod
+    def _compile_transfer_from_l1p(transfer_def):
+        """ Returns a list of (data_group, var_name, aux_id, aux_name) """
+        variables = []
+        data_groups, varlists = td_branches(transfer_def)
+        for data_group, varlist in zip(data_groups, varlists):
+            var_names, vardefs = td_branches(varlist)
+            for var_name, vardef in zip(var_names, vardefs):
+                variables.append((data_group, var_name, vardef.aux_id, vardef.aux_name))
+        return variables
+
+
+class Level2ProcessingFingerprint(object):
+    """
+    Fingerprint of the Level-2 processing of a l1p file for a given output definition.
+    The fingerprint (sha1 hex digest) depends on:
+
+        - the l1p input file (filename, size and modification time if the file exists)
+        - the Level-2 settings
+        - the configuration of the auxiliary data handlers (source, files, options)
+        - the pysiral version
+        - the output definition
+
+    NOTE: The content of the l1p and auxiliary data files is not part of the fingerprint
+          (computing a hash of the full content would require to read all files)
+    """
+
+    def __init__(self, l2def, auxhandlers):
+        auxdata = [[auxhandler.pyclass, auxhandler.cfg.long_name, auxhandler.cfg.local_repository,
+                    auxhandler.cfg.filename, auxhandler.cfg.filenaming, auxhandler.cfg.subfolders,
+                    self._get_dict(auxhandler.cfg.options)] for auxhandler in auxhandlers]
+        self._settings_digest = self._get_digest([PYSIRAL_VERSION, self._get_dict(l2def), auxdata])
+        self._output_def_digests = {}
+
+    def get(self, l1b_file, output_handler):
+        """
+        Returns the fingerprint for a l1p file and an output handler
+        :param l1b_file: The l1p (l1bdata netCDF) input file
+        :param output_handler: The Level-2 output handler
+        :return: fingerprint (str)
+        """
+        # NOTE: The l1p file may not exist if the Level-1 data is passed in memory
+        l1b_id = [filename_from_path(l1b_file)]
+        if os.path.isfile(l1b_file):
+            file_stat = os.stat(l1b_file)
+            l1b_id.extend([file_stat.st_size, int(file_stat.st_mtime)])
+        return self._get_digest([self._settings_digest, l1b_id, self._get_output_def_digest(output_handler)])
+
+    def _get_output_def_digest(self, output_handler):
+        """ The digest of the output definition (cached per output handler) """
+        key = id(output_handler)
+        if key not in self._output_def_digests:
+            self._output_def_digests[key] = self._get_digest(self._get_dict(output_handler.output_def))
+        return self._output_def_digests[key]
+
+    @staticmethod
+    def _get_dict(tree):
+        """ Convert a TreeDict into a (json serializable) dictionary """
+        if tree is None:
+            return None
+        return tree.convertTo("nested_dict")
+
+    @staticmethod
+    def _get_digest(content):
+        content_str = json.dumps(content, sort_keys=True, default=str)
+        return hashlib.sha1(content_str).hexdigest()
+
+
+class Level2OutputManifest(DefaultLoggingClass):
+    """
+    Record of the Level-2 output files and their processing fingerprint for each l1p
+    input file in an output directory. The manifest is a text file with one json record
+    per processed l1p file that is updated after each orbit (later records of the same
+    l1p file supersede earlier ones, incomplete records are ignored). The file is
+    rewritten with only the latest record of each l1p file at the end of a processor run.
+    """
+
+    manifest_filename = "pysiral-l2proc-manifest.jsonl"
+
+    def __init__(self, directory):
+        super(Level2OutputManifest, self).__init__(self.__class__.__name__)
+        self.filename = os.path.join(directory, self.manifest_filename)
+        self._records = OrderedDict([])
+        self._read()
+
+    def add(self, l1b_file, output_file, fingerprint):
+        """ Add the output file of a l1p file and its processing fingerprint """
+        record = OrderedDict([("l1b_file", filename_from_path(l1b_file)),
+                              ("output_file", output_file),
+                              ("fingerprint", fingerprint)])
+        self._records[record["l1b_file"]] = record
+        with open(self.filename, "a") as fhandle:
+            fhandle.write(json.dumps(record)+"\n")
+
+    def is_up_to_date(self, l1b_file, fingerprint):
+        """
+        Test if the output file for a l1p file exists and has been processed with
+        the same fingerprint (both in the manifest and in the output file)
+        :param l1b_file: The l1p (l1bdata netCDF) input file
+        :param fingerprint: The current processing fingerprint
+        :return: bool
+        """
+        record = self._records.get(filename_from_path(l1b_file), None)
+        if record is None or record["fingerprint"] != fingerprint:
+            return False
+        if not os.path.isfile(record["output_file"]):
+            return False
+        return self.get_file_fingerprint(record["output_file"]) == fingerprint
+
+    def compact(self):
+        """ Rewrite the manifest file with the latest record of each l1p file (the file is
+        read again to include the records of other processor runs in the same directory) """
+        self._records = OrderedDict([])
+        self._read()
+        if self.n_records == 0:
+            return
+        temp_filename = self.filename + ".tmp"
+        with open(temp_filename, "w") as fhandle:
+            for l1b_file in sorted(self._records.keys()):
+                fhandle.write(json.dumps(self._records[l1b_file])+"\n")
+        os.rename(temp_filename, self.filename)
+
+    @staticmethod
+    def get_file_fingerprint(filename):
+        """ Returns the processing fingerprint of a Level-2 output file
+        (None if not available or file cannot be read) """
+        with NETCDF_IO_LOCK:
+            try:
+                nc = Dataset(filename)
+            except (RuntimeError, IOError):
+                return None
+            try:
+                return nc.getncattr(L2PROC_FINGERPRINT_ATTRIBUTE)
+            except AttributeError:
+                return None
+            finally:
+                nc.close()
+
+    def _read(self):
+        if not os.path.isfile(self.filename):
+            return
+        with open(self.filename, "r") as fhandle:
+            for line in fhandle:
+                try:
+                    record = json.loads(line, object_pairs_hook=OrderedDict)
+                except ValueError:
+                    continue
+                self._records[record["l1b_file"]] = record
+
+    @property
+    def n_records(self):
+        return len(self._records)
+
+
 class L2ProcessorReport(DefaultLoggingClass):
 
     def __init__(self):
@@ -735,6 +1254,7 @@ class L2ProcessorReport(DefaultLoggingClass):
 
         self.n_files = 0
         self.data_period = None
+        self.time_range = None
         self.l2_settings_file = "none"
         self.l1b_repository = "none"
 
@@ -746,6 +1266,12 @@ class L2ProcessorReport(DefaultLoggingClass):
         #      in future updates
         self._init_error_counters()
 
+        # Wall time and number of records for each stage of the orbit processing chain
+        self._init_stage_timing()
+
+        # Compact summary of each processed orbit
+        self._init_orbit_summaries()
+
     def add_orbit_discarded_event(self, error_code, l1b_file):
         """ Add the l1b file to the list of files with a certain error code """
 
@@ -755,6 +1281,123 @@ class L2ProcessorReport(DefaultLoggingClass):
         except:
             self.log.warning("Unknown error code (%s), ignoring" % error_code)
 
+    @staticmethod
+    def get_orbit_summary(l1b_file, l2, output_files):
+        """
+        Returns a compact summary of a Level-2 data object that can be kept in memory for all
+        orbits of a processor run (or returned from orbit worker processes)
+        :param l1b_file: The l1p input file of the orbit
+        :param l2: The Level-2 data object
+        :param output_files: list of (output filename, fingerprint) for all output handlers
+        :return: OrderedDict with summary parameters
+        """
+        return OrderedDict([
+            ("output_files", None if output_files is None else [list(output_file) for output_file in output_files]),
+            ("l1b_file", filename_from_path(l1b_file)),
+            ("start_time", l2.info.start_time.isoformat()),
+            ("stop_time", l2.info.stop_time.isoformat()),
+            ("n_records", int(l2.n_records)),
+            ("n_valid_frb", int(np.sum(np.isfinite(l2.frb)))),
+            ("n_valid_sit", int(np.sum(np.isfinite(l2.sit))))])
+
+    def add_orbit_summary(self, orbit_summary):
+        """ Add the summary of a processed orbit (see `get_orbit_summary`) """
+        self.orbit_summaries.append(orbit_summary)
+
+    def add_orbit_skipped_event(self, l1b_file):
+        """ Add a l1b file that has not been processed, because up-to-date output exists """
+        self.skipped_files.append(l1b_file)
+
+    @contextmanager
+    def stage_timer(self, stage, n_records=0):
+        """
+        Context manager that records the wall time of a stage of the Level-2 orbit
+        processing chain (the stage is also recorded if an exception is raised). Usage:
+
+            with report.stage_timer("retracking:lead", n_records) as timing:
+                ...
+
+        The number of records can be updated within the context (`timing.n_records`)
+        :param stage: (str) name of the processing stage
+        :param n_records: (int) number of records processed in this stage
+        :return: L2StageTiming instance
+        """
+        timing = L2StageTiming(stage, self.current_l1b_file, n_records=n_records)
+        t0 = time.time()
+        try:
+            yield timing
+        finally:
+            timing.seconds = time.time()-t0
+            self.stage_timing.append(timing.as_tuple())
+
+    def add_stage_timing(self, stage_timing):
+        """ Add a list of stage timing records (l1b_file, stage, seconds, n_records),
+        e.g. from orbit worker processes """
+        self.stage_timing.extend(stage_timing)
+
+    def get_stage_summary(self):
+        """
+        Returns the summary statistics of wall time and throughput for each stage
+        (in order of first appearance)
+        :return: OrderedDict with stage names as keys
+        """
+        stage_seconds, stage_records = OrderedDict([]), OrderedDict([])
+        for l1b_file, stage, seconds, n_records in self.stage_timing:
+            stage_seconds.setdefault(stage, []).append(seconds)
+            stage_records.setdefault(stage, []).append(n_records)
+
+        summary = OrderedDict([])
+        for stage in stage_seconds.keys():
+            seconds = np.array(stage_seconds[stage])
+            n_records = int(np.sum(stage_records[stage]))
+            total_seconds = float(np.sum(seconds))
+            records_per_second = n_records/total_seconds if total_seconds > 0.0 else None
+            summary[stage] = OrderedDict([
+                ("n_calls", len(seconds)),
+                ("n_records", n_records),
+                ("total_seconds", total_seconds),
+                ("mean_seconds", float(np.mean(seconds))),
+                ("min_seconds", float(np.amin(seconds))),
+                ("max_seconds", float(np.amax(seconds))),
+                ("records_per_second", records_per_second)])
+        return summary
+
+    def log_stage_summary(self):
+        """ Write the wall time summary per stage to the log """
+        summary = self.get_stage_summary()
+        if len(summary) == 0:
+            return
+        self.log.info("Processing time per stage (run wall time: %.1f seconds):" % self.run_seconds)
+        for stage, stats in summary.items():
+            self.log.info("- %-28s %10.3f seconds (%g calls, %g records)" % (
+                stage, stats["total_seconds"], stats["n_calls"], stats["n_records"]))
+
+    def write_stage_timing_to_file(self, directory):
+        """ Export the stage summary and the timing records of all orbits to a
+        json file in the export directory """
+
+        filename = os.path.join(directory, "pysiral-l2proc-timing.json")
+        self.log.info("Exporting stage timing report: %s" % filename)
+
+        records = [OrderedDict([("l1b_file", filename_from_path(l1b_file)), ("stage", stage),
+                                ("seconds", seconds), ("n_records", n_records)])
+                   for l1b_file, stage, seconds, n_records in self.stage_timing]
+        content = OrderedDict([
+            ("created", str(datetime.now()).split(".")[0]),
+            ("pysiral_version", PYSIRAL_VERSION),
+            ("hostname", HOSTNAME),
+            ("l2_settings_file", self.l2_settings_file),
+            ("data_period", self.data_period_str),
+            ("n_files", self.n_files),
+            ("run_seconds", self.run_seconds),
+            ("n_orbits", self.n_orbits),
+            ("n_skipped", len(self.skipped_files)),
+            ("stages", self.get_stage_summary()),
+            ("orbits", self.orbit_summaries),
+            ("records", records)])
+        with open(filename, "w") as fhandle:
+            json.dump(content, fhandle, indent=2)
+
     def write_to_file(self, output_id, directory):
         """ Write a summary file to the defined export directory """
 
@@ -773,6 +1416,9 @@ class L2ProcessorReport(DefaultLoggingClass):
             # Brief statistics of files, errors, warnings
             fhandle.write("\n# Processor Statistics\n\n")
             fhandle.write(lfmt % ("l1b files", str(self.n_files)))
+            fhandle.write(lfmt % ("l2 orbits", str(self.n_orbits)))
+            fhandle.write(lfmt % ("l2 records", str(self.n_l2_records)))
+            fhandle.write(lfmt % ("skipped", "%g (output up to date)" % len(self.skipped_files)))
             fhandle.write(lfmt % ("errors", str(self.n_discarded_files)))
             fhandle.write(lfmt % ("warnings", str(self.n_warnings)))
 
@@ -786,6 +1432,19 @@ class L2ProcessorReport(DefaultLoggingClass):
             fhandle.write(lfmt % ("Level-2 settings", self.l2_settings_file))
             fhandle.write(lfmt % ("l1b repository", self.l1b_repository))
 
+            # Wall time and throughput for each stage of the processing chain
+            fhandle.write("\n# Processing Time per Stage\n\n")
+            fhandle.write(lfmt % ("run wall time", "%.1f seconds" % self.run_seconds))
+            sfmt = "  %-28s %8s %10s %12s %10s %10s %12s\n"
+            fhandle.write(sfmt % ("stage", "calls", "records", "total [s]", "mean [s]",
+                                  "max [s]", "records/s"))
+            for stage, stats in self.get_stage_summary().items():
+                records_per_second = stats["records_per_second"]
+                records_per_second = "n/a" if records_per_second is None else "%.1f" % records_per_second
+                fhandle.write(sfmt % (
+                    stage, str(stats["n_calls"]), str(stats["n_records"]), "%.3f" % stats["total_seconds"],
+                    "%.3f" % stats["mean_seconds"], "%.3f" % stats["max_seconds"], records_per_second))
+
             # List discarded files and reason (error code & description)
             fhandle.write("\n# Detailed Error Breakdown\n\n")
             msg = "  No %s output generated for %g l1b files due " + \
@@ -804,17 +1463,33 @@ class L2ProcessorReport(DefaultLoggingClass):
                     fn = filename_from_path(discarded_file)
                     fhandle.write("  * %s\n" % fn)
 
+        # Machine-readable version of the stage timing
+        self.write_stage_timing_to_file(directory)
+
     def clean_up(self):
         """ Remove all non-persistent parameter """
         self.data_period = None
+        self.time_range = None
         self.l1b_repository = "none"
         self._init_error_counters()
+        self._init_stage_timing()
+        self._init_orbit_summaries()
 
     def _init_error_counters(self):
         self.error_counter = OrderedDict([])
         for error_code in PYSIRAL_ERROR_CODES.keys():
             self.error_counter[error_code] = []
 
+    def _init_stage_timing(self):
+        # List of (l1b_file, stage, seconds, n_records)
+        self.stage_timing = []
+        self.current_l1b_file = None
+        self.run_seconds = 0.0
+
+    def _init_orbit_summaries(self):
+        self.orbit_summaries = []
+        self.skipped_files = []
+
     @property
     def data_period_str(self):
         try:
@@ -832,3 +1507,25 @@ class L2ProcessorReport(DefaultLoggingClass):
     @property
     def n_warnings(self):
         return 0
+
+    @property
+    def n_orbits(self):
+        return len(self.orbit_summaries)
+
+    @property
+    def n_l2_records(self):
+        return sum([orbit_summary["n_records"] for orbit_summary in self.orbit_summaries])
+
+
+class L2StageTiming(object):
+    """ Wall time and number of processed records of a single stage of the Level-2
+    orbit processing chain """
+
+    def __init__(self, stage, l1b_file, n_records=0):
+        self.stage = stage
+        self.l1b_file = l1b_file
+        self.n_records = n_records
+        self.seconds = 0.0
+
+    def as_tuple(self):
+        return self.l1b_file, self.stage, self.seconds, int(self.n_records)
@@ -5,6 +5,7 @@ Created on Fri Jul 24 14:04:27 2015
 @author: Stefan
 """
 from pysiral import __version__, get_cls
+from pysiral.clocks import datetime64_to_datetime
 from pysiral.config import (ConfigInfo, get_yaml_config, SENSOR_NAME_DICT,
                             MISSION_NAME_DICT, ORBIT_INCLINATION_DICT)
 from pysiral.errorhandler import ErrorStatus
@@ -12,7 +13,7 @@ from pysiral.grid import GridDefinition
 from pysiral.logging import DefaultLoggingClass
 from pysiral.l2data import L2iNCFileImport
 from pysiral.mask import L3Mask
-from pysiral.output import OutputHandlerBase, Level3Output
+from pysiral.output import OutputHandlerBase, Level3Output, BackgroundOutputWriter
 from pysiral.flag import ORCondition
 from pysiral.surface_type import SurfaceType
 from pysiral.sit import frb2sit_errprop
@@ -34,12 +35,16 @@ import re
 
 class Level3Processor(DefaultLoggingClass):
 
-    def __init__(self, product_def):
+    def __init__(self, product_def, async_output=False):
         super(Level3Processor, self).__init__(self.__class__.__name__)
         self.error = ErrorStatus(caller_id=self.__class__.__name__)
         self._job = product_def
         self._l3_progress_percent = 0.0
 
+        # Asynchronous output: The output files of a period are written in a background
+        # thread while the next period is processed (see `flush_output`)
+        self._output_writer = BackgroundOutputWriter() if async_output else None
+
     def process_l2i_files(self, l2i_files, period):
         """
         The main call for the Level-3 processor
@@ -130,10 +135,35 @@ class Level3Processor(DefaultLoggingClass):
         self._apply_processing_items(l3)
 
         # Write output(s)
+        if self._output_writer is not None:
+            self._output_writer.submit(period.label, self._write_l3_outputs, l3)
+            self._log_output_jobs(self._output_writer.get_completed())
+        else:
+            self._write_l3_outputs(l3)
+
+    def flush_output(self):
+        """ Wait until all output files are written (only required for asynchronous output)
+        and stop the background writer """
+        if self._output_writer is None:
+            return
+        self._log_output_jobs(self._output_writer.close())
+        self._output_writer = None
+
+    def _write_l3_outputs(self, l3):
+        """ Write the Level-3 grid for all output handlers """
         for output_handler in self._job.outputs:
             output = Level3Output(l3, output_handler)
             self.log.info("Write %s product: %s" % (output_handler.id, output.export_filename))
 
+    def _log_output_jobs(self, completed):
+        """ Report finished jobs of the background writer """
+        for period_label, result, error, seconds in completed:
+            if error is not None:
+                self.log.error("Failed to write output for period %s:\n%s" % (period_label, error))
+                self.error.add_error("l3-output-error", "Failed to write output for period %s" % period_label)
+            else:
+                self.log.info("Output for period %s written in %.1f seconds" % (period_label, seconds))
+
     def _log_progress(self, i):
         """ Concise logging on the progress of l2i stack creation """
         n = len(self._l2i_files)
@@ -174,9 +204,13 @@ class L2iDataStack(DefaultLoggingClass):
 
     def __init__(self, griddef, l2_parameter):
         """ A container for stacking l2i variables (geophysical parameter at sensor resolution) in L3 grid cells.
-        For each parameters a (numx, numy) array is created, with an list containing all l2i data points that
-        fall into the grid cell area. This list can be averaged or used for histogram computation in later stages
-        of the Level-3 processor.
+        The l2i parameters are stored as flat (columnar) arrays together with the flat index of the grid cell
+        for each data point. Once all l2i files are added, the data points of each parameter are sorted by
+        grid cell (stable, the order of the l2i data points in a grid cell is preserved) and the data
+        points of a grid cell are given by offsets into the sorted arrays (compressed sparse row layout).
+        This allows to compute grid cell statistics with array operations on groups of data points.
+
+        The content of a single grid cell is available with `stack[parameter_name][yj][xi]`.
 
         Args:
             griddef (obj): pysiral.grid.GridDefinition or inheritated objects
@@ -214,12 +248,26 @@ class L2iDataStack(DefaultLoggingClass):
         """ Create all data stacks, content will be added sequentially
         with `add` method """
 
-        # Stack dictionary that will hold the data
+        # Flat grid cell index of each l2i file (one array per l2i file)
+        self._cell_index = []
+
+        # Data of each parameter as list of (l2i file number, data array)
+        # NOTE: A parameter may not be available in all l2i files
+        self._columns = {}
+
+        # Data sorted by grid cell index (created on demand)
+        self._sorted_data = {}
+        self._cell_groups = {}
+        self._is_sorted = True
+
+        # Stack dictionary that will provide access to the data of single grid cells
         self.stack = {}
 
         # create a stack for each l2 parameter
         for pardef in self.l2_parameter:
-            self.stack[pardef.branchName()] = self.parameter_stack
+            parameter_name = pardef.branchName()
+            self._columns[parameter_name] = []
+            self.stack[parameter_name] = L2iStackParameter(self, parameter_name)
 
     def add(self, l2i):
         """ Add a l2i data object to the stack
@@ -236,8 +284,8 @@ class L2iDataStack(DefaultLoggingClass):
             time = l2i.time
         else:
             time = l2i.timestamp
-        self.start_time.append(time[0])
-        self.stop_time.append(time[-1])
+        self.start_time.append(datetime64_to_datetime(time[0]))
+        self.stop_time.append(datetime64_to_datetime(time[-1]))
         self.mission.append(l2i.mission)
         self.timeliness.append(l2i.timeliness)
         self._l2i_count += 1
@@ -248,20 +296,97 @@ class L2iDataStack(DefaultLoggingClass):
         # Get projection coordinates for l2i locations
         xi, yj = self.griddef.grid_indices(l2i.longitude, l2i.latitude)
 
-        # Stack the l2 parameter in the corresponding grid cells
-        for i in np.arange(l2i.n_records):
+        # Compute the flat grid cell index (records outside the grid are discarded)
+        dimx, dimy = self.griddef.extent.numx, self.griddef.extent.numy
+        in_grid = np.logical_and.reduce((xi >= 0, xi < dimx, yj >= 0, yj < dimy))
+        records = np.where(in_grid)[0]
+        cell_index = yj[records].astype(np.int64)*dimx + xi[records].astype(np.int64)
+        l2i_number = len(self._cell_index)
+        self._cell_index.append(cell_index)
+
+        # Add the l2 parameter to the columns
+        for pardef in self.l2_parameter:
+            parameter_name = pardef.branchName()
+            try:
+                data = getattr(l2i, parameter_name)
+            except AttributeError:
+                continue
+            self._columns[parameter_name].append((l2i_number, np.asarray(data)[records]))
+
+        # The data needs to be sorted again
+        self._is_sorted = False
 
-            # Add the surface type per default
-            # (will not be gridded, therefore not in list of l2 parameter)
-            x, y = int(xi[i]), int(yj[i])
+    def get_cell_data(self, parameter_name, xi, yj):
+        """ Return the array of all data points of a parameter in a grid cell """
+        data, cells, offsets = self.get_sorted_data(parameter_name)
+        cell_index = yj*self.griddef.extent.numx + xi
+        k = np.searchsorted(cells, cell_index)
+        if k == len(cells) or cells[k] != cell_index:
+            return data[0:0]
+        return data[offsets[k]:offsets[k+1]]
 
-            for pardef in self.l2_parameter:
-                parameter_name = pardef.branchName()
-                try:
-                    data = getattr(l2i, parameter_name)
-                    self.stack[parameter_name][y][x].append(data[i])
-                except AttributeError:
-                    pass
+    def get_sorted_data(self, parameter_name):
+        """
+        Return the data of a parameter sorted by grid cell.
+        :param parameter_name: name of the l2 parameter
+        :return: sorted data, flat index of all grid cells with data and offsets of
+                 the data points for each of these grid cells in the sorted data
+                 (data of cell k: data[offsets[k]:offsets[k+1]])
+        """
+        if not self._is_sorted:
+            self._sort_by_cell_index()
+        cells, offsets = self._cell_groups[parameter_name]
+        return self._sorted_data[parameter_name], cells, offsets
+
+    def get_cell_xi_yj(self, cells):
+        """ Return the grid indices (xi, yj) for flat grid cell indices """
+        dimx = self.griddef.extent.numx
+        return np.mod(cells, dimx), cells // dimx
+
+    def _sort_by_cell_index(self):
+        """ Sort the data of all parameters by grid cell index """
+
+        # Sort all data points by grid cell index. The sort order is valid for all parameters
+        # that are available in all l2i files
+        if len(self._cell_index) > 0:
+            cell_index = np.concatenate(self._cell_index)
+        else:
+            cell_index = np.array([], dtype=np.int64)
+        order = np.argsort(cell_index, kind="mergesort")
+        cell_groups = self._get_cell_groups(cell_index[order])
+
+        for parameter_name, columns in self._columns.items():
+
+            # Parameter not present in any file
+            if len(columns) == 0:
+                self._sorted_data[parameter_name] = np.array([])
+                self._cell_groups[parameter_name] = self._get_cell_groups(np.array([], dtype=np.int64))
+                continue
+
+            data = np.concatenate([column[1] for column in columns])
+
+            # Parameter available in all l2i files
+            if len(columns) == len(self._cell_index):
+                self._sorted_data[parameter_name] = data[order]
+                self._cell_groups[parameter_name] = cell_groups
+                continue
+
+            # Parameter not available in all l2i files: requires its own sort order
+            parameter_cell_index = np.concatenate([self._cell_index[column[0]] for column in columns])
+            parameter_order = np.argsort(parameter_cell_index, kind="mergesort")
+            self._sorted_data[parameter_name] = data[parameter_order]
+            self._cell_groups[parameter_name] = self._get_cell_groups(parameter_cell_index[parameter_order])
+
+        self._is_sorted = True
+
+    @staticmethod
+    def _get_cell_groups(sorted_cell_index):
+        """ Returns the unique cell indices and the offsets of the data of each cell in sorted cell index """
+        is_start = np.ones(sorted_cell_index.shape, dtype=bool)
+        is_start[1:] = sorted_cell_index[1:] != sorted_cell_index[:-1]
+        starts = np.where(is_start)[0]
+        offsets = np.append(starts, len(sorted_cell_index))
+        return sorted_cell_index[starts], offsets
 
     @property
     def n_total_records(self):
@@ -271,16 +396,36 @@ class L2iDataStack(DefaultLoggingClass):
     def l2i_count(self):
         return self._l2i_count
 
-    @property
-    def parameter_stack(self):
-        dimx, dimy = self.griddef.extent.numx, self.griddef.extent.numy
-        return [[[] for _ in range(dimx)] for _ in range(dimy)]
-
     @property
     def l2i_info(self):
         return self._l2i_info
 
 
+class L2iStackParameter(object):
+    """
+    Access to the data of a single parameter in the l2i stack with grid cell indices
+    (`stack[parameter_name][yj][xi]` returns the data points of grid cell xi, yj as array)
+    """
+
+    def __init__(self, stack, parameter_name):
+        self._stack = stack
+        self._parameter_name = parameter_name
+
+    def __getitem__(self, yj):
+        return L2iStackRow(self._stack, self._parameter_name, yj)
+
+
+class L2iStackRow(object):
+
+    def __init__(self, stack, parameter_name, yj):
+        self._stack = stack
+        self._parameter_name = parameter_name
+        self._yj = yj
+
+    def __getitem__(self, xi):
+        return self._stack.get_cell_data(self._parameter_name, xi, self._yj)
+
+
 class L3DataGrid(DefaultLoggingClass):
     """
     Container for computing gridded data sets based on a l2i data stack
@@ -394,11 +539,14 @@ class L3DataGrid(DefaultLoggingClass):
         """ Compute averages of all l2i parameter for each grid cell.
         The list of l2i parameter is from the output format definition
         No averages are computed for grid cells that are tagged with
-        a land flag. """
+        a land flag.
+
+        NOTE: Only finite data points are used for the grid cell statistics,
+              i.e. +/-inf values are ignored in the same way as NaN's """
 
         settings = self.l3def.grid_settings
 
-        # Loop over all parameter / grid cells
+        # Loop over all parameter
         for name in self._l2_parameter:
 
             # Certain parameters in the l2 stack are excluded from gridding
@@ -409,30 +557,63 @@ class L3DataGrid(DefaultLoggingClass):
 
             self.log.info("Gridding parameter: %s [%s]" % (name, grid_method))
 
-            for xi, yj in self.grid_indices:
-
-                data = np.array(self.l2.stack[name][yj][xi])
-
-                # nanmean needs at least 2 valid items
-                valid = np.where(np.isfinite(data))[0]
-                if len(valid) < settings.minimum_valid_grid_points:
-                    continue
-
-                # TODO: Think of a dicts with lambdas to make this more concise
-                if grid_method == "average":
-                    self.vars[name][yj, xi] = np.nanmean(data)
-                elif grid_method == "average_uncertainty":
-                    value = np.abs(np.sqrt(1. / np.sum(data[valid])))
-                    self.vars[name][yj, xi] = value
-                elif grid_method == "unique":
-                    self.vars[name][yj, xi] = np.unique(data)
-                elif grid_method == "median":
-                    self.vars[name][yj, xi] = np.nanmedian(data)
-                else:
-                    msg = "Invalid grid method (%s) for %s"
-                    msg = msg % (str(grid_method), name)
-                    self.error.add_error("invalid-l3def", msg)
-                    self.error.raise_on_error()
+            # Get the data points sorted by grid cell, each grid cell k
+            # with data is given by data[offsets[k]:offsets[k+1]]
+            data, cells, offsets = self.l2.get_sorted_data(name)
+            if len(cells) == 0:
+                continue
+            starts = offsets[:-1]
+
+            # nanmean needs at least 2 valid items
+            is_valid = np.isfinite(data)
+            n_valid = np.add.reduceat(is_valid.astype(np.int64), starts)
+            valid_cells = n_valid >= settings.minimum_valid_grid_points
+            if not np.any(valid_cells):
+                continue
+
+            # Compute the grid cell statistics for all cells at once
+            valid_data = np.where(is_valid, data, 0.0).astype(np.float64)
+            if grid_method == "average":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    value = np.add.reduceat(valid_data, starts) / n_valid
+            elif grid_method == "average_uncertainty":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    value = np.abs(np.sqrt(1. / np.add.reduceat(valid_data, starts)))
+            elif grid_method == "unique":
+                # NOTE: Only valid for grid cells with a single unique value
+                value = np.fmin.reduceat(data, starts)
+            elif grid_method == "median":
+                value = self._get_cell_nanmedian(np.where(is_valid, data, np.nan), cells, offsets, n_valid)
+            else:
+                msg = "Invalid grid method (%s) for %s"
+                msg = msg % (str(grid_method), name)
+                self.error.add_error("invalid-l3def", msg)
+                self.error.raise_on_error()
+
+            xi, yj = self.l2.get_cell_xi_yj(cells[valid_cells])
+            self.vars[name][yj, xi] = value[valid_cells]
+
+    @staticmethod
+    def _get_cell_nanmedian(data, cells, offsets, n_valid):
+        """
+        Compute the median of the valid data points for all grid cells
+        :param data: data points sorted by grid cell (invalid data points must be NaN)
+        :param cells: index of grid cells with data
+        :param offsets: offsets of the grid cell data points in data
+        :param n_valid: number of valid data points per grid cell
+        :return: median value per grid cell
+        """
+        # Sort the data points within each grid cell (NaN's are sorted to the end)
+        cell_number = np.repeat(np.arange(len(cells)), np.diff(offsets))
+        sorted_data = data[np.lexsort((data, cell_number))]
+        # Median is the mean of the two central valid data points
+        starts = offsets[:-1]
+        n = np.maximum(n_valid, 1)
+        lower = sorted_data[starts + (n-1)//2].astype(np.float64)
+        upper = sorted_data[starts + n//2].astype(np.float64)
+        median = (lower + upper) / 2.
+        median[n_valid == 0] = np.nan
+        return median
 
     def get_parameter_by_name(self, name):
         try:
@@ -1241,6 +1422,7 @@ class Level3TemporalCoverageStatistics(Level3ProcessorItem):
         start_date = date(tcs.year, tcs.month, tcs.day)
         end_date = date(tce.year, tce.month, tce.day)
         period_n_days = (end_date - start_date).days + 1
+        start_day = np.datetime64(start_date, "D")
 
         # Links
         stack = self.l3grid.l2.stack
@@ -1250,7 +1432,7 @@ class Level3TemporalCoverageStatistics(Level3ProcessorItem):
 
             # Get the day of observation for each entry in the Level-2 stack
             times = np.array(stack["time"][yj][xi])
-            day_of_observation = np.array([date(t.year, t.month, t.day) for t in times])
+            day_of_observation = times.astype("datetime64[D]")
 
             # The statistic is computed for sea ice thickness -> remove data points without valid sea ice thickness
             sea_ice_thickness = np.array(stack["sea_ice_thickness"][yj][xi])
@@ -1262,7 +1444,7 @@ class Level3TemporalCoverageStatistics(Level3ProcessorItem):
                 continue
 
             # Compute the number of days for each observation with respect to the start of the period
-            day_number = [(day - start_date).days for day in day_of_observation]
+            day_number = (day_of_observation - start_day).astype(np.int64)
 
             # Compute the set of days with observations available
             days_with_observations = np.unique(day_number)
@@ -12,6 +12,7 @@ from pysiral.errorhandler import ErrorStatus
 from pysiral.grid import GridDefinition
 from pysiral.logging import DefaultLoggingClass
 from pysiral.iotools import ReadNC
+from pysiral.output import NETCDF_IO_LOCK
 
 from collections import OrderedDict
 from netCDF4 import Dataset
@@ -129,7 +130,8 @@ class MaskSourceBase(DefaultLoggingClass):
             nc_filename = "%s_%s.nc" % (self.mask_name, griddef.grid_id)
             nc_filepath = os.path.join(self.mask_dir, nc_filename)
         self.log.info("Export mask file: %s" % nc_filepath)
-        self._write_netcdf(nc_filepath, griddef, target_mask)
+        with NETCDF_IO_LOCK:
+            self._write_netcdf(nc_filepath, griddef, target_mask)
 
     def _write_netcdf(self, nc_filepath, griddef, mask):
         """ Write a netCDF file with the mask in the target
@@ -8,6 +8,7 @@ from pysiral.errorhandler import ErrorStatus
 from pysiral.logging import DefaultLoggingClass
 from pysiral.config import options_from_dictionary
 from pysiral.path import validate_directory
+from pysiral.clocks import datetime642num
 
 from glob import glob
 from netCDF4 import Dataset, date2num
@@ -15,12 +16,26 @@ from datetime import datetime
 from dateutil import parser as dtparser
 from collections import OrderedDict
 import numpy as np
+import threading
+import traceback
+import Queue
 import parse
+import time
 import sys
 import os
 import re
 
 
+# Name of the global attribute with the Level-2 processing fingerprint
+L2PROC_FINGERPRINT_ATTRIBUTE = "pysiral_l2proc_fingerprint"
+
+# Process-wide lock for all netCDF file access (open/read/write). The netCDF4 module
+# releases the GIL during I/O and the HDF5 library is in general not built thread-safe,
+# therefore netCDF I/O of different threads (e.g. the background output writer or the
+# auxiliary data prefetch) must never overlap. Reentrant, since readers may be nested
+NETCDF_IO_LOCK = threading.RLock()
+
+
 class OutputHandlerBase(DefaultLoggingClass):
 
     subfolder_format = {"month": "%02g", "year": "%04g", "day": "%02g"}
@@ -170,6 +185,12 @@ class OutputHandlerBase(DefaultLoggingClass):
         """ Returns a directory suitable string with the current time """
         return datetime.now().strftime("%Y%m%dT%H%M%S")
 
+    @property
+    def io_profile(self):
+        """ Returns the netCDF I/O profile of the output definition
+        (root.io_profile, netCDF defaults if not specified) """
+        return NCIOProfile(self.output_def.get("io_profile", None))
+
     @property
     def variable_def(self):
         t = self.output_def.variables
@@ -227,7 +248,11 @@ class DefaultLevel2OutputHandler(OutputHandlerBase):
     def get_directory_from_data(self, l2, create=True):
         """ Return the output directory based on information provided
         in an l2 data object """
-        directory = self._get_directory_from_dt(l2.info.start_time)
+        return self.get_directory_from_dt(l2.info.start_time, create=create)
+
+    def get_directory_from_dt(self, dt, create=True):
+        """ Return the output directory for a given datetime """
+        directory = self._get_directory_from_dt(dt)
         if create:
             self._create_directory(directory)
         return directory
@@ -286,6 +311,85 @@ class DefaultLevel2OutputHandler(OutputHandlerBase):
         return os.path.join(local_settings_path, *self.default_file_location)
 
 
+class BackgroundOutputWriter(DefaultLoggingClass):
+    """
+    Writes output files in a background thread, so that the processor can continue with
+    the next orbit/period while the previous product is compressed and written. A write job
+    is any callable (e.g. a function creating Level2Output/Level3Output instances). The number
+    of jobs waiting for the writer is limited to `max_pending`, i.e. `submit` blocks if the
+    writer cannot keep up (this limits the number of product objects kept in memory).
+
+    Results of finished jobs are retrieved with `get_completed` (non-blocking) or `wait`
+    (blocks until all submitted jobs are finished) as list of
+    (job_id, return value, error message, seconds). The error message is None for
+    successful jobs and contains the traceback for jobs that raised an exception.
+
+    NOTE: The writer thread is not inherited by forked processes, the writer must therefore
+          not be used in worker processes of a multiprocessing pool.
+    NOTE: Write jobs must not access netCDF files without `NETCDF_IO_LOCK` (the output classes
+          of this module and all pysiral netCDF readers acquire the lock)
+    """
+
+    def __init__(self, max_pending=1):
+        super(BackgroundOutputWriter, self).__init__(self.__class__.__name__)
+        self._jobs = Queue.Queue(maxsize=max(int(max_pending), 1))
+        self._completed = Queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=self.__class__.__name__)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, job_id, write_func, *args, **kwargs):
+        """ Add a write job to the queue (blocks if `max_pending` jobs are waiting) """
+        if not self.is_alive:
+            raise RuntimeError("Background output writer has been closed")
+        self._jobs.put((job_id, write_func, args, kwargs))
+
+    def get_completed(self):
+        """ Returns the list of all jobs finished since the last call """
+        completed = []
+        while True:
+            try:
+                completed.append(self._completed.get_nowait())
+            except Queue.Empty:
+                break
+        return completed
+
+    def wait(self):
+        """ Wait until all submitted jobs are finished and return the list of finished jobs """
+        self._jobs.join()
+        return self.get_completed()
+
+    def close(self):
+        """ Finish all submitted jobs and stop the writer thread. Returns the list of finished jobs """
+        completed = self.wait()
+        if self.is_alive:
+            self._jobs.put(None)
+            self._thread.join()
+        return completed
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                break
+            job_id, write_func, args, kwargs = job
+            t0 = time.time()
+            result, error = None, None
+            try:
+                result = write_func(*args, **kwargs)
+            except Exception:
+                error = traceback.format_exc()
+            self._completed.put((job_id, result, error, time.time()-t0))
+            # Release the reference to the product before waiting for the next job
+            job = args = kwargs = None
+            self._jobs.task_done()
+
+    @property
+    def is_alive(self):
+        return self._thread.is_alive()
+
+
 class NCDateNumDef(object):
     """
     Holds definition for datetime conversion to numbers and vice versa
@@ -297,6 +401,168 @@ class NCDateNumDef(object):
         self.calendar = "standard"
 
 
+class NCIOProfile(object):
+    """
+    Settings for the creation of netCDF variables (compression, shuffle,
+    chunking, quantization). A profile is defined by a named preset and
+    optional overrides, either for all variables or per variable:
+
+        io_profile:
+            preset: alongtrack
+            complevel: 1
+            variables:
+                radar_freeboard:
+                    least_significant_digit: 4
+                power:
+                    chunks: {n_records: 4096}
+
+    or simply by the name of the preset (`io_profile: fast`). Valid
+    options are zlib, complevel, shuffle, least_significant_digit (only
+    applied to floating point variables) and chunks, with chunks being
+    either None (netCDF default chunking), "full" (one chunk per variable)
+    or a dictionary with chunk sizes for dimension names (dimensions not
+    in the dictionary are not split).
+    """
+
+    presets = {
+        "default": {"zlib": True, "complevel": 4, "shuffle": True, "chunks": None},
+        "fast": {"zlib": True, "complevel": 1, "shuffle": True, "chunks": "full"},
+        "alongtrack": {"zlib": True, "complevel": 4, "shuffle": True, "chunks": "full"},
+        "uncompressed": {"zlib": False, "complevel": 4, "shuffle": False, "chunks": None}}
+
+    valid_options = ["zlib", "complevel", "shuffle", "least_significant_digit", "chunks"]
+
+    def __init__(self, profile_def=None):
+        self.name = "default"
+        self._options = dict(self.presets["default"])
+        self._variable_options = {}
+        if profile_def is not None:
+            self._set_profile(profile_def)
+
+    def get_variable_kwargs(self, name, dimensions, dataset, dtype):
+        """
+        Returns the keywords for netCDF4.Dataset.createVariable
+        :param name: The name of the variable
+        :param dimensions: tuple of dimension names
+        :param dataset: netCDF4 dataset/group with dimension definitions
+        :param dtype: The data type of the variable
+        """
+        options = dict(self._options)
+        options.update(self._variable_options.get(name, {}))
+        kwargs = {"zlib": options["zlib"],
+                  "complevel": options["complevel"],
+                  "shuffle": options["shuffle"]}
+        lsd = options.get("least_significant_digit", None)
+        if lsd is not None and np.dtype(dtype).kind == "f":
+            kwargs["least_significant_digit"] = lsd
+        chunksizes = self._get_chunksizes(options["chunks"], dimensions, dataset)
+        if chunksizes is not None:
+            kwargs["chunksizes"] = chunksizes
+        return kwargs
+
+    def _set_profile(self, profile_def):
+        """ Set the profile from a preset name or a profile definition """
+        if not isinstance(profile_def, (str, unicode)):
+            try:
+                profile_def = profile_def.convertTo("nested_dict")
+            except AttributeError:
+                profile_def = dict(profile_def)
+        else:
+            profile_def = {"preset": profile_def}
+        profile_def = dict(profile_def)
+
+        # Get the preset
+        self.name = str(profile_def.pop("preset", "default"))
+        if self.name not in self.presets:
+            msg = "Invalid netCDF I/O profile preset: %s (valid: %s)"
+            raise ValueError(msg % (self.name, ", ".join(sorted(self.presets.keys()))))
+        self._options = dict(self.presets[self.name])
+
+        # Overrides for all and specific variables
+        variable_options = profile_def.pop("variables", None)
+        self._options.update(self._validate_options(profile_def))
+        if variable_options is not None:
+            for name in variable_options.keys():
+                options = self._validate_options(variable_options[name])
+                self._variable_options[str(name)] = options
+
+    def _validate_options(self, options):
+        for key in options.keys():
+            if key not in self.valid_options:
+                msg = "Invalid netCDF I/O profile option: %s (valid: %s)"
+                raise ValueError(msg % (key, ", ".join(self.valid_options)))
+        return dict(options)
+
+    @staticmethod
+    def _get_chunksizes(chunks, dimensions, dataset):
+        """ Returns the chunk sizes for given dimensions (or None) """
+        if chunks is None or len(dimensions) == 0:
+            return None
+        dim_sizes = [len(dataset.dimensions[dimension]) for dimension in dimensions]
+        if chunks == "full":
+            chunks = {}
+        chunksizes = []
+        for dimension, dim_size in zip(dimensions, dim_sizes):
+            chunksize = chunks.get(dimension, dim_size)
+            chunksizes.append(int(max(min(chunksize, dim_size), 1)))
+        return chunksizes
+
+
+class ScaledIntegerEncoding(object):
+    """
+    Lossy encoding of a 2D float array (n_records, n) as scaled integers
+    with an offset and scale factor per record:
+
+        value = offset + (counts - counts_min) * scale_factor
+
+    The offset is the minimum and the scale factor the value range of each
+    record divided by the number of available integer steps, therefore the
+    reconstruction error is bounded by half a scale factor:
+
+        |error| <= (record_max - record_min) / (2 * (2**16 - 2))
+
+    (i.e. less than 8e-6 of the value range of each record for 16 bit
+    integers) plus the rounding of the decoded values to single precision.
+    NaN's are stored with the largest integer as fill value.
+    """
+
+    valid_dtypes = ["int16", "uint16"]
+
+    def __init__(self, dtype):
+        if dtype not in self.valid_dtypes:
+            msg = "Invalid scaled integer encoding: %s (valid: %s)"
+            raise ValueError(msg % (str(dtype), ", ".join(self.valid_dtypes)))
+        self.dtype = np.dtype(dtype)
+        dtype_info = np.iinfo(self.dtype)
+        self.counts_min = dtype_info.min
+        self.fill_value = dtype_info.max
+        self.n_steps = float(dtype_info.max - 1 - dtype_info.min)
+
+    def encode(self, values):
+        """ Returns integer counts, offset and scale factor per record """
+        values = np.asarray(values, dtype=np.float64)
+        is_valid = np.isfinite(values)
+        has_valid = np.any(is_valid, axis=1)
+        offset = np.where(has_valid, np.min(np.where(is_valid, values, np.inf), axis=1), 0.0)
+        value_max = np.where(has_valid, np.max(np.where(is_valid, values, -np.inf), axis=1), 0.0)
+        scale_factor = (value_max - offset) / self.n_steps
+        # Records with constant values: all counts are counts_min
+        scale = np.where(scale_factor > 0.0, scale_factor, 1.0)
+        with np.errstate(invalid="ignore"):
+            counts = np.round((values - offset[:, np.newaxis]) / scale[:, np.newaxis])
+        counts = np.where(is_valid, counts + self.counts_min, self.fill_value)
+        return counts.astype(self.dtype), offset, scale_factor
+
+    def decode(self, counts, offset, scale_factor, dtype=np.float32):
+        """ Returns the values (NaN for fill values) from integer counts """
+        counts = np.asarray(counts)
+        offset = np.asarray(offset, dtype=np.float64)[:, np.newaxis]
+        scale_factor = np.asarray(scale_factor, dtype=np.float64)[:, np.newaxis]
+        values = offset + (counts.astype(np.float64) - self.counts_min) * scale_factor
+        values[counts == self.fill_value] = np.nan
+        return values.astype(dtype)
+
+
 class NCDataFile(DefaultLoggingClass):
 
     def __init__(self):
@@ -305,7 +571,7 @@ class NCDataFile(DefaultLoggingClass):
         self.error = ErrorStatus(caller_id=class_name)
         self.filename = None
         self.time_def = NCDateNumDef()
-        self.zlib = True
+        self.io_profile = NCIOProfile()
         self._rootgrp = None
         self._options = None
         self._proc_settings = None
@@ -365,8 +631,10 @@ class NCDataFile(DefaultLoggingClass):
                 self.error.add_error("invalid-paramater", msg)
                 self.error.raise_on_error()
 
-            # Convert datetime objects to number
-            if type(data[0]) is datetime:
+            # Convert datetime64 or datetime objects to number
+            if data.dtype.kind == "M":
+                data = datetime642num(data, self.time_def.units, self.time_def.calendar)
+            elif type(data[0]) is datetime:
                 data = date2num(data, self.time_def.units, self.time_def.calendar)
 
             # Convert bool objects to integer
@@ -384,7 +652,8 @@ class NCDataFile(DefaultLoggingClass):
                 dimensions = tuple(dims[0:len(data.shape)])
 
             # Create and set the variable
-            var = self._rootgrp.createVariable(parameter_name, data.dtype.str, dimensions, zlib=self.zlib)
+            kwargs = self.io_profile.get_variable_kwargs(parameter_name, dimensions, self._rootgrp, data.dtype)
+            var = self._rootgrp.createVariable(parameter_name, data.dtype.str, dimensions, **kwargs)
             var[:] = data
 
             # Add Parameter Attributes
@@ -499,7 +768,9 @@ class L1bDataNC(DefaultLoggingClass):
         self.datagroups = ["waveform", "surface_type", "time_orbit", "classifier", "correction"]
         self.filename = None
         self.time_def = NCDateNumDef()
-        self.zlib = True
+        self.io_profile = NCIOProfile()
+        # Optional lossy encoding of the waveform power (None, "int16", "uint16")
+        self.waveform_power_encoding = None
         self._rootgrp = None
         self._options = None
         self._proc_settings = None
@@ -512,12 +783,13 @@ class L1bDataNC(DefaultLoggingClass):
 
     def export(self):
         self._validate()
-        self._open_file()
-        # Save the l1b info data group as global attributes
-        attdict = self.l1b.info.attdict
-        self._create_root_group(attdict)
-        self._populate_data_groups()
-        self._write_to_file()
+        with NETCDF_IO_LOCK:
+            self._open_file()
+            # Save the l1b info data group as global attributes
+            attdict = self.l1b.info.attdict
+            self._create_root_group(attdict)
+            self._populate_data_groups()
+            self._write_to_file()
 
     def _validate(self):
         if self.filename is None:
@@ -565,8 +837,17 @@ class L1bDataNC(DefaultLoggingClass):
 
                 data = getattr(content, parameter)
 
-                # Convert datetime objects to number
-                if type(data[0]) is datetime:
+                # Waveform power as scaled integers (if requested)
+                if datagroup == "waveform" and parameter == "power":
+                    if self.waveform_power_encoding is not None:
+                        self._create_encoded_power_variables(dgroup, data, dims)
+                        continue
+
+                # Convert datetime64 or datetime objects to number
+                if data.dtype.kind == "M":
+                    data = datetime642num(data, self.time_def.units,
+                                          self.time_def.calendar)
+                elif type(data[0]) is datetime:
                     data = date2num(data, self.time_def.units,
                                     self.time_def.calendar)
 
@@ -577,7 +858,8 @@ class L1bDataNC(DefaultLoggingClass):
                 if self.verbose:
                     print " "+parameter, dimensions, data.dtype.str, data.shape
 
-                var = dgroup.createVariable(parameter, data.dtype.str, dimensions, zlib=self.zlib)
+                kwargs = self.io_profile.get_variable_kwargs(parameter, dimensions, dgroup, data.dtype)
+                var = dgroup.createVariable(parameter, data.dtype.str, dimensions, **kwargs)
                 var[:] = data
 
                 # Add Parameter Attributes
@@ -585,6 +867,33 @@ class L1bDataNC(DefaultLoggingClass):
                 for key in attribute_dict.keys():
                     setattr(var, key, attribute_dict[key])
 
+    def _create_encoded_power_variables(self, dgroup, power, dims):
+        """
+        Write the waveform power as scaled integers with offset and scale
+        factor for each record (see ScaledIntegerEncoding)
+        """
+        encoding = ScaledIntegerEncoding(self.waveform_power_encoding)
+        counts, offset, scale_factor = encoding.encode(power)
+
+        dimensions = tuple(dims[0:2])
+        kwargs = self.io_profile.get_variable_kwargs("power", dimensions, dgroup, encoding.dtype)
+        # NOTE: The fill value of the encoding (NaN) is declared as _FillValue, since the
+        #       netCDF default fill value of the integer type may be a valid count
+        fill_value = encoding.dtype.type(encoding.fill_value)
+        var = dgroup.createVariable("power", encoding.dtype.str, dimensions, fill_value=fill_value, **kwargs)
+        # NOTE: The fill value is handled by the encoding
+        var.set_auto_maskandscale(False)
+        var[:] = counts
+        var.long_name = "power"
+        var.encoding = "scaled_%s" % encoding.dtype.name
+        var.comment = "power = power_offset + (power - %d) * power_scale_factor" % encoding.counts_min
+
+        for name, data in [("power_offset", offset), ("power_scale_factor", scale_factor)]:
+            kwargs = self.io_profile.get_variable_kwargs(name, (dims[0], ), dgroup, data.dtype)
+            var = dgroup.createVariable(name, data.dtype.str, (dims[0], ), **kwargs)
+            var[:] = data
+            var.long_name = name
+
     def _convert_datetime_attributes(self, attdict):
         """
         Replace l1b info parameters of type datetime.datetime by a double
@@ -646,10 +955,12 @@ class Level2Output(NCDataFile):
     Class to export a l2data object into a netcdf file
     """
 
-    def __init__(self, data, output_handler):
+    def __init__(self, data, output_handler, l2proc_fingerprint=None):
         super(Level2Output, self).__init__()
         self.data = data
         self.output_handler = output_handler
+        self.io_profile = output_handler.io_profile
+        self.l2proc_fingerprint = l2proc_fingerprint
         self._set_doi()
         try:
             self._set_data_record_type()
@@ -659,10 +970,18 @@ class Level2Output(NCDataFile):
 
     def _export_content(self):
         self.path = self.full_path
-        self._open_file()
-        self._write_global_attributes()
-        self._populate_data_groups()
-        self._write_to_file()
+        with NETCDF_IO_LOCK:
+            self._open_file()
+            self._write_global_attributes()
+            self._write_l2proc_fingerprint()
+            self._populate_data_groups()
+            self._write_to_file()
+
+    def _write_l2proc_fingerprint(self):
+        """ Add the fingerprint of the Level-2 processing (input, settings, auxdata and
+        pysiral version) as global attribute (used to identify up-to-date files) """
+        if self.l2proc_fingerprint is not None:
+            self._rootgrp.setncattr(L2PROC_FINGERPRINT_ATTRIBUTE, self.l2proc_fingerprint)
 
 
 class Level3Output(NCDataFile):
@@ -674,6 +993,7 @@ class Level3Output(NCDataFile):
         super(Level3Output, self).__init__()
         self.data = data
         self.output_handler = output_handler
+        self.io_profile = output_handler.io_profile
         self._set_doi()
         self._set_data_record_type()
         self._preprocess_data()
@@ -690,19 +1010,21 @@ class Level3Output(NCDataFile):
                 self.data.set_parameter_by_name(par_name, np.flipud(var))
 
     def _export_content(self):
-        self._open_file()
-        self._write_global_attributes()
-        self._populate_data_groups(level3=True)
-        self._add_time_variables()
-        self._add_grid_variables()
-        self._write_to_file()
+        with NETCDF_IO_LOCK:
+            self._open_file()
+            self._write_global_attributes()
+            self._populate_data_groups(level3=True)
+            self._add_time_variables()
+            self._add_grid_variables()
+            self._write_to_file()
 
     def _add_time_variables(self):
 
         rgrp = self._rootgrp
 
         # Set Time Variable
-        var = rgrp.createVariable("time", "f8", ('time'), zlib=self.zlib)
+        kwargs = self.io_profile.get_variable_kwargs("time", ("time", ), rgrp, "f8")
+        var = rgrp.createVariable("time", "f8", ('time'), **kwargs)
         var.standard_name = "time"
         var.units = self.time_def.units
         var.long_name = "reference time of product"
@@ -718,7 +1040,8 @@ class Level3Output(NCDataFile):
         td_units, td_cal = self.time_def.units, self.time_def.calendar
         time_bnds = [[date2num(dt, td_units, td_cal) for dt in time_bounds_dt]]
         dims = ("time", "nv")
-        var = rgrp.createVariable("time_bnds", "f8", dims, zlib=self.zlib)
+        kwargs = self.io_profile.get_variable_kwargs("time_bnds", dims, rgrp, "f8")
+        var = rgrp.createVariable("time_bnds", "f8", dims, **kwargs)
         var.units = self.time_def.units
         var[:] = time_bnds
 
@@ -727,7 +1050,8 @@ class Level3Output(NCDataFile):
         rgrp = self._rootgrp
 
         # Set x coordinate
-        var = rgrp.createVariable("xc", "f8", ('xc'), zlib=self.zlib)
+        kwargs = self.io_profile.get_variable_kwargs("xc", ("xc", ), rgrp, "f8")
+        var = rgrp.createVariable("xc", "f8", ('xc'), **kwargs)
         var.standard_name = "projection_x_coordinate"
         var.units = "km"
         var.long_name = "x coordinate of projection (eastings)"
@@ -737,7 +1061,8 @@ class Level3Output(NCDataFile):
         yc_km = self.data.griddef.yc_km
         if self.output_handler.flip_yc:
             yc_km = np.flip(yc_km, 0)
-        var = rgrp.createVariable("yc", "f8", ('yc'), zlib=self.zlib)
+        kwargs = self.io_profile.get_variable_kwargs("yc", ("yc", ), rgrp, "f8")
+        var = rgrp.createVariable("yc", "f8", ('yc'), **kwargs)
         var.standard_name = "projection_y_coordinate"
         var.units = "km"
         var.long_name = "y coordinate of projection (eastings)"
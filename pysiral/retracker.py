@@ -74,6 +74,10 @@ class BaseRetracker(object):
         self._l1b = l1b
         self._l2 = l2
 
+        # Remove auxiliary output of previous calls
+        # (the retracker instance may be used for more than one orbit)
+        self.auxdata_output = []
+
         # Initialize the retracked range with an NaN array
         # -> only waveforms of type "surface_type" will retracked
         self._create_default_properties(l1b.n_records)
@@ -609,6 +613,10 @@ class cTFMRA(BaseRetracker):
 
     DOCSTR = r"Threshold first maximum retracker (TFMRA)"
 
+    # Default number of waveforms that are retracked in one array operation
+    # (can be overwritten by the `batch_size` option in the level-2 settings)
+    batch_size = 2500
+
     def __init__(self):
         super(cTFMRA, self).__init__()
 
@@ -639,29 +647,29 @@ class cTFMRA(BaseRetracker):
         tfmra_threshold = self.get_tfmra_threshold(indices)
         self.register_auxdata_output("tfmrathr", "tfmra_threshold", tfmra_threshold)
 
-        # Loop over all waveforms
-        # TODO: This is a candidate for multi-processing
-        for i in indices:
+        # Do not retrack waveforms that are marked as invalid
+        indices = np.asarray(indices)
+        indices = indices[is_valid[indices]]
 
-            # Do not retrack waveforms that are marked as invalid
-            if not is_valid[i]:
-                continue
+        # Retrack all waveforms at once as (n_records, n_bins) arrays. The
+        # waveforms are processed in batches, since the oversampled waveform
+        # matrices of a full orbit would otherwise require too much memory
+        batch_size = self._options.batch_size if "batch_size" in self._options else self.batch_size
+        for i0 in np.arange(0, len(indices), batch_size):
+            batch = indices[i0:i0+batch_size]
 
-            # Get the filtered waveform, index of first maximum & norm
-            filt_rng, filt_wfm, fmi, norm = self.get_filtered_wfm(rng[i, :], wfm[i, :], radar_mode[i])
+            # Get the filtered waveforms, indices of first maximum & norm
+            filt_rng, filt_wfm, fmi, norm = self.get_filtered_wfm_batch(rng[batch, :], wfm[batch, :],
+                                                                        radar_mode[batch])
 
-            # first maximum finder might have failed
-            if fmi == -1:
-                self._range[i] = np.nan
-                self._power[i] = np.nan
-                continue
-
-            # Get track point and its power
-            tfmra_range, tfmra_power = self.get_threshold_range(filt_rng, filt_wfm, fmi, tfmra_threshold[i])
+            # Get track points and their power
+            # NOTE: Waveforms for which the first maximum finder has failed (fmi == -1) have NaN values
+            tfmra_range, tfmra_power = self.get_threshold_range_batch(filt_rng, filt_wfm, fmi,
+                                                                      tfmra_threshold[batch])
 
             # Set the values
-            self._range[i] = tfmra_range + self._options.offset
-            self._power[i] = tfmra_power * norm
+            self._range[batch] = tfmra_range + self._options.offset
+            self._power[batch] = tfmra_power * norm
 
         # Apply a radar mode dependent range bias if option is in
         # level-2 settings file
@@ -760,18 +768,17 @@ class cTFMRA(BaseRetracker):
         fmi = np.full(wfm_shape[0], -1, dtype=np.int32)
         norm = np.full(wfm_shape[0], np.nan)
 
-        for i in np.arange(wfm.shape[0]):
-            if not is_valid[i]:
-                continue
-            result = self.get_filtered_wfm(rng[i, :], wfm[i, :], radar_mode[i])
-            filt_rng[i, :] = result[0]
-            filt_wfm[i, :] = result[1]
-            fmi[i] = result[2]
-            norm[i] = result[3]
-
-        return filt_rng, filt_wfm, fmi, norm
+        valid = np.where(is_valid)[0]
+        if len(valid) == 0:
+            return filt_rng, filt_wfm, fmi, norm
 
+        result = self.get_filtered_wfm_batch(rng[valid, :], wfm[valid, :], radar_mode[valid])
+        filt_rng[valid, :] = result[0]
+        filt_wfm[valid, :] = result[1]
+        fmi[valid] = result[2]
+        norm[valid] = result[3]
 
+        return filt_rng, filt_wfm, fmi, norm
 
     def get_thresholds_distance(self, rng, wfm, fmi, t0, t1):
         """
@@ -888,6 +895,149 @@ class cTFMRA(BaseRetracker):
 
         return tfmra_range, tfmra_power
 
+    def get_filtered_wfm_batch(self, rng, wfm, radar_mode):
+        """
+        Array version of get_filtered_wfm for a (n_records, n_bins) waveform matrix
+        :param rng: range bins (n_records, n_bins)
+        :param wfm: waveform power (n_records, n_bins)
+        :param radar_mode: radar mode flag (n_records)
+        :return: filtered range, filtered & normed waveforms, first maximum index and norm per record
+        """
+
+        filt_rng, filt_wfm = self.filter_waveform_batch(rng, wfm, radar_mode)
+
+        # Normalize filtered waveform
+        # NOTE: All-NaN waveforms will have a NaN norm (as with bottleneck.nanmax)
+        norm = np.full(filt_wfm.shape[0], np.nan)
+        is_all_nan = np.all(np.isnan(filt_wfm), axis=1)
+        if not np.all(is_all_nan):
+            norm[~is_all_nan] = bn.nanmax(filt_wfm[~is_all_nan, :], axis=1)
+        filt_wfm = filt_wfm / norm[:, np.newaxis]
+
+        # Get noise level in normalized units
+        oversampling = self._options.wfm_oversampling_factor
+        n_noise_bins = 5*oversampling
+        noise_level = np.sum(filt_wfm[:, 0:n_noise_bins], axis=1)/float(n_noise_bins)
+
+        # Find first maxima
+        # (needs to be above radar mode dependent noise threshold)
+        fmnt = np.array(self._options.first_maximum_normalized_threshold)
+        peak_minimum_power = fmnt[radar_mode] + noise_level
+        fmi = self.get_first_maximum_index_batch(filt_wfm, peak_minimum_power)
+
+        return filt_rng, filt_wfm, fmi, norm
+
+    def filter_waveform_batch(self, rng, wfm, radar_mode):
+        """
+        Array version of filter_waveform: block filter smoothing of
+        oversampled original waveforms for a (n_records, n_bins) waveform matrix
+        """
+
+        # Parameter from options dictionary if omitted
+        opt = self._options
+        oversampling = opt.wfm_oversampling_factor
+
+        # Waveform oversampling (identical to cytfmra_interpolate)
+        range_os, wfm_os = tfmra_interpolate_batch(rng.astype(np.float32), wfm.astype(np.float32), oversampling)
+
+        # Smoothing with radar mode dependent window size
+        for radar_mode_index in np.unique(radar_mode):
+            window_size = opt.wfm_smoothing_window_size[radar_mode_index]
+            records = np.where(radar_mode == radar_mode_index)[0]
+            wfm_os[records, :] = bnsmooth_batch(wfm_os[records, :], window_size)
+
+        return range_os, wfm_os
+
+    def get_first_maximum_index_batch(self, wfm, peak_minimum_power):
+        """
+        Array version of get_first_maximum_index for a (n_records, n_bins) matrix
+        of filtered and normalized waveforms. Returns the index of the first peak
+        before the absolute power maximum for each record with the same
+        convention as the single waveform version (0: all-NaN waveform,
+        -1: absolute maximum at first bin)
+        """
+
+        n_records, n_bins = wfm.shape
+        bin_index = np.arange(n_bins)
+        record_index = np.arange(n_records)
+
+        # Get the main maximum first
+        # NOTE: bottleneck.nanargmax fails for all-NaN waveforms
+        is_all_nan = np.all(np.isnan(wfm), axis=1)
+        absolute_maximum_index = np.zeros(n_records, dtype=np.int64)
+        if not np.all(is_all_nan):
+            absolute_maximum_index[~is_all_nan] = bn.nanargmax(wfm[~is_all_nan, :], axis=1)
+
+        # Find relative maxima before the absolute maximum
+        # (the waveform part before the absolute maximum is padded at both
+        #  ends with its edge values minus a small offset, see cytfmra_findpeaks)
+        before = np.empty(wfm.shape)
+        before[:, 0] = wfm[:, 0] - 1.e-6
+        before[:, 1:] = wfm[:, :-1]
+        after = np.empty(wfm.shape)
+        after[:, :-1] = wfm[:, 1:]
+        after[:, -1] = wfm[:, -1] - 1.e-6
+        last_index = np.maximum(absolute_maximum_index - 1, 0)
+        after[record_index, last_index] = wfm[record_index, last_index] - 1.e-6
+        is_leading_edge = bin_index[np.newaxis, :] < absolute_maximum_index[:, np.newaxis]
+        is_peak = np.logical_and(wfm > before, wfm > after)
+        is_peak = np.logical_and(is_peak, is_leading_edge)
+
+        # Check if relative maximum are above the required threshold
+        is_leading_maximum = np.logical_and(is_peak, wfm >= peak_minimum_power[:, np.newaxis])
+
+        # Identify the first maximum
+        first_maximum_index = absolute_maximum_index.copy()
+        has_leading_maximum = np.any(is_leading_maximum, axis=1)
+        first_leading_maximum = np.argmax(is_leading_maximum, axis=1)
+        first_maximum_index[has_leading_maximum] = first_leading_maximum[has_leading_maximum]
+
+        # No leading edge: first maximum finder failed
+        first_maximum_index[absolute_maximum_index == 0] = -1
+        first_maximum_index[is_all_nan] = 0
+
+        return first_maximum_index
+
+    def get_threshold_range_batch(self, rng, wfm, first_maximum_index, threshold):
+        """
+        Array version of get_threshold_range. Return the range values and the power
+        of the retrack points at a given threshold of the first maximum power for
+        a (n_records, n_bins) matrix of filtered waveforms. Records with an invalid
+        first maximum index (-1) have NaN values for range and power
+        """
+
+        n_records, n_bins = wfm.shape
+        bin_index = np.arange(n_bins)
+        record_index = np.arange(n_records)
+
+        # get first index greater as threshold power
+        fmi = np.maximum(first_maximum_index, 0)
+        first_maximum_power = wfm[record_index, fmi]
+
+        # Get power of retracked point
+        tfmra_power = threshold*first_maximum_power
+
+        # Get the first bin before the first maximum above the retracked power
+        is_leading_edge = bin_index[np.newaxis, :] < fmi[:, np.newaxis]
+        is_above = np.logical_and(wfm > tfmra_power[:, np.newaxis], is_leading_edge)
+        has_point = np.logical_and(np.any(is_above, axis=1), first_maximum_index >= 0)
+        point = np.argmax(is_above, axis=1)
+
+        # Use linear interpolation to get exact range value
+        # NOTE: the modulo reproduces the index wrap of the single waveform version
+        #       in the case that the first bin is already above the threshold
+        i0, i1 = (point-1) % n_bins, point
+        wfm0, wfm1 = wfm[record_index, i0], wfm[record_index, i1]
+        rng0, rng1 = rng[record_index, i0], rng[record_index, i1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gradient = (wfm1-wfm0)/(rng1-rng0)
+            tfmra_range = (tfmra_power - wfm0) / gradient + rng0
+
+        tfmra_range[~has_point] = np.nan
+        tfmra_power[~has_point] = np.nan
+
+        return tfmra_range, tfmra_power
+
 
 class NoneRetracker(BaseRetracker):
     """
@@ -910,6 +1060,9 @@ class NoneRetracker(BaseRetracker):
 
 class SICCILead(BaseRetracker):
 
+    # Number of lead waveforms that are fitted in one array operation
+    batch_size = 2500
+
     def __init__(self):
         super(SICCILead, self).__init__()
 
@@ -928,47 +1081,50 @@ class SICCILead(BaseRetracker):
             self._filter_results()
 
     def _sicci_lead_retracker(self, range, wfm, indices):
-        from scipy.optimize import curve_fit
+        """
+        Fits the lead waveform model to all lead waveforms. The parameters are obtained with
+        an array version of the Levenberg-Marquardt solver of scipy.optimize.curve_fit for
+        batches of waveforms (see `p_lead_curve_fit_batch`)
+        """
+
         # retracker options (see l2 settings file)
         skip = self._options.skip_first_bins
         initial_guess = self._options.initial_guess
         maxfev = self._options.maxfev
         time = np.arange(wfm.shape[1]-skip).astype(float)
-        x = np.arange(wfm.shape[1])
-
-        # Loop over lead indices
-        for index in indices:
-            wave = wfm[index, skip:]
-            initial_guess[3] = np.max(wave)
-            try:
-                popt, cov = curve_fit(P_lead, time, wave.astype(float),
-                                      p0=initial_guess, maxfev=maxfev)
-            except:
-                continue
-                # popt = [np.nan, np.nan, np.nan, np.nan]
+
+        indices = np.asarray(indices)
+        for i0 in np.arange(0, len(indices), self.batch_size):
+            batch = indices[i0:i0+self.batch_size]
+
+            # Initial guess for each waveform (amplitude: maximum of waveform)
+            waves = wfm[batch, skip:].astype(float)
+            p0 = np.tile(np.array(initial_guess, dtype=float), (len(batch), 1))
+            p0[:, 3] = np.max(waves, axis=1)
+
+            # Fit all lead waveforms, failed fits are NaN
+            popt = p_lead_curve_fit_batch(time, waves, p0, maxfev)
+            is_fitted = np.all(np.isfinite(popt), axis=1)
+            fitted = batch[is_fitted]
+            popt = popt[is_fitted, :]
 
             # Store retracker parameter for filtering
             # tracking point in units of range bins
-            self.retracked_bin[index] = skip + popt[0]
-            self.k[index] = popt[1]
-            self.sigma[index] = popt[2]
-            self.alpha[index] = popt[3]
-            self.maximum_power_bin[index] = np.argmax(wave)
+            self.retracked_bin[fitted] = skip + popt[:, 0]
+            self.k[fitted] = popt[:, 1]
+            self.sigma[fitted] = popt[:, 2]
+            self.alpha[fitted] = popt[:, 3]
+            self.maximum_power_bin[fitted] = np.argmax(waves[is_fitted, :], axis=1)
 
             # Get derived parameter
-            self.power_in_echo_tail[index] = power_in_echo_tail(
-                wfm[index, :], self.retracked_bin[index], self.alpha[index])
-            self.rms_echo_and_model[index] = rms_echo_and_model(
-                wfm[index, :], self.retracked_bin[index],
-                self.k[index], self.sigma[index], self.alpha[index])
+            self.power_in_echo_tail[fitted] = power_in_echo_tail_batch(
+                wfm[fitted, :], self.retracked_bin[fitted], self.alpha[fitted])
+            self.rms_echo_and_model[fitted] = rms_echo_and_model_batch(
+                wfm[fitted, :], self.retracked_bin[fitted],
+                self.k[fitted], self.sigma[fitted], self.alpha[fitted])
 
             # Get the range by interpolation of range bin location
-            try:
-                self._range[index] = interp1d(
-                    x, range[index, :], kind='linear', copy=False)(
-                        self.retracked_bin[index])
-            except ValueError:
-                self._range[index] = np.nan
+            self._range[fitted] = interp_range_bin_batch(range[fitted, :], self.retracked_bin[fitted])
 
     def _filter_results(self):
         """ Filter the lead results based on threshold defined in SICCI """
@@ -1082,33 +1238,22 @@ class SICCIOcog(BaseRetracker):
         # percentage of earlier retracking point to estimate leading edge width
         lew_percentage = self._options.leading_edge_width_percentage
 
-        # dummy array for interpolation of actual retracker range window
-        x = np.arange(wfm.shape[1])
-
-        # Loop over waveform indices marked as leads
-        for index in indices:
-            wave = np.array(wfm[index, skip:]).astype("float64")
-            range_bin = ocog_func(wave, percentage, skip)
-            range_bin_lew = ocog_func(wave, lew_percentage, skip)
-            try:
-                self._range[index] = interp1d(
-                    x, range[index, :], kind='linear', copy=False)(range_bin)
-            except ValueError:
-                self.retracked_bin[index] = np.nan
-                self.leading_edge_width[index] = np.nan
-                self.tail_shape[index] = np.nan
-                continue
+        # Compute the OCOG retracking points for all waveforms at once
+        indices = np.asarray(indices)
+        wave = wfm[indices, skip:].astype("float64")
+        range_bin = ocog_func_batch(wave, percentage, skip)
+        range_bin_lew = ocog_func_batch(wave, lew_percentage, skip)
 
-            # Store additional retracker parameter
-            self.retracked_bin[index] = range_bin
-            self.leading_edge_width[index] = range_bin - range_bin_lew
-            try:
-                self.tail_shape[index] = ocog_tail_shape(
-                    wfm[index, :], range_bin)
-            except ValueError:
-                self.tail_shape[index] = np.nan
-            except TypeError:
-                self.tail_shape[index] = np.nan
+        # Interpolation of the range at the retracking point
+        # (retracking points outside the range window are invalid)
+        retracked_range = interp_range_bin_batch(range[indices, :], range_bin)
+        is_valid = np.logical_or(np.isfinite(retracked_range), np.isnan(range_bin))
+        self._range[indices] = retracked_range
+
+        # Store additional retracker parameter
+        self.retracked_bin[indices] = np.where(is_valid, range_bin, np.nan)
+        self.leading_edge_width[indices] = np.where(is_valid, range_bin - range_bin_lew, np.nan)
+        self.tail_shape[indices] = np.where(is_valid, ocog_tail_shape_batch(wfm[indices, :], range_bin), np.nan)
 
     def _filter_results(self):
         """ These threshold are based on the SICCI code"""
@@ -1207,7 +1352,7 @@ def smooth(x, window):
 
 def bnsmooth(x, window):
     """ Bottleneck implementation of the IDL SMOOTH function """
-    pad = (window-1)/2
+    pad = (window-1)//2
     n = len(x)
     xpad = np.ndarray(shape=(n+window))
     xpad[0:pad] = 0.0
@@ -1215,6 +1360,73 @@ def bnsmooth(x, window):
     xpad[n+pad:] = 0.0
     return bn.move_mean(xpad, window=window, axis=0)[window-1:(window+n-1)]
 
+
+def bnsmooth_batch(x, window):
+    """ Bottleneck implementation of the IDL SMOOTH function for each row of a 2D array """
+    pad = (window-1)//2
+    n_records, n = x.shape
+    xpad = np.zeros(shape=(n_records, n+window))
+    xpad[:, pad:n+pad] = x
+    return bn.move_mean(xpad, window=window, axis=1)[:, window-1:(window+n-1)]
+
+
+def tfmra_interpolate_batch(rng, wfm, oversampling):
+    """
+    Waveform oversampling for each row of (n_records, n_bins) range and power arrays
+    with the same results as cytfmra_interpolate (linear interpolation on an equidistant
+    grid between first and last range bin with single precision bin spacing)
+    :param rng: range bins (float32)
+    :param wfm: waveform power (float32)
+    :param oversampling: oversampling factor
+    :return: oversampled range and power arrays (float64)
+    """
+
+    n_records, n = rng.shape
+    n_os = n*oversampling
+
+    # Equidistant oversampled range bins
+    minval = rng[:, 0]
+    maxval = rng[:, n-1]
+    step = ((maxval-minval).astype(np.float64)/float(n_os-1)).astype(np.float32)
+    range_os = np.arange(n_os)[np.newaxis, :]*step[:, np.newaxis].astype(np.float64)
+    range_os += minval[:, np.newaxis].astype(np.float64)
+
+    xp = rng.astype(np.float64)
+    fp = wfm.astype(np.float64)
+
+    # Index of the last range bin <= the oversampled range (as np.searchsorted per record).
+    # Sorting the range bins and the oversampled range jointly (range bins first in case of
+    # identical values) gives the number of range bins below each oversampled range value
+    merged = np.concatenate((xp, range_os), axis=1)
+    order = np.argsort(merged, axis=1, kind="mergesort")
+    n_xp_below = np.cumsum(order < n, axis=1)
+    is_os = order >= n
+    record_index = np.repeat(np.arange(n_records), n_os)
+    j = np.empty((n_records, n_os), dtype=np.int64)
+    j[record_index, order[is_os]-n] = n_xp_below[is_os]
+    j -= 1
+
+    # Linear interpolation (see np.interp)
+    j0 = np.clip(j, 0, n-2)
+    record_index = np.arange(n_records)[:, np.newaxis]
+    x0, x1 = xp[record_index, j0], xp[record_index, j0+1]
+    y0, y1 = fp[record_index, j0], fp[record_index, j0+1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (y1-y0)/(x1-x0)
+        wfm_os = slope*(range_os - x0) + y0
+        is_nan = np.isnan(wfm_os)
+        wfm_os[is_nan] = (slope*(range_os - x1) + y1)[is_nan]
+        is_nan = np.logical_and(np.isnan(wfm_os), y0 == y1)
+        wfm_os[is_nan] = y0[is_nan]
+    wfm_os[j < 0] = fp[:, 0][np.where(j < 0)[0]]
+    wfm_os[j >= n-1] = fp[:, n-1][np.where(j >= n-1)[0]]
+    is_node = np.logical_and(j >= 0, j < n-1)
+    is_node = np.logical_and(is_node, range_os == x0)
+    wfm_os[is_node] = y0[is_node]
+    wfm_os[np.isnan(range_os)] = np.nan
+
+    return range_os, wfm_os
+
 def peakdet(v, delta, x=None):
     """
     Converted from MATLAB script at http://billauer.co.il/peakdet.html
@@ -1325,10 +1537,36 @@ def ocog_func(wave, percentage, skip):
     return x_range_bin
 
 
+def ocog_func_batch(wave, percentage, skip):
+    """ Array version of ocog_func for (n_records, n_bins) waveforms (NaN if no retracking point) """
+    n_records, n_bins = wave.shape
+    record_index = np.arange(n_records)
+    waveform = wave*wave
+    sq_sum = np.sum(waveform, axis=1)
+    waveform = waveform*waveform
+    qa_sum = np.sum(waveform, axis=1)
+    # Calculate retracking threshold (2.6.2 in ATDBv0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        threshold = percentage * np.sqrt(qa_sum / sq_sum)
+    is_over = wave > threshold[:, np.newaxis]
+    has_over = np.any(is_over, axis=1)
+    ind_first_over = np.argmax(is_over, axis=1)
+    # NOTE: the modulo reproduces the index wrap of ocog_func if the first bin is over the threshold
+    ind_before = (ind_first_over-1) % n_bins
+    with np.errstate(divide="ignore", invalid="ignore"):
+        decimal = (wave[record_index, ind_before] - threshold) / \
+            (wave[record_index, ind_before] - wave[record_index, ind_first_over])
+    x_range_bin = skip + ind_first_over - 1 + decimal
+    x_range_bin[~has_over] = np.nan
+    return x_range_bin
+
+
 def P_lead(t, t_0, k, sigma, a):
     """ Lead waveform model (for SICCILead curve fitting) """
     # Time for F to be F_L
-    t_b = k*sigma**2
+    # NOTE: sigma*sigma instead of sigma**2, since the power of numpy scalars is computed with
+    #       pow(), which may differ in the last digit from the square of arrays (batched fit)
+    t_b = k*(sigma*sigma)
     # Helper coefficient
     sq_ktb = np.sqrt(k*t_b)
     # Polynomial coefficients for F_L
@@ -1361,6 +1599,544 @@ def power_in_echo_tail(wfm, retracked_bin, alpha, pad=3):
         return np.nan
 
 
+# Machine constants of MINPACK (dpmpar: machine precision, smallest magnitude) and the
+# limits of the scaled summation in enorm. The literal values of MINPACK are required
+# for identical results as scipy.optimize.curve_fit (e.g. the forward-difference step)
+MINPACK_EPSMCH = 2.22044604926e-16
+MINPACK_DWARF = 2.22507385852e-308
+MINPACK_RDWARF = 3.834e-20
+MINPACK_RGIANT = 1.304e19
+
+
+def enorm_batch(x):
+    """
+    Euclidean norm along the last axis as computed by the MINPACK routine enorm: squares of
+    intermediate components are summed sequentially, small and large components are summed
+    with scaling. The (slow) scaled summation is only done for records where it changes the norm
+    """
+    shape, m = x.shape[:-1], x.shape[-1]
+    xabs = np.abs(x).reshape(-1, m)
+    agiant = MINPACK_RGIANT/m
+    is_intermediate = np.logical_and(xabs > MINPACK_RDWARF, xabs < agiant)
+    s2 = np.cumsum(np.where(is_intermediate, xabs*xabs, 0.0), axis=1)[:, -1]
+    norm = np.sqrt(s2)
+
+    # Records with large (or NaN) components and records where small components
+    # are not negligible for the norm
+    with np.errstate(all="ignore"):
+        is_small = np.logical_and(~is_intermediate, xabs <= MINPACK_RDWARF)
+        x3max = np.max(np.where(is_small, xabs, 0.0), axis=1)
+        s3 = np.sum(np.where(np.logical_and(is_small, xabs != 0), xabs/x3max[:, np.newaxis], 0.0)**2, axis=1)
+        is_scaled = np.any(np.logical_and(~is_intermediate, ~is_small), axis=1)
+        is_scaled |= np.logical_and(x3max != 0, ~((x3max/s2)*(x3max*s3) < 1.0e-16))
+    records = np.where(is_scaled)[0]
+    if len(records) > 0:
+        norm[records] = _enorm_scaled_batch(xabs[records], s2[records], agiant)
+    return norm.reshape(shape)
+
+
+def _enorm_scaled_batch(xabs, s2, agiant):
+    """ Scaled summation of small and large components of the MINPACK routine enorm """
+    n_records, m = xabs.shape
+    s1, s3 = np.zeros(n_records), np.zeros(n_records)
+    x1max, x3max = np.zeros(n_records), np.zeros(n_records)
+    with np.errstate(all="ignore"):
+        # Zero and intermediate components do not change the scaled sums
+        is_scaled = np.logical_and(xabs != 0, ~np.logical_and(xabs > MINPACK_RDWARF, xabs < agiant))
+        for i in np.where(np.any(is_scaled, axis=0))[0]:
+            xi = xabs[:, i]
+            is_intermediate = np.logical_and(xi > MINPACK_RDWARF, xi < agiant)
+            is_small = np.logical_and(~is_intermediate, xi <= MINPACK_RDWARF)
+            is_large = np.logical_and(~is_intermediate, ~is_small)
+            is_max = np.logical_and(is_large, ~(xi <= x1max))
+            s1 = np.where(is_max, 1.0 + s1*(x1max/xi)*(x1max/xi),
+                          np.where(is_large, s1 + (xi/x1max)*(xi/x1max), s1))
+            x1max = np.where(is_max, xi, x1max)
+            is_max = np.logical_and(is_small, ~(xi <= x3max))
+            s3 = np.where(is_max, 1.0 + s3*(x3max/xi)*(x3max/xi),
+                          np.where(np.logical_and(is_small, xi != 0), s3 + (xi/x3max)*(xi/x3max), s3))
+            x3max = np.where(is_max, xi, x3max)
+        norm = np.where(s2 >= x3max, np.sqrt(s2*(1.0+(x3max/s2)*(x3max*s3))),
+                        np.sqrt(x3max*((s2/x3max)+(x3max*s3))))
+        norm = np.where(s2 == 0, x3max*np.sqrt(s3), norm)
+        norm = np.where(s1 != 0, x1max*np.sqrt(s1+(s2/x1max)/x1max), norm)
+    return norm
+
+
+def _dot_batch(x, y):
+    """ Dot product along the last axis (sequential summation as in MINPACK) """
+    return np.cumsum(x*y, axis=-1)[..., -1]
+
+
+def qr_factorization_batch(a):
+    """
+    Batched version of the MINPACK routine qrfac: QR factorization with column pivoting
+    of stacked matrices with Householder transformations
+
+    :param a: stacked matrices (n_records, n, m), the n columns of each matrix as rows
+    :return: a (Householder vectors and strict upper triangle of R), ipvt (permutation),
+             rdiag (diagonal of R), acnorm (norms of the columns of the input matrices)
+    """
+    a = a.copy()
+    n_records, n, m = a.shape
+    rows = np.arange(n_records)
+    acnorm = enorm_batch(a)
+    rdiag = acnorm.copy()
+    wa = rdiag.copy()
+    ipvt = np.tile(np.arange(n), (n_records, 1))
+    for j in np.arange(min(m, n)):
+
+        # Bring the column of largest norm into the pivot position
+        kmax = np.full(n_records, j)
+        for k in np.arange(j+1, n):
+            kmax = np.where(rdiag[rows, k] > rdiag[rows, kmax], k, kmax)
+        col_j, col_kmax = a[rows, j, :].copy(), a[rows, kmax, :].copy()
+        a[rows, j, :] = col_kmax
+        a[rows, kmax, :] = col_j
+        rdiag[rows, kmax] = rdiag[rows, j]
+        wa[rows, kmax] = wa[rows, j]
+        ipvt_j = ipvt[rows, j].copy()
+        ipvt[rows, j] = ipvt[rows, kmax]
+        ipvt[rows, kmax] = ipvt_j
+
+        # Householder transformation to reduce the j-th column to a multiple of the j-th unit vector
+        ajnorm = enorm_batch(a[:, j, j:])
+        nonzero = ajnorm != 0
+        ajnorm = np.where(np.logical_and(nonzero, a[:, j, j] < 0), -ajnorm, ajnorm)
+        with np.errstate(all="ignore"):
+            a[:, j, j:] = np.where(nonzero[:, np.newaxis], a[:, j, j:]/ajnorm[:, np.newaxis], a[:, j, j:])
+        a[:, j, j] = np.where(nonzero, a[:, j, j] + 1.0, a[:, j, j])
+
+        # Apply the transformation to the remaining columns and update the norms
+        for k in np.arange(j+1, n):
+            with np.errstate(all="ignore"):
+                temp = _dot_batch(a[:, j, j:], a[:, k, j:]) / a[:, j, j]
+                a[:, k, j:] = np.where(nonzero[:, np.newaxis], a[:, k, j:] - temp[:, np.newaxis]*a[:, j, j:],
+                                       a[:, k, j:])
+                is_update = np.logical_and(nonzero, rdiag[:, k] != 0)
+                temp = a[:, k, j]/rdiag[:, k]
+                rdiag_k = rdiag[:, k]*np.sqrt(np.maximum(0.0, 1.0-temp*temp))
+                is_recompute = ~(0.05*(rdiag_k/wa[:, k])**2 > MINPACK_EPSMCH)
+                norm = enorm_batch(a[:, k, j+1:])
+            rdiag[:, k] = np.where(is_update, np.where(is_recompute, norm, rdiag_k), rdiag[:, k])
+            wa[:, k] = np.where(np.logical_and(is_update, is_recompute), norm, wa[:, k])
+        rdiag[:, j] = -ajnorm
+    return a, ipvt, rdiag, acnorm
+
+
+def qr_solve_batch(r, ipvt, diag, qtb):
+    """
+    Batched version of the MINPACK routine qrsolv: Least-squares solution x of the stacked
+    system [J; D] x = [f; 0] from the QR factorization of J (J P = Q R) and Q^T f, where the
+    diagonal matrix D is eliminated with Givens rotations
+
+    :param r: upper triangle of R (n_records, n, n)
+    :param ipvt: column permutation of the QR factorization (n_records, n)
+    :param diag: diagonal elements of D (n_records, n)
+    :param qtb: first n elements of Q^T f (n_records, n)
+    :return: x, sdiag (diagonal of S), s (R with the strict lower triangle of S, where
+             P^T (J^T J + D D) P = S^T S)
+    """
+    n_records, n = qtb.shape
+    rows = np.arange(n_records)
+    r = r.copy()
+    x = np.empty((n_records, n))
+    for j in np.arange(n):
+        for i in np.arange(j, n):
+            r[:, i, j] = r[:, j, i]
+        x[:, j] = r[:, j, j]
+    wa = qtb.copy()
+    sdiag = np.zeros((n_records, n))
+
+    # Eliminate the diagonal matrix D using Givens rotations
+    for j in np.arange(n):
+        diag_l = diag[rows, ipvt[:, j]]
+        is_nonzero = diag_l != 0
+        sdiag[:, j:] = np.where(is_nonzero[:, np.newaxis], 0.0, sdiag[:, j:])
+        sdiag[:, j] = np.where(is_nonzero, diag_l, sdiag[:, j])
+        qtbpj = np.zeros(n_records)
+        for k in np.arange(j, n):
+            is_rotation = np.logical_and(is_nonzero, sdiag[:, k] != 0)
+            if not np.any(is_rotation):
+                continue
+            with np.errstate(all="ignore"):
+                rkk, sdk = r[:, k, k], sdiag[:, k]
+                cotan = rkk/sdk
+                sin_1 = 0.5/np.sqrt(0.25+0.25*cotan*cotan)
+                cos_1 = sin_1*cotan
+                tan = sdk/rkk
+                cos_2 = 0.5/np.sqrt(0.25+0.25*tan*tan)
+                sin_2 = cos_2*tan
+                is_cotan = np.abs(rkk) < np.abs(sdk)
+                sin = np.where(is_cotan, sin_1, sin_2)
+                cos = np.where(is_cotan, cos_1, cos_2)
+            r[:, k, k] = np.where(is_rotation, cos*rkk + sin*sdk, rkk)
+            temp = cos*wa[:, k] + sin*qtbpj
+            qtbpj = np.where(is_rotation, -sin*wa[:, k] + cos*qtbpj, qtbpj)
+            wa[:, k] = np.where(is_rotation, temp, wa[:, k])
+            for i in np.arange(k+1, n):
+                temp = cos*r[:, i, k] + sin*sdiag[:, i]
+                sdiag[:, i] = np.where(is_rotation, -sin*r[:, i, k] + cos*sdiag[:, i], sdiag[:, i])
+                r[:, i, k] = np.where(is_rotation, temp, r[:, i, k])
+        sdiag[:, j] = r[:, j, j]
+        r[:, j, j] = x[:, j]
+
+    # Solve the triangular system (least-squares solution if singular)
+    nsing = np.full(n_records, n)
+    for j in np.arange(n):
+        nsing = np.where(np.logical_and(sdiag[:, j] == 0, nsing == n), j, nsing)
+        wa[:, j] = np.where(nsing < n, 0.0, wa[:, j])
+    for j in np.arange(n-1, -1, -1):
+        is_solve = j < nsing
+        total = np.zeros(n_records)
+        for i in np.arange(j+1, n):
+            total += np.where(i < nsing, r[:, i, j]*wa[:, i], 0.0)
+        with np.errstate(all="ignore"):
+            wa[:, j] = np.where(is_solve, (wa[:, j] - total)/sdiag[:, j], wa[:, j])
+    x[rows[:, np.newaxis], ipvt] = wa
+    return x, sdiag, r
+
+
+def lm_parameter_batch(r, ipvt, diag, qtb, delta, par):
+    """
+    Batched version of the MINPACK routine lmpar: Determines the Levenberg-Marquardt parameter
+    for each record, so that the scaled step length is (approximately) the trust region radius delta.
+    The step is the least-squares solution of [J; sqrt(par) D] x = [f; 0] (see qr_solve_batch)
+
+    :param r: upper triangle of R of the QR factorization of the Jacobian (n_records, n, n)
+    :param ipvt: column permutation of the QR factorization (n_records, n)
+    :param diag: scaling (n_records, n)
+    :param qtb: first n elements of Q^T f (n_records, n)
+    :param delta: trust region radius (n_records)
+    :param par: initial estimate of the Levenberg-Marquardt parameter (n_records)
+    :return: x (negative step), par
+    """
+    n_records, n = qtb.shape
+    rows = np.arange(n_records)
+    col = rows[:, np.newaxis]
+
+    # Gauss-Newton direction (least-squares solution if rank-deficient)
+    wa1 = qtb.copy()
+    nsing = np.full(n_records, n)
+    for j in np.arange(n):
+        nsing = np.where(np.logical_and(r[:, j, j] == 0, nsing == n), j, nsing)
+        wa1[:, j] = np.where(nsing < n, 0.0, wa1[:, j])
+    for j in np.arange(n-1, -1, -1):
+        is_solve = j < nsing
+        with np.errstate(all="ignore"):
+            wa1[:, j] = np.where(is_solve, wa1[:, j]/r[:, j, j], wa1[:, j])
+            for i in np.arange(j):
+                wa1[:, i] = np.where(is_solve, wa1[:, i] - r[:, i, j]*wa1[:, j], wa1[:, i])
+    x = np.empty((n_records, n))
+    x[col, ipvt] = wa1
+
+    # Evaluate the function at the origin and test for acceptance of the Gauss-Newton direction
+    n_iter = np.zeros(n_records, dtype=np.int64)
+    wa2 = diag*x
+    dxnorm = enorm_batch(wa2)
+    fp = dxnorm - delta
+    is_done = fp <= 0.1*delta
+    if np.all(is_done):
+        return x, np.zeros(n_records)
+
+    with np.errstate(all="ignore"):
+
+        # Lower bound parl of the zero of the function (zero if rank-deficient)
+        parl = np.zeros(n_records)
+        wa1 = diag[col, ipvt]*(wa2[col, ipvt]/dxnorm[:, np.newaxis])
+        for j in np.arange(n):
+            total = np.zeros(n_records)
+            for i in np.arange(j):
+                total += r[:, i, j]*wa1[:, i]
+            wa1[:, j] = (wa1[:, j] - total)/r[:, j, j]
+        temp = enorm_batch(wa1)
+        parl = np.where(nsing >= n, ((fp/delta)/temp)/temp, parl)
+
+        # Upper bound paru of the zero of the function
+        for j in np.arange(n):
+            total = np.zeros(n_records)
+            for i in np.arange(j+1):
+                total += r[:, i, j]*qtb[:, i]
+            wa1[:, j] = total/diag[rows, ipvt[:, j]]
+        gnorm = enorm_batch(wa1)
+        paru = gnorm/delta
+        paru = np.where(paru == 0, MINPACK_DWARF/np.minimum(delta, 0.1), paru)
+
+        # Initial Levenberg-Marquardt parameter
+        par = np.maximum(par, parl)
+        par = np.minimum(par, paru)
+        par = np.where(par == 0, gnorm/dxnorm, par)
+
+        while not np.all(is_done):
+            active = ~is_done
+            n_iter[active] += 1
+            par = np.where(np.logical_and(active, par == 0), np.maximum(MINPACK_DWARF, 0.001*paru), par)
+            x_par, sdiag, s = qr_solve_batch(r, ipvt, np.sqrt(par)[:, np.newaxis]*diag, qtb)
+            x[active] = x_par[active]
+            wa2 = diag*x
+            dxnorm = enorm_batch(wa2)
+            fp_old = fp
+            fp = np.where(active, dxnorm - delta, fp)
+
+            # Convergence test
+            is_final = np.abs(fp) <= 0.1*delta
+            is_final |= np.logical_and.reduce((parl == 0, fp <= fp_old, fp_old < 0))
+            is_final |= n_iter == 10
+            is_done |= np.logical_and(active, is_final)
+            update = np.logical_and(active, ~is_final)
+            if not np.any(update):
+                break
+
+            # Newton correction
+            wa1 = diag[col, ipvt]*(wa2[col, ipvt]/dxnorm[:, np.newaxis])
+            for j in np.arange(n):
+                wa1[:, j] = wa1[:, j]/sdiag[:, j]
+                for i in np.arange(j+1, n):
+                    wa1[:, i] = wa1[:, i] - s[:, i, j]*wa1[:, j]
+            temp = enorm_batch(wa1)
+            parc = ((fp/delta)/temp)/temp
+
+            # Update the bounds and the parameter
+            parl = np.where(np.logical_and(update, fp > 0), np.maximum(parl, par), parl)
+            paru = np.where(np.logical_and(update, fp < 0), np.minimum(paru, par), paru)
+            par = np.where(update, np.maximum(parl, par + parc), par)
+
+    par = np.where(n_iter == 0, 0.0, par)
+    return x, par
+
+
+def p_lead_curve_fit_batch(t, waves, p0, maxfev, ftol=1.49012e-08, xtol=1.49012e-08):
+    """
+    Least-squares fit of the lead waveform model `P_lead` to several waveforms at once. This is
+    an array version of the MINPACK Levenberg-Marquardt algorithm lmdif (used by
+    scipy.optimize.curve_fit with the same default settings) with forward-difference Jacobian,
+    QR factorization with column pivoting and trust region, where each operation is applied to
+    the stacked arrays of all waveforms that are not yet converged.
+
+    NOTE: The operations (and their order) follow the Fortran code to obtain the same results as
+          curve_fit: The lead waveform model is not smooth and the least-squares problem has
+          several local minima, so that already differences in the last digit may lead the fit
+          to a different local minimum.
+
+    :param t: time/bin coordinate (n_bins)
+    :param waves: waveforms (n_records, n_bins)
+    :param p0: initial guess of parameters [t_0, k, sigma, a] (n_records, 4)
+    :param maxfev: maximum number of model evaluations per waveform
+    :param ftol: relative tolerance of the sum of squared residuals
+    :param xtol: relative tolerance of the parameter change
+    :return: fitted parameters (n_records, 4), NaN for waveforms where the fit did not converge
+    """
+
+    n_records, n = p0.shape
+    eps = np.sqrt(MINPACK_EPSMCH)
+    factor = 100.
+    t = t[np.newaxis, :]
+
+    def model(p):
+        return P_lead(t, p[:, 0:1], p[:, 1:2], p[:, 2:3], p[:, 3:4])
+
+    p = p0.astype(float).copy()
+    with np.errstate(all="ignore"):
+        f = model(p) - waves
+    fnorm = enorm_batch(f)
+    nfev = np.ones(n_records, dtype=np.int64)
+    r = np.zeros((n_records, n, n))
+    ipvt = np.tile(np.arange(n), (n_records, 1))
+    qtf = np.zeros((n_records, n))
+    gnorm = np.zeros(n_records)
+    diag = np.ones((n_records, n))
+    delta = np.zeros(n_records)
+    par = np.zeros(n_records)
+    xnorm = np.zeros(n_records)
+    is_first = np.ones(n_records, dtype=bool)
+    needs_jacobian = np.ones(n_records, dtype=bool)
+    is_active = np.all(np.isfinite(waves), axis=1)
+    is_converged = np.zeros(n_records, dtype=bool)
+
+    while np.any(is_active):
+
+        # Forward difference Jacobian and its QR factorization for records with new parameters
+        records = np.where(np.logical_and(is_active, needs_jacobian))[0]
+        if len(records) > 0:
+            pr, fr, wr = p[records, :], f[records, :], waves[records, :]
+            jac = np.empty((len(records), n, fr.shape[1]))
+            with np.errstate(all="ignore"):
+                for j in np.arange(n):
+                    h = eps*np.abs(pr[:, j])
+                    h[h == 0] = eps
+                    pj = pr.copy()
+                    pj[:, j] += h
+                    jac[:, j, :] = (model(pj) - wr - fr) / h[:, np.newaxis]
+            nfev[records] += n
+            a, ipvt_r, rdiag, acnorm = qr_factorization_batch(jac)
+
+            # Scaling and initial trust region radius (first iteration)
+            first = is_first[records]
+            diag_r = np.where(first[:, np.newaxis], np.where(acnorm == 0, 1.0, acnorm), diag[records])
+            xn = enorm_batch(diag_r*pr)
+            xnorm[records] = np.where(first, xn, xnorm[records])
+            delta[records] = np.where(first, np.where(factor*xn == 0, factor, factor*xn), delta[records])
+
+            # Q^T f and R
+            wa4 = fr.copy()
+            for j in np.arange(n):
+                with np.errstate(all="ignore"):
+                    temp = -_dot_batch(a[:, j, j:], wa4[:, j:]) / a[:, j, j]
+                    wa4[:, j:] = np.where((a[:, j, j] != 0)[:, np.newaxis],
+                                          wa4[:, j:] + a[:, j, j:]*temp[:, np.newaxis], wa4[:, j:])
+                a[:, j, j] = rdiag[:, j]
+            qtf[records] = wa4[:, :n]
+            r[records] = np.transpose(a[:, :, :n], (0, 2, 1))
+            ipvt[records] = ipvt_r
+
+            # Norm of the scaled gradient
+            rows = np.arange(len(records))
+            gn = np.zeros(len(records))
+            fn = fnorm[records]
+            with np.errstate(all="ignore"):
+                for j in np.arange(n):
+                    acnorm_l = acnorm[rows, ipvt_r[:, j]]
+                    total = np.zeros(len(records))
+                    for i in np.arange(j+1):
+                        total += r[records, i, j]*(qtf[records, i]/fn)
+                    gn = np.where(np.logical_and(fn != 0, acnorm_l != 0),
+                                  np.maximum(gn, np.abs(total/acnorm_l)), gn)
+            gnorm[records] = gn
+            diag[records] = np.maximum(diag_r, acnorm)
+            needs_jacobian[records] = False
+
+            # Test for convergence of the gradient norm (gtol=0)
+            is_zero_gradient = gn <= 0
+            is_converged[records[is_zero_gradient]] = True
+            is_active[records[is_zero_gradient]] = False
+            if not np.any(is_active):
+                break
+
+        # Trial step for all active records
+        active = np.where(is_active)[0]
+        with np.errstate(all="ignore"):
+            step, par_a = lm_parameter_batch(r[active], ipvt[active], diag[active], qtf[active],
+                                             delta[active], par[active])
+            step = -step
+            p_trial = p[active, :] + step
+            pnorm = enorm_batch(diag[active]*step)
+            delta[active] = np.where(is_first[active], np.minimum(delta[active], pnorm), delta[active])
+            f_trial = model(p_trial) - waves[active, :]
+            fnorm1 = enorm_batch(f_trial)
+            nfev[active] += 1
+
+            # Scaled actual and predicted reduction and scaled directional derivative
+            fn = fnorm[active]
+            actred = np.where(0.1*fnorm1 < fn, 1.0 - (fnorm1/fn)**2, -1.0)
+            rows = np.arange(len(active))
+            r_a, ipvt_a = r[active], ipvt[active]
+            wa3 = np.zeros((len(active), n))
+            for j in np.arange(n):
+                temp = step[rows, ipvt_a[:, j]]
+                for i in np.arange(j+1):
+                    wa3[:, i] += r_a[:, i, j]*temp
+            temp1 = enorm_batch(wa3)/fn
+            temp2 = (np.sqrt(par_a)*pnorm)/fn
+            prered = temp1*temp1 + temp2*temp2/0.5
+            dirder = -(temp1*temp1 + temp2*temp2)
+            ratio = np.where(prered != 0, actred/prered, 0.0)
+
+            # Update the trust region radius and the Levenberg-Marquardt parameter
+            temp = np.where(actred >= 0, 0.5, np.where(actred < 0, 0.5*dirder/(dirder + 0.5*actred), np.nan))
+            temp = np.where(np.logical_or(0.1*fnorm1 >= fn, temp < 0.1), 0.1, temp)
+            is_shrink = ~(ratio > 0.25)
+            is_expand = np.logical_and(~is_shrink, ~np.logical_and(par_a != 0, ratio < 0.75))
+            d = delta[active]
+            d = np.where(is_shrink, temp*np.minimum(d, pnorm/0.1), d)
+            d = np.where(is_expand, pnorm/0.5, d)
+            delta[active] = d
+            par[active] = np.where(is_shrink, par_a/temp, np.where(is_expand, 0.5*par_a, par_a))
+
+        # Accept successful steps
+        is_success = ratio >= 1.0e-4
+        success = active[is_success]
+        p[success, :] = p_trial[is_success, :]
+        f[success, :] = f_trial[is_success, :]
+        fnorm[success] = fnorm1[is_success]
+        xnorm[success] = enorm_batch(diag[success]*p[success, :])
+        is_first[success] = False
+        needs_jacobian[success] = True
+
+        # Convergence & termination tests (failed: maxfev reached or tolerances too small)
+        xn = xnorm[active]
+        converged = np.logical_and.reduce((np.abs(actred) <= ftol, prered <= ftol, 0.5*ratio <= 1.0))
+        converged |= delta[active] <= xtol*xn
+        failed = nfev[active] >= maxfev
+        failed |= np.logical_and.reduce((np.abs(actred) <= MINPACK_EPSMCH, prered <= MINPACK_EPSMCH,
+                                         0.5*ratio <= 1.0))
+        failed |= delta[active] <= MINPACK_EPSMCH*xn
+        failed |= gnorm[active] <= MINPACK_EPSMCH
+        is_converged[active[converged]] = True
+        is_active[active[np.logical_or(converged, failed)]] = False
+
+    p[~is_converged, :] = np.nan
+    return p
+
+
+def power_in_echo_tail_batch(wfm, retracked_bin, alpha, pad=3):
+    """ Array version of power_in_echo_tail for (n_records, n_bins) waveforms """
+    n_records, n_bins = wfm.shape
+    power = np.full(n_records, np.nan)
+    is_valid = np.isfinite(retracked_bin)
+    tracking_point = np.zeros(n_records, dtype=np.int64)
+    tracking_point[is_valid] = retracked_bin[is_valid].astype(np.int64)
+    start = tracking_point + pad
+    # Negative start indices follow python slice semantics
+    start[start < 0] += n_bins
+    start = np.clip(start, 0, n_bins)
+    is_tail = np.arange(n_bins)[np.newaxis, :] >= start[:, np.newaxis]
+    tail_sum = np.sum(np.where(is_tail, wfm, 0.0), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        power[is_valid] = tail_sum[is_valid]/alpha[is_valid]
+    return power
+
+
+def rms_echo_and_model_batch(wfm, retracked_bin, k, sigma, alpha):
+    """ Array version of rms_echo_and_model for (n_records, n_bins) waveforms """
+    n_records, n_bins = wfm.shape
+    rms = np.full(n_records, np.nan)
+    is_valid = np.isfinite(retracked_bin)
+    tracking_point = np.zeros(n_records, dtype=np.int64)
+    tracking_point[is_valid] = retracked_bin[is_valid].astype(np.int64)
+    time = np.arange(n_bins).astype(float)[np.newaxis, :]
+    with np.errstate(all="ignore"):
+        modelled_wave = P_lead(time, retracked_bin[:, np.newaxis], k[:, np.newaxis],
+                               sigma[:, np.newaxis], alpha[:, np.newaxis])
+    # The echo rise are the five bins before the tracking point (python slice semantics)
+    start, stop = tracking_point-4, tracking_point+1
+    start[start < 0] += n_bins
+    stop[stop < 0] += n_bins
+    start, stop = np.clip(start, 0, n_bins), np.clip(stop, 0, n_bins)
+    bins = np.arange(n_bins)[np.newaxis, :]
+    is_rise = np.logical_and(bins >= start[:, np.newaxis], bins < stop[:, np.newaxis])
+    diff = np.where(is_rise, wfm - modelled_wave, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.sqrt(np.sum(diff*diff, axis=1)/5)/alpha
+    rms[is_valid] = value[is_valid]
+    return rms
+
+
+def interp_range_bin_batch(rng, range_bin):
+    """
+    Linear interpolation of the range at fractional range bin positions for
+    (n_records, n_bins) range arrays (NaN for range bins outside the range window)
+    """
+    n_records, n_bins = rng.shape
+    result = np.full(n_records, np.nan)
+    is_valid = np.logical_and(range_bin >= 0, range_bin <= n_bins-1)
+    records = np.where(is_valid)[0]
+    x = range_bin[records].astype(np.float64)
+    i0 = np.clip(np.floor(x).astype(np.int64), 0, n_bins-2)
+    r0, r1 = rng[records, i0], rng[records, i0+1]
+    result[records] = (r1 - r0)*(x - i0) + r0
+    return result
+
+
 def ocog_tail_shape(wfm, tracking_point, tail_pad=3):
     """ From SICCI module """
     tail = wfm[tracking_point+tail_pad:]
@@ -1370,6 +2146,42 @@ def ocog_tail_shape(wfm, tracking_point, tail_pad=3):
     return np.sqrt(np.sum(residual*residual) / len(residual))
 
 
+def ocog_tail_shape_batch(wfm, tracking_point, tail_pad=3):
+    """
+    Array version of ocog_tail_shape for (n_records, n_bins) waveforms: rms of the residuals
+    of a linear fit to the normalized waveform tail (all records at once with the closed form
+    solution of the linear least-squares fit). The tracking point is truncated to a bin index.
+    """
+    n_records, n_bins = wfm.shape
+    tail_shape = np.full(n_records, np.nan)
+    is_valid = np.isfinite(tracking_point)
+    start = np.full(n_records, n_bins, dtype=np.int64)
+    start[is_valid] = tracking_point[is_valid].astype(np.int64) + tail_pad
+    start = np.clip(start, 0, n_bins)
+    n = (n_bins - start).astype(float)
+
+    # Waveform tail, normalized by its mean, with bin coordinates starting at 0
+    bins = np.arange(n_bins)[np.newaxis, :]
+    is_tail = bins >= start[:, np.newaxis]
+    x = np.where(is_tail, bins - start[:, np.newaxis], 0).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tail_mean = np.sum(np.where(is_tail, wfm, 0.0), axis=1) / n
+        y = np.where(is_tail, wfm / tail_mean[:, np.newaxis], 0.0)
+
+        # Linear fit y = a*x + b
+        sx, sy = np.sum(x, axis=1), np.sum(y, axis=1)
+        sxx, sxy = np.sum(x*x, axis=1), np.sum(x*y, axis=1)
+        a = (n*sxy - sx*sy) / (n*sxx - sx*sx)
+        b = (sy - a*sx) / n
+        residual = np.where(is_tail, y - (a[:, np.newaxis]*x + b[:, np.newaxis]), 0.0)
+        rms = np.sqrt(np.sum(residual*residual, axis=1) / n)
+
+    # A linear fit requires at least two points
+    is_valid = np.logical_and(is_valid, n >= 2)
+    tail_shape[is_valid] = rms[is_valid]
+    return tail_shape
+
+
 def rms_echo_and_model(wfm, retracked_bin, k, sigma, alpha):
     """
     The root sum squared difference between the echo and the fitted function
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+NaN-aware running window statistics (count, mean, standard deviation)
+for 1D arrays based on cumulative sums, i.e. the computational cost does
+not depend on the window size.
+
+Two conventions for the window at the edges of the array are supported:
+
+    clip (default)
+        The window is cut at the array boundaries:
+        x[max(i-pad, 0):min(i+pad+1, n)]
+
+    shrink
+        The half width of the window is reduced at the array boundaries
+        so that the window stays centered at the sample (as used by
+        `pysiral.filter.idl_smooth`)
+
+with pad = floor((window-1)/2)
+
+Note: The results are identical to nanmean/nanstd of the explicit window
+subsets up to floating point accuracy (sums are accumulated in double
+precision relative to the mean of the finite values of the array). As for
+nanmean/nanstd, +/-inf are valid samples: The mean of a window with +inf
+(-inf) is +inf (-inf), NaN if it contains both, and the standard deviation
+of a window with an infinite value is NaN.
+"""
+
+import numpy as np
+
+
+VALID_EDGE_MODES = ["clip", "shrink"]
+
+
+def get_running_window_bounds(n, window, edges="clip"):
+    """
+    Returns the start (inclusive) and stop (exclusive) index of the
+    running window for each of the n samples
+    """
+    if edges not in VALID_EDGE_MODES:
+        raise ValueError("Invalid edge mode: %s (%s)" % (
+            str(edges), ", ".join(VALID_EDGE_MODES)))
+    pad = get_window_pad(window)
+    index = np.arange(n)
+    if edges == "shrink":
+        pad = np.minimum(np.minimum(index, n-1-index), pad)
+    i0 = np.maximum(index-pad, 0)
+    i1 = np.minimum(index+pad+1, n)
+    return i0, i1
+
+
+def get_window_pad(window):
+    """ Number of samples on each side of the window center """
+    return int(np.floor((window-1)/2.0))
+
+
+def running_window_count(x, window, edges="clip"):
+    """ Number of valid (not NaN) samples in the running window """
+    count, mean, std = running_window_stats(x, window, edges=edges)
+    return count
+
+
+def running_window_mean(x, window, edges="clip"):
+    """ Running window mean ignoring NaN's (NaN for windows without
+    valid samples) """
+    count, mean, std = running_window_stats(x, window, edges=edges)
+    return mean
+
+
+def running_window_std(x, window, edges="clip"):
+    """ Running window standard deviation (ddof=0) ignoring NaN's (NaN for
+    windows without valid samples) """
+    count, mean, std = running_window_stats(x, window, edges=edges)
+    return std
+
+
+def running_window_stats(x, window, edges="clip"):
+    """
+    Computes count of valid samples, mean and standard deviation (ddof=0)
+    in a running window ignoring NaN's
+
+    Arguments:
+        x (array): 1D input array
+        window (int): full window size in samples
+        edges (str): window handling at the edges ("clip" or "shrink")
+
+    Returns:
+        count (int array), mean, std (float arrays with dtype of x for
+        floating point input)
+    """
+
+    x = np.asarray(x)
+    n = len(x)
+    dtype = np.result_type(x, np.nan)
+    if n == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype), np.zeros(0, dtype)
+
+    # Cumulative sums of finite values (relative to the overall mean
+    # to reduce the loss of precision for the variance) and number of
+    # valid (not NaN) and infinite values
+    is_finite = np.isfinite(x)
+    offset = np.mean(x[is_finite]) if np.any(is_finite) else 0.0
+    values = np.where(is_finite, x.astype(np.float64)-offset, 0.0)
+    valid_cumsum = _cumsum0(np.logical_not(np.isnan(x)).astype(np.int64))
+    finite_cumsum = _cumsum0(is_finite.astype(np.int64))
+    posinf_cumsum = _cumsum0(np.isposinf(x).astype(np.int64))
+    neginf_cumsum = _cumsum0(np.isneginf(x).astype(np.int64))
+    sum_cumsum = _cumsum0(values)
+    sqr_cumsum = _cumsum0(values**2.0)
+
+    # Window sums
+    i0, i1 = get_running_window_bounds(n, window, edges=edges)
+    count = valid_cumsum[i1] - valid_cumsum[i0]
+    n_finite = finite_cumsum[i1] - finite_cumsum[i0]
+    window_sum = sum_cumsum[i1] - sum_cumsum[i0]
+    window_sqr = sqr_cumsum[i1] - sqr_cumsum[i0]
+
+    # Statistics (NaN for windows without valid samples)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = window_sum/n_finite
+        variance = window_sqr/n_finite - mean**2.0
+    variance = np.maximum(variance, 0.0)
+    mean = mean + offset
+
+    # Windows with a single finite sample: use the exact value (avoid
+    # round-off from the cumulative sums)
+    is_single = n_finite == 1
+    if np.any(is_single):
+        last_finite = np.maximum.accumulate(np.where(is_finite, np.arange(n), 0))
+        mean[is_single] = x[last_finite[i1[is_single]-1]]
+        variance[is_single] = 0.0
+
+    # Windows with infinite values (as nanmean/nanstd)
+    n_posinf = posinf_cumsum[i1] - posinf_cumsum[i0]
+    n_neginf = neginf_cumsum[i1] - neginf_cumsum[i0]
+    mean[n_posinf > 0] = np.inf
+    mean[n_neginf > 0] = -np.inf
+    mean[np.logical_and(n_posinf > 0, n_neginf > 0)] = np.nan
+    variance[n_posinf + n_neginf > 0] = np.nan
+
+    return count, mean.astype(dtype), np.sqrt(variance).astype(dtype)
+
+
+def running_window_subsets(x, window, indices=None, edges="clip",
+                           fill_value=np.nan):
+    """
+    Returns the running window subsets as 2D array (len(indices), window),
+    samples outside the window boundaries are set to `fill_value`.
+    Intended for statistics that cannot be expressed with cumulative sums
+    (memory usage scales with the window size).
+    """
+    x = np.asarray(x)
+    n = len(x)
+    if indices is None:
+        indices = np.arange(n)
+    indices = np.asarray(indices, dtype=int)
+    pad = get_window_pad(window)
+    i0, i1 = get_running_window_bounds(n, window, edges=edges)
+    offsets = np.arange(-pad, pad+1)
+    subset_index = indices[:, np.newaxis] + offsets
+    in_window = np.logical_and(subset_index >= i0[indices, np.newaxis],
+                               subset_index < i1[indices, np.newaxis])
+    dtype = np.result_type(x, fill_value)
+    subsets = np.full(subset_index.shape, fill_value, dtype=dtype)
+    subsets[in_window] = x[subset_index[in_window]]
+    return subsets
+
+
+def running_window_mean_above(x, window, threshold, indices=None,
+                              edges="clip", max_chunk_elements=2**20):
+    """
+    Mean of all values in the running window that exceed a (per window)
+    threshold (NaN if no value exceeds the threshold). The windows are
+    evaluated in chunks to limit the memory usage of the window subsets.
+
+    Arguments:
+        x (array): 1D input array
+        window (int): full window size in samples
+        threshold (array): threshold for each entry in `indices`
+        indices (int array): window centers (default: all samples)
+        edges (str): window handling at the edges ("clip" or "shrink")
+        max_chunk_elements (int): maximum size of window subset arrays
+
+    Returns:
+        mean (float64 array) with the length of `indices`
+    """
+    x = np.asarray(x)
+    if indices is None:
+        indices = np.arange(len(x))
+    indices = np.asarray(indices, dtype=int)
+    threshold = np.asarray(threshold, dtype=np.float64)
+    mean = np.full(indices.shape, np.nan)
+    chunk_size = max(max_chunk_elements // (2*get_window_pad(window)+1), 1)
+    for start in np.arange(0, len(indices), chunk_size):
+        chunk = slice(start, start+chunk_size)
+        subsets = running_window_subsets(x, window, indices=indices[chunk],
+                                         edges=edges)
+        with np.errstate(invalid="ignore"):
+            is_above = subsets > threshold[chunk, np.newaxis]
+        count = np.sum(is_above, axis=1)
+        total = np.sum(np.where(is_above, subsets, 0.0), axis=1,
+                       dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean[chunk] = total/count
+    return mean
+
+
+def _cumsum0(x):
+    """ Cumulative sum with leading zero (cumsum0[i] = sum(x[:i])) """
+    cumsum = np.zeros(len(x)+1, dtype=x.dtype)
+    np.cumsum(x, out=cumsum[1:])
+    return cumsum
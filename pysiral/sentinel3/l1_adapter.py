@@ -5,7 +5,7 @@ import xmltodict
 import xarray
 import numpy as np
 from scipy import interpolate
-from netCDF4 import num2date
+from pysiral.clocks import num2datetime64
 
 from pysiral import __version__ as pysiral_version
 from pysiral.classifier import CS2OCOGParameter, CS2LTPP, CS2PulsePeakiness
@@ -229,10 +229,9 @@ class Sentinel3CODAL2Wat(DefaultLoggingClass):
         """
 
         # Transfer the timestamp
-        # NOTE: Here it is critical that the xarray does not automatically decodes time since it is
-        #       difficult to work with the numpy datetime64 date format. Better to compute datetimes using
-        #       a know num2date conversion
-        utc_timestamp = num2date(self.nc.time_20_ku.values, units=self.nc.time_20_ku.units)
+        # NOTE: Here it is critical that the xarray does not automatically decodes time since the
+        #       time units of the product need to be used for the datetime64 conversion
+        utc_timestamp = num2datetime64(self.nc.time_20_ku.values, self.nc.time_20_ku.units)
         self.l1.time_orbit.timestamp = utc_timestamp
 
         # Set the geolocation
@@ -281,12 +280,8 @@ class Sentinel3CODAL2Wat(DefaultLoggingClass):
         #  as the window delay, corrected for instrumental effects and
         #  CoG offset"
         tracker_range_20hz = self.nc.tracker_range_20_ku.values
-        wfm_range = np.ndarray(shape=wfm_counts.shape, dtype=np.float32)
-        range_bin_index = np.arange(n_range_bins)
-        for record in np.arange(n_records):
-            wfm_range[record, :] = tracker_range_20hz[record] + \
-                (range_bin_index*self.cfg.range_bin_width) - \
-                (self.cfg.nominal_tracking_bin*self.cfg.range_bin_width)
+        range_bin_width = self.cfg.range_bin_width
+        window_delay = tracker_range_20hz - self.cfg.nominal_tracking_bin*range_bin_width
 
         # Set the operation mode
         op_mode = self.nc.instr_op_mode_20_ku.values
@@ -294,7 +289,7 @@ class Sentinel3CODAL2Wat(DefaultLoggingClass):
         radar_mode = np.array([op_mode_translator[int(val)] for val in op_mode]).astype("int8")
 
         # Set the waveform
-        self.l1.waveform.set_waveform_data(wfm_power, wfm_range, radar_mode)
+        self.l1.waveform.set_waveform_window(wfm_power, window_delay, range_bin_width, radar_mode)
 
         # Get the valid flags
         # TODO: Find a way to get a valid flag
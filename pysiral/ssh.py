@@ -2,6 +2,7 @@ from pysiral.errorhandler import ErrorStatus
 from pysiral.auxdata import AuxdataBaseClass
 from pysiral.iotools import ReadNC
 from pysiral.filter import (fill_nan, idl_smooth)
+from pysiral.helper import rle
 
 from treedict import TreeDict
 import scipy.ndimage as ndimage
@@ -166,11 +167,6 @@ class SSASmoothedLinear(SSAInterpolator):
 
         filter_options = self._options.marine_segment_filtering
         minimum_lead_number = filter_options.minimum_lead_number
-        footprint_size = self._options.smooth_filter_width_footprint_size
-        section_prop = {"i0": 0.0, "i1": 0.0,
-                        "width": 0.0, "n_tiepoints": 0,
-                        "land_before": (9999.0, 0),
-                        "land_after": (9999.0, 0)}
 
         # Find sea ice clusters
         land = l2.surface_type.land
@@ -181,9 +177,11 @@ class SSASmoothedLinear(SSAInterpolator):
 
         # Get indices for land sections
         lead_flag = l2.surface_type.lead.flag
-        land_flag = land.flag.astype(int)
-        land_start = np.where(np.ediff1d(land_flag) > 0)[0]
-        land_stop = np.where(np.ediff1d(land_flag) < 0)[0]
+        # (last marine index before and last land index of each land section)
+        n = l2.n_records
+        land_segment_start, land_segment_stop = get_flag_segments(land.flag)
+        land_start = land_segment_start[land_segment_start > 0] - 1
+        land_stop = land_segment_stop[land_segment_stop < n-1]
 
         # It is assumed here, that the l1b orbit segment never starts
         # or end with land. Thus the number of land start and land stop
@@ -195,33 +193,21 @@ class SSASmoothedLinear(SSAInterpolator):
             return
 
         # Add artificial large land sections on beginning and end of profile
-        n_marine_segments = len(land_start) + 1
-        n = l2.n_records
         land_start = np.concatenate(([-1000], land_start, [n-1]))
         land_stop = np.concatenate(([-1], land_stop, [n+1000]))
 
-        # Loop over marine segments and collect information
-        marine_segments = []
-        for i in np.arange(n_marine_segments):
-
-            marine_segment = section_prop.copy()
-
-            # Get the start stop indices for marine section
-            i0 = land_stop[i]+1
-            i1 = land_start[i+1]
-            marine_segment["i0"] = i0
-            marine_segment["i1"] = i1
-            marine_segment["width"] = (i1-i0) * footprint_size
+        # Start and stop indices (inclusive) of all marine segments
+        i0, i1 = land_stop[:-1]+1, land_start[1:]
+        i1 = np.maximum(i1, i0-1)
 
-            # get the number of leads
-            marine_section_indices = np.arange(i0, i1+1)
-            n_tiepoints = np.where(lead_flag[marine_section_indices])[0].size
-            marine_segment["n_tiepoints"] = n_tiepoints
+        # get the number of leads per segment
+        n_leads = np.concatenate(([0], np.cumsum(lead_flag.astype(int))))
+        n_tiepoints = n_leads[i1+1] - n_leads[i0]
 
-            if marine_segment["n_tiepoints"] < minimum_lead_number:
-                self._value[marine_section_indices] = np.nan
-
-            marine_segments.append(marine_segment)
+        # Remove all marine segments without sufficient tiepoints
+        invalid = n_tiepoints < minimum_lead_number
+        is_invalid = get_segment_mask(n, i0[invalid], i1[invalid])
+        self._value[is_invalid] = np.nan
 
     def _tiepoint_maxdist_filter(self, l2):
         """  A filter that does not removes ssa values which distance to
@@ -288,25 +274,42 @@ def get_tiepoint_distance(is_tiepoint):
 
 
 def get_tiepoints_oneway_distance(a, reverse=False):
-    """ loops through array and determines distance to latest flag=true """
+    """ Determines the distance (in samples) to the latest flag=true
+    (the array length is used for samples before the first flag=true) """
     n = len(a)
-    distance = np.full(a.shape, n+1, dtype=np.int32)
     if reverse:
         a = a[::-1]
-    dist = n
-    for i in np.arange(n):
-        if a[i]:
-            dist = 0
-        elif dist == n:
-            pass
-        else:
-            dist += 1
-        distance[i] = dist
+    index = np.arange(n)
+    latest = np.maximum.accumulate(np.where(a, index, -1)) if n > 0 else index
+    distance = np.where(latest >= 0, index-latest, n).astype(np.int32)
     if reverse:
         distance = distance[::-1]
     return distance
 
 
+def get_flag_segments(flag):
+    """ Returns the start and stop index (inclusive) of all segments
+    of consecutive flag=true values """
+    segments_len, segments_start, values = rle(np.asarray(flag, dtype=bool))
+    if segments_len is None:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    is_flag = values.astype(bool)
+    start = segments_start[is_flag]
+    stop = start + segments_len[is_flag] - 1
+    return start, stop
+
+
+def get_segment_mask(n, i0, i1):
+    """ Returns a boolean array of length n that is true for all
+    samples in the segments [i0, i1] (inclusive, may overlap) """
+    i0, i1 = np.asarray(i0, dtype=int), np.asarray(i1, dtype=int)
+    is_valid = i1 >= i0
+    counter = np.zeros(n+1, dtype=int)
+    np.add.at(counter, i0[is_valid], 1)
+    np.add.at(counter, i1[is_valid]+1, -1)
+    return np.cumsum(counter[:-1]) > 0
+
+
 def get_l2_ssh_class(name):
     pyclass = globals().get(name, None)
     if pyclass is not None:
@@ -7,6 +7,8 @@ Created on Mon Jul 27 11:25:04 2015
 
 from pysiral.config import RadarModes
 from pysiral.flag import FlagContainer, ANDCondition
+from pysiral.running_window import (running_window_mean, running_window_stats,
+                                    running_window_mean_above)
 
 import numpy as np
 from treedict import TreeDict
@@ -121,7 +123,11 @@ class SurfaceType(object):
                 np.zeros(shape=(self._n_records), dtype=np.bool))
 
     def append(self, annex):
-        self._surface_type = np.append(self._surface_type, annex.flag)
+        self.extend([annex])
+
+    def extend(self, annexes):
+        flags = [self._surface_type]+[annex.flag for annex in annexes]
+        self._surface_type = np.concatenate(flags)
 
     def set_subset(self, subset_list):
         self._surface_type = self._surface_type[subset_list]
@@ -206,10 +212,15 @@ class SurfaceTypeClassifier(object):
     """ Parent Class for surface type classifiers """
 
     def __init__(self):
+        self._radar_modes = RadarModes()
+        self.reset()
+
+    def reset(self):
+        """ Remove the classification result and classifier data (e.g. from
+        a previous orbit) """
         self._surface_type = SurfaceType()
         self._l1b_surface_type = None
         self._classifier = ClassifierContainer()
-        self._radar_modes = RadarModes()
 
     @property
     def result(self):
@@ -744,28 +755,18 @@ class ICESatKhvorostovskyTPEnhanced(SurfaceTypeClassifier):
         filter_sdev = np.full(reflectivity.shape, np.nan)
         filter_threshold = np.full(reflectivity.shape, np.nan)
 
-        # First try: simple loop (is there a better way?)
-        n = len(reflectivity)
-        filter_pad = int((window_size-1)/2)
-        for i in index_list:
-
-            # Get indices
-            i0, i1 = i-filter_pad, i+filter_pad+1
-            i0 = i0 if i0 >= 0 else 0
-            i1 = i1 if i1 <= n-1 else n
-
-            # Get statistics of filter subset
-            reflectivity_subset = reflectivity[i0:i1]
-            filter_mean[i] = np.nanmean(reflectivity_subset)
-            filter_sdev[i] = np.nanstd(reflectivity_subset)
-
-            # Background reflectivity is mean of filter values above
-            # certain threshold to exclude other leads
-            threshold = filter_mean[i] - sdev_factor * filter_sdev[i]
-            filter_threshold[i] = threshold
-            background_values = np.where(reflectivity_subset > threshold)[0]
-            background_reflectivity[i] = np.nanmean(
-                    reflectivity_subset[background_values])
+        # Get running statistics of filter subsets
+        count, mean, sdev = running_window_stats(reflectivity, window_size)
+        filter_mean[index_list] = mean[index_list]
+        filter_sdev[index_list] = sdev[index_list]
+
+        # Background reflectivity is mean of filter values above
+        # certain threshold to exclude other leads
+        threshold = filter_mean[index_list] - \
+            sdev_factor * filter_sdev[index_list]
+        filter_threshold[index_list] = threshold
+        background_reflectivity[index_list] = running_window_mean_above(
+            reflectivity, window_size, threshold, indices=index_list)
 
         # Compute local reflectivity offset from background reflectivity
         delta_r = background_reflectivity - reflectivity
@@ -800,29 +801,14 @@ class ICESatKhvorostovskyTPEnhanced(SurfaceTypeClassifier):
         # Only compute for valid elevations
         index_list = np.where(np.isfinite(elevation))[0]
 
-        n = len(elevation)
-        filter_pad = int((window_size-1)/2)
-
         # First pass: compute hr
-        for i in index_list:
-            # Get indices
-            i0, i1 = i-filter_pad, i+filter_pad+1
-            i0 = i0 if i0 >= 0 else 0
-            i1 = i1 if i1 <= n-1 else n
-            # Get statistics of filter subset
-            elevation_subset = elevation[i0:i1]
-            hr[i] = elevation[i] - np.nanmean(elevation_subset)
+        elevation_mean = running_window_mean(elevation, window_size)
+        hr[index_list] = elevation[index_list] - elevation_mean[index_list]
 
         # second pass: compute hr statistics
-        for i in index_list:
-            # Get indices
-            i0, i1 = i-filter_pad, i+filter_pad+1
-            i0 = i0 if i0 >= 0 else 0
-            i1 = i1 if i1 <= n-1 else n
-            # Get statistics of filter subset
-            hr_subset = hr[i0:i1]
-            hr_mean[i] = np.nanmean(hr_subset)
-            hr_sigma[i] = np.nanstd(hr_subset)
+        count, mean, sigma = running_window_stats(hr, window_size)
+        hr_mean[index_list] = mean[index_list]
+        hr_sigma[index_list] = sigma[index_list]
 
         return hr, hr_mean, hr_sigma, index_list
 
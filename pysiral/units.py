@@ -5,96 +5,99 @@ from construct import Adapter
 import numpy as np
 
 
-class OneHundredth(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)/100)
+class ScaledAdapter(Adapter):
+    """ Converts an integer field to a physical unit by either multiplying
+    with `factor` or dividing by `divisor`. `decode_array` applies the
+    identical conversion to numpy arrays of raw values """
 
+    factor = None
+    divisor = None
+    dtype = np.float32
 
-class TenThousands(Adapter):
     def _decode(self, obj, context):
-        return np.float32(float(obj)*10000)
+        return self.dtype(self._scale(float(obj)))
 
+    def decode_array(self, raw):
+        return self._scale(np.asarray(raw, dtype=np.float64)).astype(self.dtype)
 
-class OneHundredthDecibel(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)/100)
+    def _scale(self, value):
+        if self.divisor is not None:
+            return value/self.divisor
+        return value*self.factor
 
 
-class OneTenthMicroDeg(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-7)
+class OneHundredth(ScaledAdapter):
+    divisor = 100
 
 
-class MicroDeg(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-6)
+class TenThousands(ScaledAdapter):
+    factor = 10000
 
 
-class TenMicroDeg(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-5)
+class OneHundredthDecibel(ScaledAdapter):
+    divisor = 100
 
 
-class Centimeter(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-2)
+class OneTenthMicroDeg(ScaledAdapter):
+    factor = 1e-7
 
 
-class MilliMeter(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-3)
+class MicroDeg(ScaledAdapter):
+    factor = 1e-6
 
 
-class Micrometer(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-6)
+class TenMicroDeg(ScaledAdapter):
+    factor = 1e-5
 
 
-class PicoSecond(Adapter):
-    def _decode(self, obj, context):
-        return float(obj)*1e-12
+class Centimeter(ScaledAdapter):
+    factor = 1e-2
 
 
-class MicroWatts(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-6)
+class MilliMeter(ScaledAdapter):
+    factor = 1e-3
 
 
-class MicroRadians(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-6)
+class Micrometer(ScaledAdapter):
+    factor = 1e-6
 
 
-class OneTenthMicroRadians(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-6)
+class PicoSecond(ScaledAdapter):
+    factor = 1e-12
+    dtype = float
 
 
-class OneTenths(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-1)
+class MicroWatts(ScaledAdapter):
+    factor = 1e-6
 
 
-class OneThousands(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-3)
+class MicroRadians(ScaledAdapter):
+    factor = 1e-6
 
 
-class TenPascal(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)*1e-1)
+class OneTenthMicroRadians(ScaledAdapter):
+    factor = 1e-6
 
 
-class Per256(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)/256.)
+class OneTenths(ScaledAdapter):
+    factor = 1e-1
 
 
-class Per2048(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)/2048.)
+class OneThousands(ScaledAdapter):
+    factor = 1e-3
 
 
-class Per8096(Adapter):
-    def _decode(self, obj, context):
-        return np.float32(float(obj)/8096.)
+class TenPascal(ScaledAdapter):
+    factor = 1e-1
+
+
+class Per256(ScaledAdapter):
+    divisor = 256.
+
+
+class Per2048(ScaledAdapter):
+    divisor = 2048.
+
+
+class Per8096(ScaledAdapter):
+    divisor = 8096.
@@ -8,6 +8,7 @@ Created on Fri Jul 01 13:07:10 2016
 from retracker import cTFMRA
 import numpy as np
 
+from pysiral.classifier import get_waveform_max_and_sum
 from pysiral.logging import DefaultLoggingClass
 
 def get_waveforms_peak_power(wfm, dB=False):
@@ -285,17 +286,13 @@ class L1PWaveformPeakiness(DefaultLoggingClass):
         self.peakiness = np.full((n_records), np.nan)
         self.peakiness_old = np.full((n_records), np.nan)
 
-        # Compute peakiness for each waveform
-        for i in np.arange(n_records):
+        # Discard first bins, they are FFT artefacts anyway
+        wave_max, wave_sum = get_waveform_max_and_sum(wfm[:, self.skip_first_range_bins:])
 
-            # Discard first bins, they are FFT artefacts anyway
-            wave = wfm[i, self.skip_first_range_bins:]
-
-            # new peakiness
-            try:
-                self.peakiness[i] = float(max(wave))/float(sum(wave))*n_range_bins
-            except ZeroDivisionError:
-                self.peakiness[i] = np.nan
+        # new peakiness
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.peakiness[:] = wave_max/wave_sum*n_range_bins
+        self.peakiness[wave_sum == 0.0] = np.nan
 
     @property
     def required_options(self):
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the daily auxiliary data handling (missing files)
+"""
+
+import unittest
+
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+from netCDF4 import Dataset
+from pyproj import Proj
+from treedict import TreeDict
+
+from pysiral.auxdata import AuxClassConfig
+from pysiral.auxdata.sitype import ICDCNasaTeam
+
+
+GRID_PROJECTION = dict(proj="stere", lon_0=-45, lat_0=90, lat_ts=70, a=6378273, b=6356889.44891)
+GRID_DIMENSION = dict(n_cols=10, n_lines=10, dx=25000, dy=25000)
+
+
+class TestICDCNasaTeam(unittest.TestCase):
+
+    def setUp(self):
+        self.repository = tempfile.mkdtemp()
+        cfg = AuxClassConfig()
+        cfg.set_local_repository(self.repository)
+        cfg.set_filenaming("icdc_nasateam_{year}{month}{day}.nc")
+        cfg.set_subfolder([])
+        cfg.set_options(variable_name="myi", uncertainty_variable_name="myi_sdev",
+                        north=dict(projection=GRID_PROJECTION, dimension=GRID_DIMENSION))
+        self.handler = ICDCNasaTeam(cfg)
+
+    def tearDown(self):
+        shutil.rmtree(self.repository)
+
+    def testMissingFileDoesNotReusePreviousDay(self):
+        self._write_daily_file("20180301", 80.0)
+        self.assertArrayAlmostEqual(self._get_sitype(datetime(2018, 3, 1)), 0.8)
+
+        # Daily file missing: no values & error for all orbits of that day
+        for _ in range(2):
+            sitype = self._get_sitype(datetime(2018, 3, 2))
+            self.assertTrue(np.all(np.isnan(sitype)))
+            self.assertIn("auxdata_missing_sitype", self.handler.error.codes)
+
+        # The file is read once available
+        self._write_daily_file("20180302", 30.0)
+        self.assertArrayAlmostEqual(self._get_sitype(datetime(2018, 3, 2)), 0.3)
+        self.assertFalse(self.handler.error.status)
+
+    def assertArrayAlmostEqual(self, array, value):
+        self.assertTrue(np.allclose(array, value), msg=str(array))
+
+    def _get_sitype(self, start_time):
+        # NOTE: The Level-2 processor resets the error status of auxdata handlers after each orbit
+        self.handler.error.reset()
+        l2 = self._get_l2(start_time)
+        self.handler.add_variables_to_l2(l2)
+        return l2.auxvars["sitype"]
+
+    def _get_l2(self, start_time):
+        l2 = TreeDict()
+        l2.hemisphere = "north"
+        l2.hemisphere_code = "nh"
+        l2.n_records = 3
+        l2.track.start_time = start_time
+        l2.track.longitude = np.array([-45.0, -44.0, -46.0])
+        l2.track.latitude = np.array([89.5, 89.4, 89.3])
+        l2.auxvars = {}
+
+        def set_auxiliary_parameter(var_id, var_name, value, uncertainty):
+            l2.auxvars[var_id] = value
+        l2.set_auxiliary_parameter = set_auxiliary_parameter
+        return l2
+
+    def _get_filepath(self, datestr):
+        return os.path.join(self.repository, "icdc_nasateam_%s.nc" % datestr)
+
+    def _write_daily_file(self, datestr, myi_percent):
+        n = GRID_DIMENSION["n_cols"]
+        xc = (np.arange(n) - n/2 + 0.5) * GRID_DIMENSION["dx"]
+        x, y = np.meshgrid(xc, xc)
+        lons, lats = Proj(**GRID_PROJECTION)(x, y, inverse=True)
+        rootgrp = Dataset(self._get_filepath(datestr), "w")
+        rootgrp.createDimension("time", 1)
+        rootgrp.createDimension("y", n)
+        rootgrp.createDimension("x", n)
+        rootgrp.createVariable("longitude", "f8", ("y", "x"))[:] = lons
+        rootgrp.createVariable("latitude", "f8", ("y", "x"))[:] = lats
+        rootgrp.createVariable("myi", "f4", ("time", "y", "x"))[:] = np.full((1, n, n), myi_percent)
+        rootgrp.createVariable("myi_sdev", "f4", ("time", "y", "x"))[:] = np.full((1, n, n), 5.0)
+        rootgrp.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestICDCNasaTeam)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the datetime64 time conversions against netCDF4 and the
+datetime object implementation
+"""
+
+import unittest
+import warnings
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from netCDF4 import num2date, date2num
+
+from pysiral.clocks import (UTCTAIConverter, num2datetime64, datetime642num,
+                            to_datetime64)
+from pysiral.l1bdata import Level1bData
+
+
+TIME_UNITS = [
+    ("seconds since 1970-01-01 00:00:00.0", [0.0, 1.5, 1.49e9, 1.49e9+0.123456, -3600.5]),
+    ("seconds since 1970-01-01 00:00:00 UTC", [0.0, 86400.25, 1.0e9]),
+    ("seconds since 2000-01-01T00:00:00Z", [0.0, -0.5, 5.5e8]),
+    ("milliseconds since 1985-01-01 12:00:00", [0.0, 1.0, 1.0e12]),
+    ("minutes since 2010-06-15 06:30:00.5", [0.0, 0.5, -1440.0]),
+    ("hours since 1990-01-01 00:00:00 +02:00", [0.0, 1.5, 24.25, -3.5]),
+    ("hours since 1990-01-01T00:00:00+0200", [0.0, 1000.0]),
+    ("days since 1990-01-01 00:00:00 -05:30", [0.0, 0.25, 10000.0]),
+    ("Days since 1900-01-01", [0.0, 43000.75])]
+
+
+class TestTimeUnitConversion(unittest.TestCase):
+
+    def testNum2Datetime64(self):
+        for units, values in TIME_UNITS:
+            values = np.array(values)
+            reference = to_datetime64(num2date(values, units, "standard"))
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                timestamps = num2datetime64(values, units)
+            self.assertTrue(np.array_equal(timestamps, reference), msg=units)
+
+    def testDatetime642Num(self):
+        for units, values in TIME_UNITS:
+            timestamps = to_datetime64(num2date(np.array(values), units, "standard"))
+            reference = date2num(timestamps.astype(object), units, "standard")
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                result = datetime642num(timestamps, units)
+            self.assertTrue(np.allclose(result, reference, rtol=0, atol=1e-6), msg=units)
+
+
+class TestUTCTAIConverter(unittest.TestCase):
+
+    def setUp(self):
+        self.converter = UTCTAIConverter()
+
+    def testLeapSecondBoundaries(self):
+        one_day, one_us = timedelta(days=1), timedelta(microseconds=1)
+        tai = []
+        for leap_second_date in [datetime(2015, 7, 1), datetime(2017, 1, 1)]:
+            for offset in [-one_day, one_day-one_us, one_day, one_day+one_us]:
+                tai.append(leap_second_date + offset)
+        tai = np.array(tai, dtype=object)
+        for monotonically, check_all in [(True, False), (False, False), (True, True)]:
+            reference = to_datetime64(self.converter.tai2utc(tai, monotonically, check_all))
+            utc = self.converter.tai2utc(to_datetime64(tai), monotonically, check_all)
+            self.assertTrue(np.array_equal(utc, reference), msg=str((monotonically, check_all)))
+
+        # A leap second applies one day after its time of occurrence
+        leap_seconds = (to_datetime64(tai) - self.converter.tai2utc(
+            to_datetime64(tai), check_all=True)) / np.timedelta64(1, "s")
+        self.assertEqual(list(leap_seconds), [35, 35, 36, 36, 36, 36, 37, 37])
+
+    def testMonotonicLeapSecondsAcrossBoundary(self):
+        # Orbits across a leap second change use the leap seconds of the first record
+        tai = np.datetime64("2017-01-01T23:59:59") + \
+            np.arange(4).astype("timedelta64[s]")
+        utc = self.converter.tai2utc(tai)
+        self.assertTrue(np.all(tai-utc == np.timedelta64(36, "s")))
+        utc = self.converter.tai2utc(tai[::-1], monotonically=False)
+        self.assertTrue(np.all(tai[::-1]-utc == np.timedelta64(36, "s")))
+
+
+class TestDetectAndFillGaps(unittest.TestCase):
+
+    def testTimestampGap(self):
+        n, n_gap, gap_start = 40, 3, 12
+        t0 = np.datetime64("2017-03-01T12:00:00.123456")
+        timestamp = t0 + (np.arange(n)*46948).astype("timedelta64[us]")
+        is_record = np.ones(n, dtype=bool)
+        is_record[gap_start:gap_start+n_gap] = False
+
+        l1 = self._get_l1(timestamp[is_record])
+        l1.detect_and_fill_gaps()
+        filled = l1.time_orbit.timestamp
+        self.assertGreater(l1.n_records, n-n_gap)
+        self.assertEqual(l1.info.n_records, l1.n_records)
+        self.assertEqual(filled.dtype, np.dtype("datetime64[us]"))
+
+        # Original timestamps are retained with microsecond precision
+        is_valid = l1.waveform.is_valid
+        self.assertEqual(np.sum(is_valid), n-n_gap)
+        self.assertTrue(np.array_equal(filled[is_valid], timestamp[is_record]))
+
+        # Gap records are interpolated and flagged
+        gap_indices = np.where(np.logical_not(is_valid))[0]
+        self.assertTrue(np.all(np.diff(filled) > np.timedelta64(0, "us")))
+        self.assertTrue(np.all(filled[gap_indices] > timestamp[gap_start-1]))
+        self.assertTrue(np.all(filled[gap_indices] < timestamp[gap_start+n_gap]))
+        self.assertTrue(np.all(np.isnan(l1.waveform.power[gap_indices, :])))
+
+        # No gaps -> no change
+        l1 = self._get_l1(timestamp)
+        l1.detect_and_fill_gaps()
+        self.assertTrue(np.array_equal(l1.time_orbit.timestamp, timestamp))
+
+    def _get_l1(self, timestamp):
+        n, n_bins = len(timestamp), 16
+        l1 = Level1bData()
+        l1.info.set_attribute("n_records", n)
+        l1.time_orbit.timestamp = timestamp
+        l1.time_orbit.set_position(np.linspace(0, 1, n), np.linspace(70, 71, n), np.full(n, 7.0e5))
+        l1.time_orbit.set_antenna_attitude(np.zeros(n), np.zeros(n), np.zeros(n))
+        wfm_range = 7.0e5 + np.tile(np.arange(n_bins)*0.2342, (n, 1))
+        l1.waveform.set_waveform_data(np.ones((n, n_bins)), wfm_range, np.zeros(n, dtype=np.byte))
+        l1.waveform.set_valid_flag(np.ones(n, dtype=bool))
+        l1.correction.set_parameter("dry_troposphere", np.full(n, 2.3))
+        l1.classifier.add(np.full(n, 5.0), "peakiness")
+        l1.surface_type.set_flag(np.ones(n, dtype=np.int8))
+        return l1
+
+
+if __name__ == '__main__':
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite([
+        loader.loadTestsFromTestCase(TestTimeUnitConversion),
+        loader.loadTestsFromTestCase(TestUTCTAIConverter),
+        loader.loadTestsFromTestCase(TestDetectAndFillGaps)])
+    unittest.TextTestRunner(verbosity=2).run(suite)
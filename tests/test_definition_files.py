@@ -11,7 +11,7 @@ from treedict import TreeDict
 import os
 
 from pysiral import USER_CONFIG_PATH
-from pysiral.config import get_yaml_config
+from pysiral.config import get_yaml_config, ConfigInfo
 
 
 class TestDefinitionfiles(unittest.TestCase):
@@ -25,6 +25,12 @@ class TestDefinitionfiles(unittest.TestCase):
             filename = os.path.join(USER_CONFIG_PATH, def_file)
             self.assertIsInstance(get_yaml_config(filename), TreeDict, msg=def_file)
 
+    def testConfigInfoInstancesAreIndependent(self):
+        # The definition files are cached, changes of one instance must not leak into others
+        config = ConfigInfo()
+        config.mission.missions.append("unittest-mission")
+        self.assertNotIn("unittest-mission", ConfigInfo().mission.missions)
+
 if __name__ == '__main__':
     suite = unittest.TestLoader().loadTestsFromTestCase(TestDefinitionfiles)
     unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the l1p netCDF export/import of Level-1 data objects
+"""
+
+import unittest
+
+import copy
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from netCDF4 import Dataset
+
+from pysiral.l1bdata import Level1bData, L1bdataNCFile
+from pysiral.output import L1bDataNC, ScaledIntegerEncoding
+
+
+class TestScaledIntegerWaveformPower(unittest.TestCase):
+
+    n_records = 50
+    n_bins = 64
+
+    def setUp(self):
+        self.output_folder = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        power = rng.lognormal(-20.0, 2.0, (self.n_records, self.n_bins))
+        # One step above the minimum count (= netCDF default fill value of int16)
+        power[0, :] = np.linspace(0.0, 1.0e-9, self.n_bins)
+        power[0, 1] = 1.0e-9 / ScaledIntegerEncoding("int16").n_steps
+        power[1, 5:9] = np.nan
+        power[2, :] = 1.0e-10
+        self.power = power
+
+    def tearDown(self):
+        shutil.rmtree(self.output_folder)
+
+    def testRoundTripErrorBound(self):
+        for dtype in ScaledIntegerEncoding.valid_dtypes:
+            l1 = L1bdataNCFile(self._export(dtype))
+            l1.parse()
+            power = l1.waveform.power
+            is_nan = np.isnan(self.power)
+            self.assertTrue(np.array_equal(np.isnan(power), is_nan), msg=dtype)
+
+            # Documented error bound (+ single precision rounding of the decoded values)
+            value_range = np.nanmax(self.power, axis=1) - np.nanmin(self.power, axis=1)
+            n_steps = ScaledIntegerEncoding(dtype).n_steps
+            max_error = value_range / (2.0 * n_steps)
+            max_error += np.nanmax(np.abs(self.power), axis=1) * np.finfo(np.float32).eps
+            error = np.abs(np.where(is_nan, 0.0, power - self.power))
+            self.assertTrue(np.all(error <= max_error[:, np.newaxis]), msg=dtype)
+
+    def testFillValueIsDeclared(self):
+        filepath = self._export("int16")
+        nc = Dataset(filepath)
+        variable = nc.groups["waveform"].variables["power"]
+        self.assertEqual(variable._FillValue, np.iinfo(np.int16).max)
+        # Standard readers must only mask the NaN samples
+        counts = variable[:]
+        nc.close()
+        self.assertTrue(np.array_equal(np.ma.getmaskarray(counts), np.isnan(self.power)))
+
+    def _export(self, dtype):
+        return export_l1(get_l1(self.power), self.output_folder, dtype)
+
+
+class TestLazyDataGroups(unittest.TestCase):
+
+    n_records = 50
+    n_bins = 64
+
+    def setUp(self):
+        self.output_folder = tempfile.mkdtemp()
+        power = np.random.RandomState(0).lognormal(-20.0, 2.0, (self.n_records, self.n_bins))
+        self.l1 = get_l1(power)
+        self.filepath = export_l1(self.l1, self.output_folder, "int16")
+        self.window_delay = self.l1.waveform.window_delay + np.float32(2.3)
+
+    def tearDown(self):
+        shutil.rmtree(self.output_folder)
+
+    def testRangeCorrectionBeforeCopy(self):
+        l1 = self._parse_with_range_correction()
+        l1_copy = copy.copy(l1)
+        # The instance that reads the waveform group first must not consume the pending correction
+        self.assertTrue(np.allclose(l1_copy.waveform.window_delay, self.window_delay, rtol=0, atol=1e-3))
+        self.assertTrue(np.allclose(l1.waveform.window_delay, self.window_delay, rtol=0, atol=1e-3))
+
+        # Lazy deep copy
+        l1 = self._parse_with_range_correction()
+        l1_copy = copy.deepcopy(l1)
+        self.assertTrue(np.allclose(l1_copy.waveform.window_delay, self.window_delay, rtol=0, atol=1e-3))
+        self.assertTrue(np.allclose(l1.waveform.window_delay, self.window_delay, rtol=0, atol=1e-3))
+
+    def testRangeCorrectionBeforeRegionOfInterest(self):
+        l1 = self._parse_with_range_correction()
+        l1_roi = l1.extract_region_of_interest(LatitudeLimit(75.0))
+        subset = np.where(self.l1.time_orbit.latitude < 75.0)[0]
+        self.assertEqual(l1_roi.n_records, len(subset))
+        self.assertTrue(np.allclose(l1_roi.waveform.window_delay, self.window_delay[subset], rtol=0, atol=1e-3))
+        self.assertTrue(np.allclose(l1_roi.time_orbit.latitude, self.l1.time_orbit.latitude[subset]))
+        # The data groups and metadata are shared with the shallow copy
+        self.assertEqual(l1.waveform.power.shape[0], l1.n_records)
+
+        # Subset of a lazy instance
+        l1 = self._parse_with_range_correction()
+        l1_subset = l1.extract_subset(subset)
+        self.assertEqual(l1_subset.n_records, len(subset))
+        self.assertTrue(np.allclose(l1_subset.waveform.window_delay, self.window_delay[subset], rtol=0, atol=1e-3))
+        self.assertTrue(np.allclose(l1.waveform.window_delay, self.window_delay, rtol=0, atol=1e-3))
+
+    def _parse_with_range_correction(self):
+        l1 = L1bdataNCFile(self.filepath)
+        l1.parse()
+        l1.apply_range_correction("dry_troposphere")
+        self.assertFalse(l1.is_loaded("waveform"))
+        return l1
+
+
+class LatitudeLimit(object):
+    """ Region of interest with all records south of a latitude limit """
+
+    def __init__(self, latitude_limit):
+        self.latitude_limit = latitude_limit
+
+    def get_roi_list(self, longitude, latitude):
+        return np.where(latitude < self.latitude_limit)[0]
+
+
+def export_l1(l1, output_folder, dtype):
+    output = L1bDataNC()
+    output.l1b = l1
+    output.waveform_power_encoding = dtype
+    output.output_folder = output_folder
+    output.filename = "l1p_%s.nc" % dtype
+    output.export()
+    return os.path.join(output_folder, output.filename)
+
+
+def get_l1(power):
+    n, n_bins = power.shape
+    l1 = Level1bData()
+    l1.info.set_attribute("n_records", n)
+    l1.info.set_attribute("mission", "cryosat2")
+    l1.info.set_attribute("mission_data_source", "unittest")
+    t0 = np.datetime64("2017-03-01T12:00:00.123456")
+    l1.time_orbit.timestamp = t0 + (np.arange(n)*50000).astype("timedelta64[us]")
+    l1.time_orbit.set_position(np.linspace(0, 10, n), np.linspace(70, 80, n), np.full(n, 7.0e5))
+    l1.time_orbit.set_antenna_attitude(np.zeros(n), np.zeros(n), np.zeros(n))
+    wfm_range = 7.0e5 + np.tile(np.arange(n_bins)*0.2342, (n, 1))
+    l1.waveform.set_waveform_data(power, wfm_range, np.zeros(n, dtype=np.byte))
+    l1.waveform.set_valid_flag(np.ones(n, dtype=bool))
+    l1.correction.set_parameter("dry_troposphere", np.full(n, 2.3, dtype=np.float32))
+    l1.classifier.add(np.full(n, 5.0, dtype=np.float32), "peakiness")
+    l1.surface_type.set_flag(np.ones(n, dtype=np.int8))
+    l1.update_l1b_metadata()
+    return l1
+
+
+if __name__ == '__main__':
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite([
+        loader.loadTestsFromTestCase(TestScaledIntegerWaveformPower),
+        loader.loadTestsFromTestCase(TestLazyDataGroups)])
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for skipping l1p files with up-to-date Level-2 output (resume mode)
+and for the parallel orbit processing of the Level-2 processor
+"""
+
+import unittest
+
+import json
+import os
+import shutil
+import tempfile
+
+from collections import deque, OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+from netCDF4 import Dataset
+from treedict import TreeDict
+
+from pysiral.auxdata import AuxClassConfig
+from pysiral.auxdata.sitype import ICDCNasaTeam
+from pysiral.config import TimeRangeRequest
+from pysiral.l2proc import (Level2Processor, Level2ProcessingFingerprint, Level2OutputManifest,
+                            L2ProcessorReport)
+from pysiral.logging import DefaultLoggingClass
+from pysiral.output import L2PROC_FINGERPRINT_ATTRIBUTE
+
+
+class OutputHandler(object):
+
+    def __init__(self, output_def):
+        self.output_def = output_def
+
+
+class TestLevel2OutputManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.l1b_file = os.path.join(self.directory, "l1p_cryosat2_20180301T000000_20180301T004500.nc")
+        with open(self.l1b_file, "w") as fhandle:
+            fhandle.write("l1p")
+        self.output_file = os.path.join(self.directory, "l2_cryosat2_20180301T000000_20180301T004500.nc")
+        self.output_handler = OutputHandler(TreeDict.fromdict(
+            dict(filenaming="l2_{mission}_{start}_{stop}.nc", variables=dict(freeboard="sea_ice_freeboard")),
+            expand_nested=True))
+        self.l2def = self._get_l2def()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testUpToDateOrbitIsSkipped(self):
+        fingerprint = self._process()
+        manifest = Level2OutputManifest(self.directory)
+        self.assertEqual(manifest.n_records, 1)
+        self.assertTrue(manifest.is_up_to_date(self.l1b_file, fingerprint))
+        # The fingerprint does not change between processor runs
+        self.assertEqual(self._get_fingerprint(), fingerprint)
+
+    def testChangedSettingsRequireReprocessing(self):
+        self._process()
+        manifest = Level2OutputManifest(self.directory)
+
+        self.l2def.retracker.sea_ice.options.threshold = 0.7
+        self.assertFalse(manifest.is_up_to_date(self.l1b_file, self._get_fingerprint()))
+
+        self.l2def = self._get_l2def()
+        self.assertFalse(manifest.is_up_to_date(self.l1b_file, self._get_fingerprint(variable_name="fyi")))
+
+        self.output_handler.output_def.variables.sea_ice_thickness = "sea_ice_thickness"
+        self.assertFalse(manifest.is_up_to_date(self.l1b_file, self._get_fingerprint()))
+
+    def testNewerL1pFileRequiresReprocessing(self):
+        self._process()
+        file_stat = os.stat(self.l1b_file)
+        os.utime(self.l1b_file, (file_stat.st_atime, file_stat.st_mtime+10))
+        manifest = Level2OutputManifest(self.directory)
+        fingerprint = self._get_fingerprint()
+        self.assertFalse(manifest.is_up_to_date(self.l1b_file, fingerprint))
+
+        # Reprocessing: the later record supersedes the previous one
+        self.assertEqual(self._process(), fingerprint)
+        manifest = Level2OutputManifest(self.directory)
+        self.assertEqual(manifest.n_records, 1)
+        self.assertTrue(manifest.is_up_to_date(self.l1b_file, fingerprint))
+
+    def testMissingOutputRequiresReprocessing(self):
+        fingerprint = self._process()
+        os.remove(self.output_file)
+        manifest = Level2OutputManifest(self.directory)
+        self.assertFalse(manifest.is_up_to_date(self.l1b_file, fingerprint))
+
+        # Output file without or with a different fingerprint (e.g. written by another run)
+        self._write_output_file(None)
+        self.assertFalse(manifest.is_up_to_date(self.l1b_file, fingerprint))
+        self._write_output_file("0"*40)
+        self.assertFalse(manifest.is_up_to_date(self.l1b_file, fingerprint))
+
+    def testIncompleteManifestRecordIsIgnored(self):
+        fingerprint = self._process()
+        with open(os.path.join(self.directory, Level2OutputManifest.manifest_filename), "a") as fhandle:
+            fhandle.write('{"l1b_file": "l1p_cryosat2_20180301T004500_2018')
+        manifest = Level2OutputManifest(self.directory)
+        self.assertEqual(manifest.n_records, 1)
+        self.assertTrue(manifest.is_up_to_date(self.l1b_file, fingerprint))
+
+    def testCompactManifest(self):
+        fingerprint = self._process()
+        self._process()
+        other_l1b_file = self.l1b_file.replace("T000000_", "T004500_")
+        Level2OutputManifest(self.directory).add(other_l1b_file, self.output_file, "0"*40)
+        self.assertEqual(len(self._read_manifest_lines()), 3)
+
+        Level2OutputManifest(self.directory).compact()
+        lines = self._read_manifest_lines()
+        self.assertEqual([json.loads(line)["l1b_file"] for line in lines],
+                         [os.path.basename(self.l1b_file), os.path.basename(other_l1b_file)])
+        manifest = Level2OutputManifest(self.directory)
+        self.assertEqual(manifest.n_records, 2)
+        self.assertTrue(manifest.is_up_to_date(self.l1b_file, fingerprint))
+
+    def _read_manifest_lines(self):
+        with open(os.path.join(self.directory, Level2OutputManifest.manifest_filename)) as fhandle:
+            return fhandle.readlines()
+
+    def _process(self):
+        """ Imitates the output of the Level-2 processor for the l1p file """
+        fingerprint = self._get_fingerprint()
+        self._write_output_file(fingerprint)
+        Level2OutputManifest(self.directory).add(self.l1b_file, self.output_file, fingerprint)
+        return fingerprint
+
+    def _get_fingerprint(self, variable_name="myi"):
+        cfg = AuxClassConfig()
+        cfg.set_long_name("ICDC NASA Team multi-year ice fraction")
+        cfg.set_local_repository(self.directory)
+        cfg.set_filenaming("icdc_nasateam_{year}{month}{day}.nc")
+        cfg.set_subfolder(["year", "month"])
+        cfg.set_options(variable_name=variable_name, uncertainty_variable_name="myi_sdev")
+        fingerprint = Level2ProcessingFingerprint(self.l2def, [ICDCNasaTeam(cfg)])
+        return fingerprint.get(self.l1b_file, self.output_handler)
+
+    def _write_output_file(self, fingerprint):
+        rootgrp = Dataset(self.output_file, "w")
+        if fingerprint is not None:
+            rootgrp.setncattr(L2PROC_FINGERPRINT_ATTRIBUTE, fingerprint)
+        rootgrp.close()
+
+    @staticmethod
+    def _get_l2def():
+        l2def = dict(
+            corrections=["dry_troposphere", "wet_troposphere"],
+            retracker=dict(sea_ice=dict(pyclass="SICCILead", options=dict(threshold=0.5))))
+        return TreeDict.fromdict(l2def, expand_nested=True)
+
+
+class OrbitData(object):
+    """ Minimal Level-2 data object with the attributes of the orbit summary """
+
+    def __init__(self, index):
+        self.n_records = 100 + index
+        start_time = datetime(2018, 3, 1) + timedelta(minutes=45*index)
+        self.info = TreeDict.fromdict(dict(start_time=start_time, stop_time=start_time+timedelta(minutes=45)))
+        self.frb = np.where(np.arange(self.n_records) % (index+2) == 0, np.nan, 0.2)
+        self.sit = np.where(np.arange(self.n_records) % (index+3) == 0, np.nan, 2.0)
+
+
+class OrbitChainProcessor(Level2Processor):
+    """ Level-2 processor with a minimal orbit processing chain (no l1p files, auxiliary data
+    or output files). Every fourth orbit is discarded. """
+
+    def __init__(self, l1b_files, n_workers, output_handler=()):
+        # NOTE: Only the attributes required for the orbit processing
+        DefaultLoggingClass.__init__(self, "Level2Processor")
+        self._l2def = TreeDict.fromdict(dict(hemisphere="north"))
+        self._output_handler = list(output_handler)
+        self._l1b_files = l1b_files
+        self._n_workers = n_workers
+        self._streaming = True
+        self._async_output = False
+        self._output_writer = None
+        self._pending_orbit_summaries = OrderedDict([])
+        self._output_manifests = []
+        self._orbit = deque()
+        self.report = L2ProcessorReport()
+
+    def _l2_processing_chain(self, l1b_file, l1b=None):
+        index = self._l1b_files.index(l1b_file)
+        with self.report.stage_timer("l1p_read", 100+index):
+            pass
+        if index % 4 == 3:
+            return None, ["l2proc_invalid_l1b"], []
+        # The process id of the worker instead of the output file fingerprint
+        return OrbitData(index), [], [(l1b_file.replace("l1p_", "l2_"), str(os.getpid()))]
+
+
+class SummaryOutputHandler(object):
+    """ Output handler with the attributes used for the processor summary files """
+
+    id = "l2i"
+
+    def __init__(self, basedir):
+        self.basedir = basedir
+
+    def get_directory_from_dt(self, dt, create=True):
+        directory = os.path.join(self.basedir, "%04d" % dt.year, "%02d" % dt.month)
+        if create and not os.path.isdir(directory):
+            os.makedirs(directory)
+        return directory
+
+
+class TestParallelOrbitProcessing(unittest.TestCase):
+
+    l1b_files = ["l1p_cryosat2_20180301T%02d0000.nc" % i for i in range(10)]
+
+    def testParallelRunIsIdenticalToSerialRun(self):
+        serial = self._process(n_workers=1)
+        parallel = self._process(n_workers=2)
+
+        self.assertEqual(self._get_orbit_summaries(parallel), self._get_orbit_summaries(serial))
+        self.assertEqual(len(parallel.report.orbit_summaries), 8)
+        self.assertEqual(parallel.report.error_counter, serial.report.error_counter)
+        self.assertEqual(parallel.report.error_counter["l2proc_invalid_l1b"],
+                         [self.l1b_files[3], self.l1b_files[7]])
+        self.assertEqual(self._get_stage_timing(parallel), self._get_stage_timing(serial))
+
+        # Each worker processes a contiguous block of files
+        process_ids = [summary["output_files"][0][1] for summary in parallel.report.orbit_summaries]
+        self.assertEqual(len(set(process_ids)), 2)
+        self.assertNotIn(str(os.getpid()), process_ids)
+        self.assertEqual(process_ids, sorted(process_ids, key=process_ids.index))
+
+    def _process(self, n_workers):
+        l2proc = OrbitChainProcessor(list(self.l1b_files), n_workers)
+        l2proc._l2_processing_of_orbit_files()
+        return l2proc
+
+    @staticmethod
+    def _get_orbit_summaries(l2proc):
+        return [[(key, value) for key, value in summary.items() if key != "output_files"]
+                for summary in l2proc.report.orbit_summaries]
+
+    @staticmethod
+    def _get_stage_timing(l2proc):
+        # (l1b_file, stage, n_records) without the wall time
+        return [(l1b_file, stage, n_records) for l1b_file, stage, seconds, n_records in l2proc.report.stage_timing]
+
+
+class TestInMemoryProcessing(unittest.TestCase):
+
+    l1b_files = ["l1p_cryosat2_20180301T%02d0000.nc" % i for i in range(5)]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testFinishWritesSummaryFiles(self):
+        l2proc = OrbitChainProcessor(list(self.l1b_files), 1, [SummaryOutputHandler(self.directory)])
+        for l1b_file in self.l1b_files:
+            l2proc.process_l1b_data(TreeDict.fromdict(dict(info=dict()), expand_nested=True), l1b_file)
+        self.assertEqual(l2proc.report.n_orbits, 4)
+
+        time_range = TimeRangeRequest(datetime(2018, 3, 1), datetime(2018, 3, 2), period="custom")
+        l2proc.finish(time_range)
+        export_folder = os.path.join(self.directory, "2018", "03")
+        with open(os.path.join(export_folder, "pysiral-l2proc-summary.txt")) as fhandle:
+            summary = fhandle.read()
+        self.assertIn("l2 orbits", summary)
+        self.assertIn(time_range.label, summary)
+        self.assertIn(self.l1b_files[3], summary)
+        with open(os.path.join(export_folder, "pysiral-l2proc-timing.json")) as fhandle:
+            timing = json.load(fhandle)
+        self.assertEqual(len([r for r in timing["records"] if r["stage"] == "l1p_read"]), 5)
+
+        # The report is reset for the next run
+        self.assertEqual(l2proc.report.n_orbits, 0)
+        self.assertIsNone(l2proc.report.time_range)
+
+    def testManifestIsCompactedAfterEachRun(self):
+        l2proc = OrbitChainProcessor(list(self.l1b_files), 1, [SummaryOutputHandler(self.directory)])
+        time_range = TimeRangeRequest(datetime(2018, 3, 1), datetime(2018, 3, 2), period="custom")
+        for i in range(3):
+            for l1b_file in self.l1b_files:
+                l2proc.process_l1b_data(TreeDict.fromdict(dict(info=dict()), expand_nested=True), l1b_file)
+            l2proc.finish(time_range)
+            # One record per (not discarded) l1p file
+            with open(os.path.join(self.directory, Level2OutputManifest.manifest_filename)) as fhandle:
+                self.assertEqual(len(fhandle.readlines()), 4)
+
+
+if __name__ == '__main__':
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite([
+        loader.loadTestsFromTestCase(TestLevel2OutputManifest),
+        loader.loadTestsFromTestCase(TestParallelOrbitProcessing),
+        loader.loadTestsFromTestCase(TestInMemoryProcessing)])
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for gridding l2i parameters with the L2iDataStack against the
+per grid cell list implementation
+"""
+
+import unittest
+
+import numpy as np
+from treedict import TreeDict
+
+from pysiral.l3proc import L2iDataStack, L3DataGrid
+from pysiral.logging import stdout_logger
+from pysiral.errorhandler import ErrorStatus
+
+
+GRID_METHODS = {
+    "sea_ice_freeboard": "average",
+    "sea_ice_freeboard_uncertainty": "average_uncertainty",
+    "sea_surface_height_anomaly": "median",
+    "surface_type": "unique",
+    "radar_mode": "none"}
+
+
+class GridDefinition(object):
+    """ Grid definition with the grid cell indices as longitude/latitude values """
+
+    def __init__(self, numx, numy):
+        self.extent = TreeDict.fromdict(dict(numx=numx, numy=numy), expand_nested=True)
+
+    def grid_indices(self, longitude, latitude):
+        return np.floor(longitude), np.floor(latitude)
+
+
+class L2iFile(object):
+    """ Minimal l2i data object with the attributes used by L2iDataStack """
+
+    def __init__(self, xi, yj, **parameters):
+        self.n_records = len(xi)
+        self.time = np.datetime64("2018-03-01T00:00:00") + np.arange(self.n_records).astype("timedelta64[s]")
+        self.mission = "cryosat2"
+        self.timeliness = "rep"
+        self.info = TreeDict()
+        self.longitude = np.asarray(xi, dtype=float) + 0.5
+        self.latitude = np.asarray(yj, dtype=float) + 0.5
+        for name, value in parameters.items():
+            setattr(self, name, np.asarray(value))
+
+
+class TestL2iDataStackGridding(unittest.TestCase):
+
+    numx, numy = 6, 6
+    minimum_valid_grid_points = 2
+
+    def setUp(self):
+        self.griddef = GridDefinition(self.numx, self.numy)
+        l3def = dict(grid_settings=dict(minimum_valid_grid_points=self.minimum_valid_grid_points),
+                     l2_parameter={})
+        for name, grid_method in GRID_METHODS.items():
+            l3def["l2_parameter"][name] = dict(grid_method=grid_method, fillvalue=np.nan, dtype="f4")
+        self.l3def = TreeDict.fromdict(l3def, expand_nested=True)
+        self.l2_parameter = [self.l3def.l2_parameter[n] for n in sorted(GRID_METHODS.keys())]
+
+    def testPerCellListSemantics(self):
+        rng = np.random.RandomState(1)
+        l2i_files = []
+        for i in range(4):
+            n = 300
+            # Records outside the grid on all sides, the last two rows/columns of the grid are empty
+            xi = rng.randint(-1, self.numx-2, n)
+            yj = rng.randint(-1, self.numy-2, n)
+            xi[:3], yj[:3] = [self.numx, 0, 2], [0, self.numy, -1]
+            parameters = dict(
+                sea_ice_freeboard=rng.normal(0.2, 0.1, n).astype(np.float32),
+                sea_ice_freeboard_uncertainty=rng.uniform(0.01, 0.1, n).astype(np.float32),
+                sea_surface_height_anomaly=rng.normal(0.0, 0.1, n).astype(np.float32),
+                surface_type=(xi + yj*self.numx).astype(np.float32),
+                radar_mode=np.zeros(n))
+            for name in ["sea_ice_freeboard", "sea_surface_height_anomaly"]:
+                parameters[name][rng.uniform(size=n) < 0.3] = np.nan
+            # Parameter not available in all l2i files
+            if i == 1:
+                parameters.pop("sea_surface_height_anomaly")
+            l2i_files.append(L2iFile(xi, yj, **parameters))
+
+        # Grid cell with a single valid data point
+        l2i_files.append(L2iFile(
+            [4, 4], [4, 4], sea_ice_freeboard=[0.3, np.nan], sea_ice_freeboard_uncertainty=[0.05, 0.05],
+            sea_surface_height_anomaly=[0.1, np.nan], surface_type=[28., 28.], radar_mode=[0, 0]))
+
+        stack = self._get_stack(l2i_files)
+        grid = self._get_l3_grid(stack)
+        reference = self._get_per_cell_reference(l2i_files)
+
+        self.assertNotIn("radar_mode", grid.vars)
+        for name in sorted(reference.keys()):
+            self.assertTrue(np.allclose(grid.vars[name], reference[name], rtol=1e-6, equal_nan=True), msg=name)
+            # Empty grid cells
+            self.assertTrue(np.all(np.isnan(grid.vars[name][-1, :])), msg=name)
+            self.assertTrue(np.all(np.isnan(grid.vars[name][:, -1])), msg=name)
+        self.assertTrue(np.isnan(grid.vars["sea_ice_freeboard"][4, 4]))
+
+        # Access to the data points of a single grid cell
+        xi, yj = np.floor(l2i_files[0].longitude), np.floor(l2i_files[0].latitude)
+        in_cell = np.logical_and(xi == 2, yj == 3)
+        cell_data = stack.stack["sea_ice_freeboard"][3][2]
+        self.assertTrue(np.allclose(cell_data[:np.sum(in_cell)], l2i_files[0].sea_ice_freeboard[in_cell],
+                                    rtol=0, atol=0, equal_nan=True))
+        self.assertEqual(len(stack.stack["sea_ice_freeboard"][5][5]), 0)
+        self.assertEqual(stack.n_total_records, sum([l2i.n_records for l2i in l2i_files]))
+
+    def testNonFiniteValuesAreIgnored(self):
+        # NOTE: nanmean/nanmedian of the per grid cell implementation would include +/-inf
+        l2i = L2iFile(
+            [0, 0, 0, 0, 1, 1], [0, 0, 0, 0, 0, 0],
+            sea_ice_freeboard=[0.1, 0.3, np.inf, np.nan, 0.2, -np.inf],
+            sea_ice_freeboard_uncertainty=[0.1, 0.1, 0.1, np.inf, 0.1, 0.1],
+            sea_surface_height_anomaly=[-np.inf, 0.1, 0.3, 0.5, -np.inf, np.inf],
+            surface_type=[1., 1., 1., 1., 2., 2.], radar_mode=np.zeros(6))
+        grid = self._get_l3_grid(self._get_stack([l2i]))
+        self.assertAlmostEqual(grid.vars["sea_ice_freeboard"][0, 0], 0.2)
+        self.assertTrue(np.isnan(grid.vars["sea_ice_freeboard"][0, 1]))
+        self.assertAlmostEqual(grid.vars["sea_ice_freeboard_uncertainty"][0, 0], np.sqrt(1./0.3), places=5)
+        self.assertAlmostEqual(grid.vars["sea_surface_height_anomaly"][0, 0], 0.3)
+        self.assertTrue(np.isnan(grid.vars["sea_surface_height_anomaly"][0, 1]))
+        self.assertEqual(grid.vars["surface_type"][0, 1], 2.0)
+
+    def _get_stack(self, l2i_files):
+        stack = L2iDataStack(self.griddef, self.l2_parameter)
+        for l2i in l2i_files:
+            stack.add(l2i)
+        return stack
+
+    def _get_l3_grid(self, stack):
+        # NOTE: Only the attributes required for gridding the l2i parameters
+        grid = L3DataGrid.__new__(L3DataGrid)
+        grid.log = stdout_logger("L3DataGrid")
+        grid.error = ErrorStatus(caller_id="L3DataGrid")
+        grid._griddef = self.griddef
+        grid._l3def = self.l3def
+        grid.l2 = stack
+        grid.vars = {}
+        grid._init_parameter_fields(self.l2_parameter)
+        grid.grid_l2_parameter()
+        return grid
+
+    def _get_per_cell_reference(self, l2i_files):
+        """ Gridding with python lists for each grid cell (previous implementation) """
+        reference = {}
+        for name, grid_method in GRID_METHODS.items():
+            if grid_method == "none":
+                continue
+            cell_data = [[[] for xi in range(self.numx)] for yj in range(self.numy)]
+            for l2i in l2i_files:
+                if not hasattr(l2i, name):
+                    continue
+                xi, yj = self.griddef.grid_indices(l2i.longitude, l2i.latitude)
+                for x, y, value in zip(xi.astype(int), yj.astype(int), getattr(l2i, name)):
+                    if 0 <= x < self.numx and 0 <= y < self.numy:
+                        cell_data[y][x].append(value)
+
+            grid = np.full((self.numy, self.numx), np.nan)
+            for xi in range(self.numx):
+                for yj in range(self.numy):
+                    data = np.array(cell_data[yj][xi])
+                    valid = np.where(np.isfinite(data))[0]
+                    if len(valid) < self.minimum_valid_grid_points:
+                        continue
+                    if grid_method == "average":
+                        grid[yj, xi] = np.nanmean(data)
+                    elif grid_method == "average_uncertainty":
+                        grid[yj, xi] = np.abs(np.sqrt(1. / np.sum(data[valid])))
+                    elif grid_method == "unique":
+                        grid[yj, xi] = np.unique(data)
+                    elif grid_method == "median":
+                        grid[yj, xi] = np.nanmedian(data)
+            reference[name] = grid
+        return reference
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestL2iDataStackGridding)
+    unittest.TextTestRunner(verbosity=2).run(suite)
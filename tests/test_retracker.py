@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Regression tests of the SICCILead retracker against scipy.optimize.curve_fit
+"""
+
+import unittest
+import warnings
+
+import numpy as np
+from scipy.optimize import curve_fit
+
+from pysiral.retracker import SICCILead, P_lead
+
+
+class TestSICCILead(unittest.TestCase):
+
+    n_records = 300
+    n_bins = 128
+    initial_guess = [30., 5., 5., 1.]
+
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        n = self.n_records
+        t = np.arange(self.n_bins).astype(float)
+        t_0, k = rng.uniform(30, 80, n), rng.uniform(0.5, 5, n)
+        sigma, a = rng.uniform(0.5, 3, n), rng.uniform(0.5, 2, n)
+        self.wfm = P_lead(t[np.newaxis, :], t_0[:, np.newaxis], k[:, np.newaxis],
+                          sigma[:, np.newaxis], a[:, np.newaxis])
+        self.noise = 0.05*rng.normal(size=self.wfm.shape)*a[:, np.newaxis]
+        self.range = 7.0e5 + np.tile(t*0.2342, (n, 1))
+
+    def testCurveFitAgreement(self):
+        self._assert_curve_fit_agreement(self.wfm)
+
+    def testCurveFitAgreementWithNoise(self):
+        self._assert_curve_fit_agreement(self.wfm + self.noise)
+
+    def _assert_curve_fit_agreement(self, wfm):
+        # The batched solver reproduces the MINPACK algorithm of curve_fit, including the
+        # waveforms where the fit fails
+        reference = self._get_curve_fit_tracking_points(wfm)
+        retracked_bin = self._retrack(wfm)
+        is_fitted = np.isfinite(reference)
+        self.assertGreater(np.mean(is_fitted), 0.75)
+        self.assertTrue(np.array_equal(np.isfinite(retracked_bin), is_fitted))
+        difference = np.abs(retracked_bin[is_fitted]-reference[is_fitted])
+        self.assertTrue(np.all(difference < 1.0e-4))
+
+    def _retrack(self, wfm):
+        retracker = SICCILead()
+        retracker.set_options(skip_first_bins=0, initial_guess=list(self.initial_guess),
+                              maxfev=1000, filter={"use_filter": False})
+        retracker.init(self.n_records)
+        retracker.create_retracker_properties(self.n_records)
+        indices = np.arange(self.n_records)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            retracker.l2_retrack(self.range, wfm, indices, None, None)
+        return retracker.retracked_bin
+
+    def _get_curve_fit_tracking_points(self, wfm):
+        t = np.arange(self.n_bins).astype(float)
+        tracking_point = np.full(self.n_records, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for i in np.arange(self.n_records):
+                p0 = list(self.initial_guess)
+                p0[3] = np.max(wfm[i, :])
+                try:
+                    popt, cov = curve_fit(P_lead, t, wfm[i, :], p0=p0, maxfev=1000)
+                except RuntimeError:
+                    continue
+                tracking_point[i] = popt[0]
+        return tracking_point
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSICCILead)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the running window statistics against the explicit loops over
+the window subsets (previous implementation in surface_type and filter)
+"""
+
+import unittest
+import warnings
+
+import numpy as np
+
+from pysiral.running_window import (running_window_stats, running_window_mean,
+                                    running_window_mean_above, get_window_pad)
+
+
+def clip_window_loop(x, window, sdev_factor=1.0):
+    """ Window statistics with the window cut at the array boundaries """
+    n = len(x)
+    mean, sdev, background = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+    filter_pad = int((window-1)/2)
+    for i in np.arange(n):
+        i0, i1 = i-filter_pad, i+filter_pad+1
+        i0 = i0 if i0 >= 0 else 0
+        i1 = i1 if i1 <= n-1 else n
+        subset = x[i0:i1]
+        mean[i] = np.nanmean(subset)
+        sdev[i] = np.nanstd(subset)
+        threshold = mean[i] - sdev_factor * sdev[i]
+        background[i] = np.nanmean(subset[np.where(subset > threshold)[0]])
+    return mean, sdev, background
+
+
+def shrink_window_loop(x, window):
+    """ IDL smooth(x, window, /EDGE_TRUNCATE, /NAN) """
+    n = len(x)
+    smoothed = np.full(n, np.nan)
+    for i in np.arange(n):
+        kernel_halfsize = np.floor((window-1)/2).astype(int)
+        if i < kernel_halfsize:
+            kernel_halfsize = i
+        if n-1-i < kernel_halfsize:
+            kernel_halfsize = n-1-i
+        smoothed[i] = np.nanmean(x[i-kernel_halfsize:i+kernel_halfsize+1])
+    return smoothed
+
+
+class TestRunningWindow(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        x = rng.normal(10.0, 2.0, 40)
+        # NaN and inf at the edges of the windows and of the array
+        x[[0, 5, 6, 7, 8, 9, 20, 39]] = np.nan
+        x[[1, 12]] = np.inf
+        x[[13, 30]] = -np.inf
+        self.x = x
+        self.finite_x = np.where(np.isfinite(x), x, np.nan)
+
+    def testClipWindow(self):
+        for x in [self.x, self.finite_x]:
+            for window in [1, 2, 3, 4, 5, 11, 39, 40, 41, 81, 200]:
+                count, mean, sdev = running_window_stats(x, window)
+                reference_mean, reference_sdev, reference_background = self._loop(clip_window_loop, x, window)
+                msg = "window=%g" % window
+                self._assert_equal(mean, reference_mean, msg)
+                self._assert_equal(sdev, reference_sdev, msg)
+                # Count of valid (not NaN) samples
+                pad = get_window_pad(window)
+                reference_count = [np.sum(~np.isnan(x[max(i-pad, 0):i+pad+1])) for i in np.arange(len(x))]
+                self.assertTrue(np.array_equal(count, reference_count), msg=msg)
+
+                threshold = mean - sdev
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    background = running_window_mean_above(x, window, threshold, max_chunk_elements=50)
+                self._assert_equal(background, reference_background, msg)
+
+    def testShrinkWindow(self):
+        for x in [self.x, self.finite_x]:
+            for window in [1, 2, 3, 5, 11, 40, 41, 81, 200]:
+                mean = running_window_mean(x, window, edges="shrink")
+                self._assert_equal(mean, self._loop(shrink_window_loop, x, window), "window=%g" % window)
+
+    def testInfiniteValues(self):
+        count, mean, sdev = running_window_stats(np.array([1., np.inf, -np.inf, np.nan, -np.inf, 3.]), 3)
+        self.assertEqual(list(count), [2, 3, 2, 2, 2, 2])
+        self.assertEqual(list(mean[[0, 3, 4, 5]]), [np.inf, -np.inf, -np.inf, -np.inf])
+        self.assertTrue(np.all(np.isnan(mean[[1, 2]])))
+        self.assertTrue(np.all(np.isnan(sdev)))
+
+    def testEmptyInput(self):
+        count, mean, sdev = running_window_stats(np.zeros(0), 5)
+        self.assertEqual((len(count), len(mean), len(sdev)), (0, 0, 0))
+
+    @staticmethod
+    def _loop(func, *args):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with np.errstate(invalid="ignore"):
+                return func(*args)
+
+    def _assert_equal(self, result, reference, msg):
+        self.assertTrue(np.array_equal(np.isnan(result), np.isnan(reference)), msg=msg)
+        self.assertTrue(np.allclose(result, reference, rtol=1e-10, atol=1e-10, equal_nan=True), msg=msg)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestRunningWindow)
+    unittest.TextTestRunner(verbosity=2).run(suite)